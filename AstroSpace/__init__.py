@@ -3,6 +3,8 @@ from flask import Flask, jsonify, g, url_for
 from flask_wtf.csrf import CSRFProtect
 from werkzeug.exceptions import RequestEntityTooLarge
 from AstroSpace.logging_utils import configure_app_logging, debug_log
+from AstroSpace.utils.simbad_cache import configure_simbad_cache
+from AstroSpace.request_globals import LazyRequestGlobals, register_lazy_global
 
 csrf = CSRFProtect()
 
@@ -10,6 +12,7 @@ csrf = CSRFProtect()
 def create_app(test_config=None):
     # create and configure the app
     app = Flask(__name__, instance_relative_config=True)
+    app.app_ctx_globals_class = LazyRequestGlobals
 
     # first priority 
     app.config.from_object('AstroSpace.config.Config') 
@@ -35,6 +38,7 @@ def create_app(test_config=None):
 
     #app.config['UPLOAD_PATH'] = os.path.join(app.root_path, 'uploads')
     os.makedirs(app.config['UPLOAD_PATH'],exist_ok=True)
+    configure_simbad_cache(app.config)
     skip_db_init = app.config.get("SKIP_DB_INIT", False)
     debug_log(
         "Application configured (instance_path=%s, skip_db_init=%s, max_upload_bytes=%s)",
@@ -58,25 +62,23 @@ def create_app(test_config=None):
     csrf.init_app(app)
 
     from . import db
+    from .services.site import get_web_info
+    if app.config.get("DB_GEVENT_WAIT_CALLBACK"):
+        db.install_gevent_wait_callback()
+
     if not skip_db_init:
         db.init_app(app)
         debug_log(
             "Database bootstrap is managed via Alembic migrations; runtime schema mutation is disabled."
         )
     
-    @app.before_request
     def load_web_info():
         if skip_db_init:
-            g.web_info = {}
-            return
+            return {}
+        return get_web_info()
 
-        conn = db.get_conn()
-        with conn.cursor() as cur:
-            cur.execute("SELECT * FROM web_info LIMIT 1")
-            info = cur.fetchone()
+    register_lazy_global(app, "web_info", load_web_info)
 
-        g.web_info = info or {}  # fallback to empty dict
-    
     def static_asset_url(filename):
         static_root = app.static_folder or os.path.join(app.root_path, "static")
         asset_path = os.path.abspath(os.path.join(static_root, filename.replace("/", os.sep)))
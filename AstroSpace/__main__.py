@@ -2,7 +2,7 @@ import logging
 import os
 import sys
 
-from AstroSpace.db import BASELINE_MIGRATION_REVISION, stamp_db, upgrade_db
+from AstroSpace.db import BASELINE_MIGRATION_REVISION, open_connection, stamp_db, upgrade_db
 from AstroSpace.logging_utils import debug_log, runtime_debug_enabled, strip_debug_flag
 
 
@@ -52,6 +52,119 @@ def handle_management_command(argv=None):
         stamp_db(revision=revision)
         return True
 
+    if command == "reconcile-counters":
+        from AstroSpace.services.engagement import reconcile_engagement_counters
+
+        logging.basicConfig(level=logging.INFO)
+        conn = open_connection()
+        try:
+            corrected = reconcile_engagement_counters(conn)
+        finally:
+            conn.close()
+        logging.getLogger("AstroSpace").info("Reconciled engagement counters for %s image(s)", corrected)
+        return True
+
+    if command == "rebuild-view-rollups":
+        from AstroSpace.services.view_rollups import rebuild_view_rollups
+
+        logging.basicConfig(level=logging.INFO)
+        conn = open_connection()
+        try:
+            folded = rebuild_view_rollups(conn)
+        finally:
+            conn.close()
+        logging.getLogger("AstroSpace").info("Folded %s image view row(s) into the view sketches", folded)
+        return True
+
+    if command == "prune-views":
+        from AstroSpace.config import Config
+        from AstroSpace.services.view_rollups import prune_image_views
+
+        retention_days = int(args[1]) if len(args) > 1 else Config.VIEW_RETENTION_DAYS
+        logging.basicConfig(level=logging.INFO)
+        conn = open_connection()
+        try:
+            pruned = prune_image_views(conn, retention_days)
+        finally:
+            conn.close()
+        logging.getLogger("AstroSpace").info(
+            "Pruned %s image view row(s) older than %s day(s)", pruned, retention_days
+        )
+        return True
+
+    if command == "backfill-sky-positions":
+        from AstroSpace.services.sky_positions import backfill_sky_positions
+
+        logging.basicConfig(level=logging.INFO)
+        conn = open_connection()
+        try:
+            filled = backfill_sky_positions(conn)
+        finally:
+            conn.close()
+        logging.getLogger("AstroSpace").info("Stored sky positions for %s post(s)", filled)
+        return True
+
+    if command == "rebuild-plate-solves":
+        from AstroSpace import create_app
+        from AstroSpace.db import get_conn
+        from AstroSpace.services.maintenance import (
+            MAINTENANCE_PLATE_SOLVE,
+            count_stale_plate_solves,
+            queue_maintenance_job,
+        )
+
+        logging.basicConfig(level=logging.INFO)
+        logger = logging.getLogger("AstroSpace")
+        app = create_app()
+        with app.app_context():
+            if "--dry-run" in args:
+                counts = count_stale_plate_solves(get_conn(), app.config["UPLOAD_PATH"])
+                logger.info(
+                    "%s of %s image(s) have stale plate-solve artifacts (%s up to date, %s missing their image file)",
+                    counts["stale"],
+                    counts["total"],
+                    counts["up_to_date"],
+                    counts["skipped"],
+                )
+                return True
+            job_id, created = queue_maintenance_job(MAINTENANCE_PLATE_SOLVE, force="--force" in args)
+        if created:
+            logger.info("Queued plate-solve rebuild as job %s; a worker will pick it up", job_id)
+        else:
+            logger.info("A plate-solve rebuild is already queued or running as job %s", job_id)
+        return True
+
+    if command == "simbad-cache":
+        from AstroSpace.config import Config
+        from AstroSpace.utils.simbad_cache import simbad_cache_from_config
+
+        action = args[1] if len(args) > 1 else "stats"
+        logging.basicConfig(level=logging.INFO)
+        logger = logging.getLogger("AstroSpace")
+        cache = simbad_cache_from_config(vars(Config))
+        if action == "prune":
+            logger.info("Removed %s expired SIMBAD cache entries from %s", cache.prune(), cache.directory)
+        elif action == "clear":
+            logger.info("Removed %s SIMBAD cache entries from %s", cache.clear(), cache.directory)
+        else:
+            stats = cache.stats()
+            logger.info("SIMBAD cache %s: %s entries, %s bytes", stats["directory"], stats["entries"], stats["bytes"])
+        return True
+
+    if command == "worker":
+        from AstroSpace import create_app
+        from AstroSpace.services.jobs import run_worker
+
+        logging.basicConfig(level=logging.INFO)
+        app = create_app()
+        listen_conn = open_connection()
+        try:
+            # Optional job kinds, e.g. "worker ingest_post" to keep long maintenance runs on a separate worker.
+            run_worker(app, listen_conn=listen_conn, kinds=args[1:] or None)
+        finally:
+            listen_conn.close()
+        return True
+
     return False
 
 
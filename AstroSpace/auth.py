@@ -2,14 +2,19 @@ import functools
 
 from psycopg2 import IntegrityError
 from flask import (
-    Blueprint, flash, g, redirect, render_template, request, session, url_for, current_app
+    Blueprint, flash, g, redirect, render_template, request, session, url_for, current_app,
+    has_request_context,
 )
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from AstroSpace.db import get_conn
+from AstroSpace.request_globals import register_lazy_global
+from AstroSpace.services.cache import fetch_cache_version, get_process_cache
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
 
+USER_SECRET_COLUMNS = ("astrometry_api_key", "open_weather_api_key", "telescopius_api_key")
+
 @bp.route('/register', methods=('GET', 'POST'))
 def register():
     if request.method == 'POST':
@@ -76,18 +81,65 @@ def login():
 
     return render_template('auth/auth.html', title='Log In', WebName = current_app.config["TITLE"])
 
-@bp.before_app_request
 def load_logged_in_user():
+    if not has_request_context():
+        return None
+
     user_id = session.get('user_id')
 
     if user_id is None:
-        g.user = None
-    else:
-        cur = get_conn().cursor()
+        return None
+
+    def fetch_principal():
+        with get_conn().cursor() as cur:
+            cur.execute(
+                """
+                SELECT id, username, admin, display_name, display_image
+                FROM users
+                WHERE id = %s
+                """,
+                (user_id,),
+            )
+            return cur.fetchone()
+
+    cache_name = user_cache_name(user_id)
+    principal = get_process_cache().get(
+        cache_name,
+        float(current_app.config.get("USER_CACHE_TTL", 30)),
+        fetch_principal,
+        lambda: fetch_cache_version(get_conn(), cache_name),
+    )
+    return dict(principal) if principal else None
+
+
+def load_user_secrets():
+    if not g.user:
+        return {}
+
+    with get_conn().cursor() as cur:
         cur.execute(
-            "SELECT * FROM users WHERE id = %s", (user_id,)
+            f"""
+            SELECT {", ".join(USER_SECRET_COLUMNS)}
+            FROM users
+            WHERE id = %s
+            """,
+            (g.user["id"],),
         )
-        g.user = cur.fetchone()
+        return cur.fetchone() or {}
+
+
+def user_cache_name(user_id):
+    return f"user:{user_id}"
+
+
+def forget_user(user_id):
+    get_process_cache().invalidate(user_cache_name(user_id))
+
+
+@bp.record_once
+def register_user_loader(state):
+    register_lazy_global(state.app, "user", load_logged_in_user)
+    register_lazy_global(state.app, "user_secrets", load_user_secrets)
 
 @bp.route('/logout', methods=('POST',))
 def logout():
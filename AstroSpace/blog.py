@@ -4,7 +4,6 @@ import requests
 import json
 from datetime import datetime
 import time
-from psycopg2.extras import Json
 from flask import (
     Blueprint,
     flash,
@@ -25,31 +24,51 @@ from astroquery.simbad import Simbad
 from AstroSpace.auth import login_required
 from AstroSpace.constants import (
     ALLOWED_RELATED_MEDIA_EXTENSIONS,
+    COLLECTION_COUNT_CAP,
     DB_TABLES,
     IMAGE_DETAIL_TABLE_NAMES,
     IMAGE_RELATION_TABLES,
+    SEARCH_RESULT_LIMIT,
+    SEARCH_RESULT_LIMIT_MAX,
+    SEARCH_SUGGESTION_MIN_LENGTH,
 )
 from AstroSpace.db import get_conn
 from AstroSpace.repositories.images import (
-    get_collection_filter_metadata,
-    get_collection_images,
+    count_collection_images,
+    get_collection_page,
     fetch_options,
+    get_adjacent_posts,
     get_all_images,
     get_image_by_id,
+    get_image_card,
+    get_image_detail_bundles,
     get_image_tables,
+    image_exists,
+    save_image_artifacts,
+    search_images,
+    suggest_object_names,
 )
 from AstroSpace.services.authorization import require_owner
+from AstroSpace.services.cache import bump_cache_version
 from AstroSpace.services.collection_filters import (
+    COLLECTION_FILTERS_CACHE_NAME,
     PYTHON_UNIX_EPOCH_ORDINAL,
     build_active_collection_filters,
+    decode_collection_cursor,
+    encode_collection_cursor,
+    forget_collection_filter_metadata,
+    get_collection_filter_metadata,
     normalize_collection_filters,
 )
 from AstroSpace.services.content import parse_meta_store, sanitize_rich_text
 from AstroSpace.services.content import sanitize_plain_text
 from AstroSpace.logging_utils import debug_log
 from AstroSpace.services.cookies import COOKIE_POLICY_ROWS, consent_allows
+from AstroSpace.services.cursors import decode_keyset_cursor, encode_keyset_cursor
 from AstroSpace.services.engagement import (
     COMMENT_NAME_LIMIT,
+    COMMENT_PAGE_SIZE,
+    COMMENT_PAGE_SIZE_LIMIT,
     COMMENT_TEXT_LIMIT,
     CommentRateLimitError,
     apply_commenter_cookie,
@@ -57,15 +76,26 @@ from AstroSpace.services.engagement import (
     build_visitor_identity,
     clear_commenter_cookie,
     commenter_name_from_request,
+    fetch_image_comments_page,
     fetch_image_engagement_state,
+    fetch_image_engagement_states,
     like_image as register_image_like,
     record_image_view,
     submit_image_comment,
 )
+from AstroSpace.services.view_rollups import MAX_VIEW_HISTORY_DAYS, VIEW_HISTORY_DAYS, fetch_view_history
+from AstroSpace.services.ingest import (
+    build_ingest_payload,
+    queue_post_ingest,
+    remove_staged_header,
+    run_post_ingest_now,
+)
+from AstroSpace.services.jobs import fetch_job, job_payload
+from AstroSpace.services.sky_positions import CONE_SEARCH_LIMIT, CONE_SEARCH_LIMIT_MAX, MAX_CONE_RADIUS, cone_search
 from AstroSpace.services.uploads import allowed_file, ensure_directory, save_user_upload
 from AstroSpace.utils.moon_phase import get_moon_illumination
-from AstroSpace.utils.phd2logparser import build_plotly_payloads
-from AstroSpace.utils.platesolve import platesolve, get_overlays, fits_header_only
+from AstroSpace.utils.platesolve import fits_header_only
+from AstroSpace.utils.simbad_cache import SimbadOffline, get_simbad_cache
 from AstroSpace.utils.utils import geocode, slugify
 from AstroSpace.utils.utils import (
     ALLOWED_IMG_EXTENSIONS,
@@ -106,10 +136,22 @@ def home():
     return render_template("home.html", top_images=top_images)
 
 
+def _collection_card(img):
+    thumbnail = (img.get("image_thumbnail") or "").replace("\\", "/") or (img.get("image_path") or "").replace("\\", "/")
+    return {
+        "id": img["id"],
+        "title": img["title"],
+        "short_description": img.get("short_description"),
+        "url": url_for("blog.image_detail", image_id=img["id"], image_name=img["slug"]),
+        "thumbnail_url": url_for("blog.upload", filename=thumbnail),
+    }
+
+
 @bp.route("/collection")
 def collection():
     filter_metadata = get_collection_filter_metadata()
     raw_args = request.args.to_dict(flat=True)
+    cursor = raw_args.pop("cursor", None)
     filter_state, query_filters = normalize_collection_filters(raw_args, filter_metadata)
     active_filters = build_active_collection_filters(
         url_for("blog.collection"),
@@ -117,19 +159,121 @@ def collection():
         filter_state,
     )
     debug_log("Collection filters requested: %s", {chip["label"]: chip["value"] for chip in active_filters})
-    images = get_collection_images(query_filters)
-    debug_log("Collection query returned %s image(s)", len(images))
+    after = decode_collection_cursor(cursor) if cursor else None
+    images, next_after = get_collection_page(query_filters, after=after)
+    # Continuation pages were counted when the first page was shown.
+    result_count = None if cursor else count_collection_images(query_filters)
+    debug_log("Collection query returned %s of %s image(s)", len(images), result_count)
+    next_cursor = encode_collection_cursor(next_after) if next_after else None
     return render_template(
         "collection.html",
         images=images,
         filter_metadata=filter_metadata,
         filter_state=filter_state,
         active_filters=active_filters,
-        result_count=len(images),
+        result_count=result_count,
+        result_count_cap=COLLECTION_COUNT_CAP,
+        next_cursor=next_cursor,
+        next_page_url=url_for("blog.collection", **raw_args, cursor=next_cursor) if next_cursor else None,
+        page_api_url=url_for("blog.collection_page", **raw_args),
         unix_epoch_ordinal=PYTHON_UNIX_EPOCH_ORDINAL,
     )
 
 
+@bp.route("/collection/page")
+def collection_page():
+    raw_args = request.args.to_dict(flat=True)
+    cursor = raw_args.pop("cursor", None)
+    after = None
+    if cursor:
+        after = decode_collection_cursor(cursor)
+        if after is None:
+            return jsonify({"message": "Invalid cursor."}), 400
+
+    _filter_state, query_filters = normalize_collection_filters(raw_args, get_collection_filter_metadata())
+    images, next_after = get_collection_page(query_filters, after=after)
+    return jsonify(
+        {
+            "images": [_collection_card(img) for img in images],
+            "next_cursor": encode_collection_cursor(next_after) if next_after else None,
+        }
+    )
+
+
+@bp.route("/search")
+def search():
+    terms = (request.args.get("q") or "").strip()
+    if not terms:
+        return jsonify({"query": "", "results": []})
+
+    limit = min(max(request.args.get("limit", SEARCH_RESULT_LIMIT, type=int), 1), SEARCH_RESULT_LIMIT_MAX)
+    results = search_images(terms, limit=limit)
+    debug_log("Search for %r returned %s post(s)", terms, len(results))
+    return jsonify({"query": terms, "results": [_collection_card(img) for img in results]})
+
+
+@bp.route("/search/suggest")
+def search_suggest():
+    term = (request.args.get("q") or "").strip()
+    if len(term) < SEARCH_SUGGESTION_MIN_LENGTH:
+        return jsonify({"query": term, "suggestions": []})
+    return jsonify({"query": term, "suggestions": suggest_object_names(term)})
+
+
+def _resolve_cone_centre(args):
+    ra = args.get("ra", type=float)
+    dec = args.get("dec", type=float)
+    if ra is not None and dec is not None:
+        return ra, dec, None
+
+    target = (args.get("target") or "").strip()
+    if not target:
+        return None
+    if get_simbad_cache().offline:
+        raise SimbadOffline("SIMBAD offline mode cannot resolve a target; give ra and dec instead.")
+    debug_log("Resolving cone-search target=%s with SIMBAD", target)
+    result = Simbad.query_object(target)
+    if not result or len(result) == 0:
+        return None
+    return float(result[0]["ra"]), float(result[0]["dec"]), result[0]["main_id"].replace("NAME", "").strip()
+
+
+@bp.route("/sky/cone")
+def sky_cone_search():
+    try:
+        centre = _resolve_cone_centre(request.args)
+    except SimbadOffline as exc:
+        return jsonify({"message": str(exc)}), 503
+    if centre is None:
+        return jsonify({"message": "Give ra and dec in degrees, or a target SIMBAD can resolve."}), 400
+    ra, dec, target = centre
+    if not (-90.0 <= dec <= 90.0):
+        return jsonify({"message": "dec must be between -90 and 90 degrees."}), 400
+
+    radius = min(max(request.args.get("radius", 1.0, type=float), 0.0), MAX_CONE_RADIUS)
+    limit = min(max(request.args.get("limit", CONE_SEARCH_LIMIT, type=int), 1), CONE_SEARCH_LIMIT_MAX)
+    matches = cone_search(ra % 360.0, dec, radius, limit=limit)
+    debug_log("Cone search (ra=%s, dec=%s, radius=%s) returned %s post(s)", ra, dec, radius, len(matches))
+    return jsonify(
+        {
+            "target": target,
+            "ra": ra % 360.0,
+            "dec": dec,
+            "radius": radius,
+            "results": [
+                {
+                    **_collection_card(img),
+                    "ra": img["sky_ra"],
+                    "dec": img["sky_dec"],
+                    "field_radius": img["field_radius"],
+                    "separation": img["separation"],
+                }
+                for img in matches
+            ],
+        }
+    )
+
+
 @bp.route("/cookie-policy")
 def cookie_policy():
     return render_template(
@@ -261,28 +405,6 @@ def get_elevation():
 
 @bp.route("/image/<int:image_id>/<string:image_name>")
 def image_detail(image_id, image_name):
-    tables = get_image_tables(image_id)
-    if len(tables) == 1:
-        return tables
-    background_image = tables[0]["image_path"]
-    images = [dict(zip(IMAGE_DETAIL_TABLE_NAMES, tables))]
-    previous_post = None
-    next_post = None
-
-    visitor_identity = build_visitor_identity()
-    record_image_view(image_id, visitor_identity)
-    images[0]["engagement"] = fetch_image_engagement_state(image_id, visitor_identity)
-
-    ordered_posts = get_all_images(unique=True)
-    current_post_index = next((idx for idx, post in enumerate(ordered_posts) if post["id"] == image_id), None)
-    if current_post_index is None:
-        current_post_index = next((idx for idx, post in enumerate(ordered_posts) if post["slug"] == image_name), None)
-    if current_post_index is not None:
-        if current_post_index > 0:
-            previous_post = ordered_posts[current_post_index - 1]
-        if current_post_index + 1 < len(ordered_posts):
-            next_post = ordered_posts[current_post_index + 1]
-
     db = get_conn()
     with db.cursor() as cur:
         cur.execute(
@@ -291,12 +413,30 @@ def image_detail(image_id, image_name):
         )
         prev_images = cur.fetchall()
 
-    for i in prev_images:
-        if i["id"] != image_id:
-            related_tables = get_image_tables(i["id"])
-            related_image = dict(zip(IMAGE_DETAIL_TABLE_NAMES, related_tables))
-            related_image["engagement"] = fetch_image_engagement_state(i["id"], visitor_identity)
-            images += [related_image]
+    # Every version sharing the slug is rendered, so load them all in one batch.
+    image_ids = [image_id] + [i["id"] for i in prev_images if i["id"] != image_id]
+    bundles = get_image_detail_bundles(image_ids)
+    if image_id not in bundles:
+        return "Image not found!, 404"
+    background_image = bundles[image_id][0]["image_path"]
+
+    visitor_identity = build_visitor_identity()
+    record_image_view(image_id, visitor_identity)
+    engagement = fetch_image_engagement_states(image_ids, visitor_identity)
+
+    images = []
+    for detail_id in image_ids:
+        if detail_id not in bundles:
+            continue
+        detail = dict(zip(IMAGE_DETAIL_TABLE_NAMES, bundles[detail_id]))
+        detail["engagement"] = engagement[detail_id]
+        comments_after = detail["engagement"]["comments_after"]
+        detail["engagement"]["comments_cursor"] = encode_keyset_cursor(comments_after) if comments_after else None
+        images.append(detail)
+
+    neighbours = get_adjacent_posts(image_id, image_name)
+    previous_post = neighbours["previous"]
+    next_post = neighbours["next"]
 
     response = make_response(
         render_template(
@@ -315,8 +455,7 @@ def image_detail(image_id, image_name):
 
 @bp.route("/image/<int:image_id>/like", methods=["POST"])
 def like_image_endpoint(image_id):
-    image = get_image_by_id(image_id)
-    if not image:
+    if not image_exists(image_id):
         return jsonify({"message": "Post not found."}), 404
 
     visitor_identity = build_visitor_identity()
@@ -334,10 +473,47 @@ def like_image_endpoint(image_id):
     return response
 
 
+@bp.route("/image/<int:image_id>/views")
+def image_view_history(image_id):
+    if not image_exists(image_id):
+        return jsonify({"message": "Post not found."}), 404
+
+    days = min(max(request.args.get("days", VIEW_HISTORY_DAYS, type=int), 1), MAX_VIEW_HISTORY_DAYS)
+    return jsonify({"image_id": image_id, "days": fetch_view_history(image_id, days=days)})
+
+
+def _comment_payload(comment):
+    return {
+        "id": comment["id"],
+        "display_name": comment["commented_by"],
+        "comment": comment["comment"],
+        "commented_at": comment["commented_at"].isoformat(),
+        "commented_at_label": comment["commented_at"].strftime("%d %b %Y %H:%M"),
+    }
+
+
+@bp.route("/image/<int:image_id>/comments")
+def image_comments_page(image_id):
+    after = None
+    cursor = request.args.get("cursor")
+    if cursor:
+        after = decode_keyset_cursor(cursor)
+        if after is None:
+            return jsonify({"message": "Invalid cursor."}), 400
+    limit = min(max(request.args.get("limit", COMMENT_PAGE_SIZE, type=int), 1), COMMENT_PAGE_SIZE_LIMIT)
+
+    comments, next_after = fetch_image_comments_page(image_id, after=after, limit=limit)
+    return jsonify(
+        {
+            "comments": [_comment_payload(comment) for comment in comments],
+            "next_cursor": encode_keyset_cursor(next_after) if next_after else None,
+        }
+    )
+
+
 @bp.route("/image/<int:image_id>/comment", methods=["POST"])
 def comment_on_image(image_id):
-    image = get_image_by_id(image_id)
-    if not image:
+    if not image_exists(image_id):
         return jsonify({"message": "Post not found."}), 404
 
     payload = request.get_json(silent=True) or request.form
@@ -364,13 +540,7 @@ def comment_on_image(image_id):
             "message": "Comment posted.",
             "comment_count": engagement["comment_count"],
             "preferences_enabled": preferences_enabled,
-            "comment": {
-                "id": inserted["id"],
-                "display_name": display_name,
-                "comment": comment,
-                "commented_at": inserted["commented_at"].isoformat(),
-                "commented_at_label": inserted["commented_at"].strftime("%d %b %Y %H:%M"),
-            },
+            "comment": _comment_payload({**inserted, "commented_by": display_name, "comment": comment}),
         }
     )
     apply_visitor_cookie(response, visitor_identity)
@@ -509,7 +679,7 @@ def edit_image(image_id):
 @bp.route("/delete/<int:image_id>")
 @login_required
 def delete_image(image_id):
-    image = get_image_by_id(image_id)
+    image = get_image_card(image_id)
     if not image:
         flash("Post not found.")
         return redirect(url_for("blog.collection"))
@@ -521,18 +691,33 @@ def delete_image(image_id):
     for table in IMAGE_RELATION_TABLES:
         cur.execute(f"DELETE FROM {table} WHERE image_id = %s", (image_id,))
     cur.execute("DELETE FROM images WHERE id = %s", (image_id,))
-    
+    bump_cache_version(cur, COLLECTION_FILTERS_CACHE_NAME)
+
     conn.commit()
     cur.close()
+    forget_collection_filter_metadata()
     flash("Post deleted successfully!")
     return redirect(url_for("blog.collection"))
 
+@bp.route("/jobs/<int:job_id>")
+@login_required
+def job_status(job_id):
+    job = fetch_job(job_id)
+    if not job:
+        return jsonify({"message": "Job not found."}), 404
+    image = get_image_card(job["image_id"]) if job["image_id"] else None
+    # Jobs that are not tied to a post are only visible to admins.
+    require_owner(image["author"] if image else None)
+    return jsonify(job_payload(job))
+
+
 @bp.route("/create", methods=["POST"])
 @login_required
 def save_image():
     user = g.user["username"]
     user_id = str(g.user["id"])
     img_id = None
+    stored_fits_path = None
     debug_log("save_image started for user=%s", user, level=logging.INFO)
 
     ensure_directory(os.path.join(current_app.config["UPLOAD_PATH"], user_id))
@@ -578,24 +763,11 @@ def save_image():
             )
         
         title = form.get("title")
-        
-        Simbad.reset_votable_fields()
-        Simbad.add_votable_fields("otype_txt")
-            
-        debug_log("Querying SIMBAD for title=%s", title)
-        query = Simbad.query_object(title)
-        object_type = "Unknown"
-        if query and len(query) > 0:
-            title = query[0]["main_id"].replace("NAME", "").strip()
-            object_type = query[0]["otype_txt"]
-            debug_log("SIMBAD resolved title=%s object_type=%s", title, object_type)
-        else:
-            debug_log("SIMBAD returned no result for title=%s", title)
 
         file = request.files.get("image_path")
         fits_path = request.files.get("fits_file")
         starless_file = request.files.get("starless_image_path")
-        svg_image = None
+        plate_solve_path = None
         if file and file.filename:
             debug_log("Received preview image upload filename=%s", file.filename)
             if not allowed_file(file.filename, ALLOWED_IMG_EXTENSIONS):
@@ -607,40 +779,21 @@ def save_image():
                 return image_form_redirect("Preview image must be a JPG or PNG file.")
 
             stored_image = save_user_upload(file, current_app.config["UPLOAD_PATH"], user_id)
-            image_path = stored_image.absolute_path
+            plate_solve_path = stored_image.absolute_path
             img_path_upload = stored_image.public_path
-            header_json, thumbnail_path, pixel_scale = platesolve(
-                image_path, user_id, fits_path
-            )
-            debug_log(
-                "Preview image persisted (public_path=%s, thumbnail=%s, pixel_scale=%s)",
-                img_path_upload,
-                thumbnail_path,
-                pixel_scale,
-            )
-            
+            debug_log("Preview image persisted (public_path=%s)", img_path_upload)
+
         elif img_id:
             img_path_upload = form.get("prev_img")
             if form.get("redo_plate_solve") == "on":
                 debug_log("Redoing plate solve for image_id=%s", img_id)
-                full_img_path = os.path.join(
+                plate_solve_path = os.path.join(
                     current_app.config["UPLOAD_PATH"], img_path_upload.replace("/", "\\")
                 )
-                header_json, thumbnail_path, pixel_scale = platesolve(
-                    full_img_path, user_id, fits_path
-                )
-                
             elif form.get("regenerate_overlays") == "on":
                 debug_log("Regenerating overlays for image_id=%s without re-plate-solving", img_id)
-                header_json = tmp_img["header_json"]
-                thumbnail_path = tmp_img["image_thumbnail"]
-                pixel_scale = tmp_img["pixel_scale"]
             else:
                 debug_log("Reusing existing plate solve artifacts for image_id=%s", img_id)
-                header_json = tmp_img["header_json"]
-                svg_image = tmp_img["overlays_json"]
-                thumbnail_path = tmp_img["image_thumbnail"]
-                pixel_scale = tmp_img["pixel_scale"]
         else:
             debug_log("Rejecting new post because preview image is missing.", level=logging.WARNING)
             return image_form_redirect("A preview image is required when creating a post.")
@@ -677,16 +830,11 @@ def save_image():
             return image_form_redirect(str(exc))
         debug_log("Prepared %s related media row(s) for image submission.", len(related_media_rows))
 
-        if svg_image is None:
-            svg_image = json.dumps(get_overlays(header_json))
         guide_logs = request.files.getlist("guide_logs")
         new_guide_logs = any(i.filename for i in guide_logs)
+        guide_logs_to_parse = None
 
         if new_guide_logs:
-            debug_log(
-                "Generating guiding plots from %s uploaded guide log(s).",
-                sum(1 for guide_log in guide_logs if guide_log.filename),
-            )
             iguide_logs = []
             iguide_logs_upload = []
             for guide_log in guide_logs:
@@ -694,16 +842,14 @@ def save_image():
                     stored_log = save_user_upload(guide_log, current_app.config["UPLOAD_PATH"], user_id)
                     iguide_logs.append(stored_log.absolute_path)
                     iguide_logs_upload.append(stored_log.public_path)
-            guide_logs = ",".join(iguide_logs)
-            guiding_plot, calibration_plot = build_plotly_payloads(guide_logs)
-            guiding_plot_json = Json(guiding_plot)
-            calibration_plot_json = Json(calibration_plot)
+            debug_log("Stored %s guide log(s) for background parsing.", len(iguide_logs))
+            guide_logs_to_parse = ",".join(iguide_logs)
             guide_logs = ",".join(iguide_logs_upload)
         elif img_id:
             guide_logs = form.get("prev_guide_logs") or ""
             if form.get("redo_graphs") == "on":
                 debug_log("Regenerating guiding plots for image_id=%s", img_id)
-                full_guide_logs = ",".join(
+                guide_logs_to_parse = ",".join(
                     [
                         os.path.join(
                             current_app.config["UPLOAD_PATH"], i.replace("/", "\\")
@@ -711,20 +857,15 @@ def save_image():
                         for i in guide_logs.split(",")
                     ]
                 )
-                guiding_plot, calibration_plot = build_plotly_payloads(full_guide_logs)
-                guiding_plot_json = Json(guiding_plot)
-                calibration_plot_json = Json(calibration_plot)
             else:
                 debug_log("Reusing existing guiding plots for image_id=%s", img_id)
-                guiding_plot_json = Json(tmp_img["guiding_plot_json"]) if tmp_img.get("guiding_plot_json") else None
-                calibration_plot_json = Json(tmp_img["calibration_plot_json"]) if tmp_img.get("calibration_plot_json") else None
         else:
             guide_logs = ""
-            guiding_plot_json, calibration_plot_json = None, None
-        
+
         meta_json = parse_meta_store(request.form.get("meta_store"))
-        if meta_json == "{}" and img_id:
-            meta_json = tmp_img["meta_json"]
+        artifacts = {}
+        if meta_json != "{}" or not img_id:
+            artifacts["meta_json"] = meta_json
 
         table_ids = []
         for table in DB_TABLES:
@@ -756,19 +897,11 @@ def save_image():
             "edited_at",
             "image_path",
             "starless_image_path",
-            "image_thumbnail",
-            "pixel_scale",
-            "object_type",
-            "header_json",
-            "overlays_json",
-            "meta_json",
             "location",
             "location_latitude",
             "location_longitude",
             "location_elevation",
             "guide_log",
-            "guiding_plot_json",
-            "calibration_plot_json",
             *[f"{i}_id" for i in DB_TABLES],
         ]
 
@@ -784,19 +917,11 @@ def save_image():
             edited_at,
             img_path_upload,
             starless_path_upload,
-            thumbnail_path,
-            pixel_scale,
-            object_type,
-            header_json,
-            svg_image,
-            meta_json,
             form.get("location"),
             lat,
             lon,
             form.get("location_elevation"),
             guide_logs,
-            guiding_plot_json,
-            calibration_plot_json,
             *table_ids,
         ]
 
@@ -832,6 +957,8 @@ def save_image():
             img_id = cur.fetchone()["id"]
             debug_log("Inserted new image row image_id=%s", img_id)
 
+        save_image_artifacts(cur, img_id, artifacts)
+
         # Caputre dates
         dates = json.loads(form.get("capture_dates", "[]"))
         software_ids = form.getlist("software_ids")
@@ -883,18 +1010,53 @@ def save_image():
                 """,
                 (img_id, media["media_path"], media["caption"], order),
             )
+        bump_cache_version(cur, COLLECTION_FILTERS_CACHE_NAME)
+
+        if plate_solve_path and fits_path and fits_path.filename:
+            # The worker plate solves from disk; the ingest job deletes the staged header when it is done.
+            stored_fits_path = save_user_upload(
+                fits_path, current_app.config["INGEST_STAGING_PATH"], user_id
+            ).absolute_path
+
+        # SIMBAD, plate solving, overlays and PHD2 parsing run as a job after the post row commits.
+        ingest_in_background = current_app.config.get("INGEST_JOBS_ENABLED", True)
+        ingest_job_id = queue_post_ingest(
+            cur,
+            img_id,
+            build_ingest_payload(
+                user_id,
+                title,
+                image_path=plate_solve_path,
+                fits_path=stored_fits_path,
+                regenerate_overlays=form.get("regenerate_overlays") == "on",
+                guide_logs=guide_logs_to_parse,
+                force=form.get("force_rebuild") == "on",
+            ),
+            max_attempts=int(current_app.config.get("INGEST_MAX_ATTEMPTS", 3)) if ingest_in_background else 1,
+        )
 
         conn.commit()
+        # The committed job owns the staged header from here on.
+        stored_fits_path = None
         cur.close()
+        forget_collection_filter_metadata()
         debug_log(
-            "save_image committed successfully (image_id=%s, light_rows=%s, related_media=%s)",
+            "save_image committed successfully (image_id=%s, light_rows=%s, related_media=%s, ingest_job=%s)",
             img_id,
             light_rows,
             len(related_media_rows),
+            ingest_job_id,
             level=logging.INFO,
         )
-        flash("Post updated successfully!")
+        if ingest_in_background:
+            flash("Post saved! Plate solving and overlays are being prepared in the background.")
+        elif run_post_ingest_now(conn, ingest_job_id):
+            forget_collection_filter_metadata()
+            flash("Post updated successfully!")
+        else:
+            flash("Post saved, but processing it failed. Check the Posts tab for details.")
         return redirect(url_for("private.profile", tab="Posts"))
     except Exception as e:
         current_app.logger.exception("Failed to save image for user=%s image_id=%s", user, img_id or "new")
+        remove_staged_header(stored_fits_path)
         return image_form_redirect(f"An error occurred while saving the post: {e}")
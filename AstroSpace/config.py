@@ -7,10 +7,47 @@ class Config:
     MAX_USERS = int(os.environ.get("MAX_USERS", 1))
 
     UPLOAD_PATH = os.environ.get("UPLOAD_PATH", os.path.abspath("uploads"))
+    INGEST_STAGING_PATH = os.environ.get("INGEST_STAGING_PATH", os.path.abspath("ingest_staging"))
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = "Lax"
     SESSION_COOKIE_SECURE = os.environ.get("SESSION_COOKIE_SECURE", "").lower() in {"1", "true", "yes"}
     WTF_CSRF_TIME_LIMIT = None
+    WEB_INFO_CACHE_TTL = float(os.environ.get("WEB_INFO_CACHE_TTL", 30))
+    USER_CACHE_TTL = float(os.environ.get("USER_CACHE_TTL", 30))
+    COLLECTION_FILTERS_CACHE_TTL = float(os.environ.get("COLLECTION_FILTERS_CACHE_TTL", 60))
+    PROCESS_CACHE_MAX_ENTRIES = int(os.environ.get("PROCESS_CACHE_MAX_ENTRIES", 1024))
+
+    DB_POOL_ENABLED = os.environ.get("DB_POOL_ENABLED", "true").lower() in {"1", "true", "yes"}
+    DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", 1))
+    DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", 10))
+    DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+    DB_POOL_MAX_IDLE = float(os.environ.get("DB_POOL_MAX_IDLE", 300))
+    DB_POOL_MAX_LIFETIME = float(os.environ.get("DB_POOL_MAX_LIFETIME", 3600))
+    DB_POOL_HEALTH_CHECK = os.environ.get("DB_POOL_HEALTH_CHECK", "true").lower() in {"1", "true", "yes"}
+    DB_POOL_HEALTH_CHECK_INTERVAL = float(os.environ.get("DB_POOL_HEALTH_CHECK_INTERVAL", 30))
+    DB_POOL_RESET = os.environ.get("DB_POOL_RESET", "rollback").lower()
+    DB_POOL_PGBOUNCER = os.environ.get("DB_POOL_PGBOUNCER", "").lower() in {"1", "true", "yes"}
+    VIEW_BUFFER_ENABLED = os.environ.get("VIEW_BUFFER_ENABLED", "true").lower() in {"1", "true", "yes"}
+    VIEW_BUFFER_DEDUPE_WINDOW = float(os.environ.get("VIEW_BUFFER_DEDUPE_WINDOW", 600))
+    VIEW_BUFFER_FLUSH_INTERVAL = float(os.environ.get("VIEW_BUFFER_FLUSH_INTERVAL", 5))
+    VIEW_BUFFER_MAX_PENDING = int(os.environ.get("VIEW_BUFFER_MAX_PENDING", 500))
+    VIEW_RETENTION_DAYS = int(os.environ.get("VIEW_RETENTION_DAYS", 90))
+    COMMENT_TOKEN_BUCKET_ENABLED = os.environ.get("COMMENT_TOKEN_BUCKET_ENABLED", "true").lower() in {"1", "true", "yes"}
+    COMMENT_TOKEN_BUCKET_MAX_KEYS = int(os.environ.get("COMMENT_TOKEN_BUCKET_MAX_KEYS", 10000))
+    DB_GEVENT_WAIT_CALLBACK = os.environ.get("DB_GEVENT_WAIT_CALLBACK", "").lower() in {"1", "true", "yes"}
+    INGEST_JOBS_ENABLED = os.environ.get("INGEST_JOBS_ENABLED", "true").lower() in {"1", "true", "yes"}
+    INGEST_MAX_ATTEMPTS = int(os.environ.get("INGEST_MAX_ATTEMPTS", 3))
+    JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", 5))
+    JOB_STALE_AFTER = float(os.environ.get("JOB_STALE_AFTER", 3600))
+    JOB_RETRY_DELAY = float(os.environ.get("JOB_RETRY_DELAY", 60))
+    PLATE_REBUILD_PROCESSES = int(os.environ.get("PLATE_REBUILD_PROCESSES", min(4, os.cpu_count() or 1)))
+    SIMBAD_CONCURRENCY = int(os.environ.get("SIMBAD_CONCURRENCY", 4))
+    PLATE_REBUILD_BATCH_SIZE = int(os.environ.get("PLATE_REBUILD_BATCH_SIZE", 20))
+    SIMBAD_CACHE_ENABLED = os.environ.get("SIMBAD_CACHE_ENABLED", "true").lower() in {"1", "true", "yes"}
+    SIMBAD_CACHE_DIR = os.environ.get("SIMBAD_CACHE_DIR", os.path.abspath("simbad_cache"))
+    SIMBAD_CACHE_TTL = float(os.environ.get("SIMBAD_CACHE_TTL", 30 * 86400))
+    SIMBAD_CACHE_MAX_MB = int(os.environ.get("SIMBAD_CACHE_MAX_MB", 512))
+    SIMBAD_OFFLINE = os.environ.get("SIMBAD_OFFLINE", "").lower() in {"1", "true", "yes"}
 
     if "DB_NAME" in os.environ:
         DB_NAME = os.environ['DB_NAME']
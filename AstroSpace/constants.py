@@ -4,6 +4,13 @@ RELATED_MEDIA_VIDEO_EXTENSIONS = {"mp4", "webm", "ogg"}
 ALLOWED_FITS_EXTENSIONS = {"fits", "fit", "xisf"}
 ALLOWED_TXT_EXTENSIONS = {"txt", "log"}
 
+COLLECTION_PAGE_SIZE = 48
+COLLECTION_COUNT_CAP = 1000
+SEARCH_RESULT_LIMIT = 20
+SEARCH_RESULT_LIMIT_MAX = 50
+SEARCH_SUGGESTION_LIMIT = 8
+SEARCH_SUGGESTION_MIN_LENGTH = 2
+
 ALLOWED_TAGS = [
     "b",
     "i",
@@ -67,8 +74,20 @@ IMAGE_RELATION_TABLES = [
     "image_lights",
     "image_software",
     "related_image_media",
+    "image_counters",
+    "image_view_rollups",
 ]
 
+# Heavy per-post payloads kept in image_artifacts, away from the listing columns.
+IMAGE_ARTIFACT_COLUMNS = (
+    "header_json",
+    "overlays_json",
+    "meta_json",
+    "guiding_plot_json",
+    "calibration_plot_json",
+    "artifact_fingerprints",
+)
+
 IMAGE_DETAIL_TABLE_NAMES = [
     "image",
     "equipment_list",
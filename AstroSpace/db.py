@@ -1,5 +1,7 @@
 import logging
 import os
+import threading
+import time
 from pathlib import Path
 from urllib.parse import quote_plus
 
@@ -7,7 +9,10 @@ import click
 from flask import Flask
 from flask import current_app, g
 import psycopg2
+from psycopg2 import extensions
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import PoolError
 
 from AstroSpace.logging_utils import debug_log
 
@@ -22,6 +27,10 @@ LEGACY_BASELINE_COLUMNS = {
     "software": {"name", "type", "link", "metadata"},
     "users": {"username", "password", "admin"},
 }
+POOL_EXTENSION_KEY = "astrospace_db_pool"
+POOL_RESET_MODES = {"rollback", "discard"}
+_POOL_LOCK = threading.Lock()
+_INHERITED_POOLS = []
 
 
 def load_runtime_config(config_source=None):
@@ -74,10 +83,16 @@ def get_alembic_config(config_source=None):
 
     alembic_config = Config(str(ALEMBIC_CONFIG_PATH))
     alembic_config.set_main_option("script_location", str(ALEMBIC_SCRIPT_PATH))
-    alembic_config.set_main_option("sqlalchemy.url", build_database_url(config_source))
+    # Alembic's ini parser interpolates "%", which quoted credentials contain.
+    alembic_config.set_main_option("sqlalchemy.url", build_database_url(config_source).replace("%", "%%"))
     return alembic_config
 
 
+def open_connection(config_source=None):
+    """Open a standalone connection for management commands that run without an app context."""
+    return psycopg2.connect(**get_db_config(config_source), cursor_factory=RealDictCursor)
+
+
 def get_public_schema_snapshot(config_source=None):
     db_config = {
         **get_db_config(config_source),
@@ -160,8 +175,370 @@ def stamp_db(revision=BASELINE_MIGRATION_REVISION, config_source=None):
     command.stamp(get_alembic_config(config_source), revision)
 
 
+def make_gevent_wait_callback():
+    from gevent.socket import wait_read, wait_write
+
+    def gevent_wait_callback(conn, timeout=None):
+        # Same loop as psycogreen: drive libpq's non-blocking protocol and park
+        # the current greenlet on the socket instead of blocking the hub.
+        while True:
+            state = conn.poll()
+            if state == extensions.POLL_OK:
+                break
+            if state == extensions.POLL_READ:
+                wait_read(conn.fileno(), timeout=timeout)
+            elif state == extensions.POLL_WRITE:
+                wait_write(conn.fileno(), timeout=timeout)
+            else:
+                raise psycopg2.OperationalError(f"Bad result from poll: {state!r}")
+
+    gevent_wait_callback.astrospace_gevent = True
+    return gevent_wait_callback
+
+
+def install_gevent_wait_callback():
+    current = extensions.get_wait_callback()
+    if getattr(current, "astrospace_gevent", False):
+        return current
+
+    try:
+        callback = make_gevent_wait_callback()
+    except ImportError as exc:
+        raise RuntimeError("DB_GEVENT_WAIT_CALLBACK requires gevent to be installed.") from exc
+
+    extensions.set_wait_callback(callback)
+    debug_log("Installed gevent wait callback on psycopg2; queries now yield to other greenlets.")
+    return callback
+
+
+class PoolTimeout(PoolError):
+    pass
+
+
+class ConnectionPool:
+    """Process-local PostgreSQL connection pool.
+
+    Waiting for a free connection goes through ``threading.Condition``, which
+    gevent monkey-patches, so a greenlet blocked on an exhausted pool yields to
+    the hub instead of stalling the whole worker.
+    """
+
+    def __init__(
+        self,
+        connect,
+        min_size=1,
+        max_size=10,
+        timeout=30.0,
+        max_idle=300.0,
+        max_lifetime=3600.0,
+        health_check=True,
+        health_check_interval=30.0,
+        reset="rollback",
+        pgbouncer=False,
+    ):
+        if max_size < 1:
+            raise ValueError("DB_POOL_MAX_SIZE must be at least 1")
+        if reset not in POOL_RESET_MODES:
+            raise ValueError(f"DB_POOL_RESET must be one of: {', '.join(sorted(POOL_RESET_MODES))}")
+
+        self._connect = connect
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.health_check = health_check
+        self.health_check_interval = health_check_interval
+        # PgBouncer in transaction mode hands every transaction to an arbitrary
+        # server connection, so session-level resets such as DISCARD ALL are
+        # pointless there and only a rollback is safe.
+        self.pgbouncer = pgbouncer
+        self.reset = "rollback" if pgbouncer else reset
+        self.pid = os.getpid()
+
+        self._condition = threading.Condition()
+        self._idle = []
+        self._in_use = set()
+        self._created_at = {}
+        self._pending = 0
+        self._waiting = 0
+        self._closed = False
+        self._counters = {
+            "connections_opened": 0,
+            "connections_closed": 0,
+            "checkouts": 0,
+            "wait_timeouts": 0,
+            "health_check_failures": 0,
+        }
+
+    @property
+    def size(self):
+        return len(self._idle) + len(self._in_use) + self._pending
+
+    def getconn(self):
+        deadline = time.monotonic() + self.timeout
+        conn = None
+        idle_since = None
+
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise PoolError("connection pool is closed")
+
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                    self._in_use.add(conn)
+                    break
+
+                if self.size < self.max_size:
+                    # Reserve the slot before connecting so concurrent callers
+                    # cannot overshoot max_size while the handshake is in flight.
+                    self._pending += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counters["wait_timeouts"] += 1
+                    raise PoolTimeout(
+                        f"Timed out after {self.timeout}s waiting for a database connection "
+                        f"(max_size={self.max_size})."
+                    )
+                self._waiting += 1
+                try:
+                    self._condition.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+            self._counters["checkouts"] += 1
+
+        if conn is None:
+            try:
+                conn = self._open()
+            finally:
+                with self._condition:
+                    self._pending -= 1
+                    if conn is not None:
+                        self._in_use.add(conn)
+                    else:
+                        self._condition.notify()
+            return conn
+
+        if self._is_usable(conn, idle_since):
+            return conn
+
+        return self._replace(conn)
+
+    def putconn(self, conn, close=False):
+        with self._condition:
+            if conn not in self._in_use:
+                raise PoolError("Connection is not checked out from this pool.")
+
+        discard = close or self._closed or conn.closed or self._expired(conn)
+        if not discard:
+            try:
+                self._reset(conn)
+            except Exception:
+                debug_log("Discarding pooled connection that failed to reset.", level=logging.WARNING, exc_info=True)
+                discard = True
+
+        to_close = [conn] if discard else []
+        with self._condition:
+            self._in_use.discard(conn)
+            if not discard:
+                self._idle.append((conn, time.monotonic()))
+            to_close.extend(self._prune_idle())
+            self._condition.notify()
+
+        for stale in to_close:
+            self._close(stale)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            idle = [conn for conn, _idle_since in self._idle]
+            self._idle = []
+            self._condition.notify_all()
+
+        for conn in idle:
+            self._close(conn)
+
+    def stats(self):
+        with self._condition:
+            return {
+                "pid": self.pid,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self.size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "waiting": self._waiting,
+                "reset": self.reset,
+                "pgbouncer": self.pgbouncer,
+                **self._counters,
+            }
+
+    def _open(self):
+        conn = self._connect()
+        with self._condition:
+            self._created_at[conn] = time.monotonic()
+            self._counters["connections_opened"] += 1
+        return conn
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            debug_log("Ignoring error while closing pooled connection.", exc_info=True)
+        with self._condition:
+            self._created_at.pop(conn, None)
+            self._counters["connections_closed"] += 1
+
+    def _replace(self, conn):
+        self._close(conn)
+        try:
+            fresh = self._open()
+        except Exception:
+            with self._condition:
+                self._in_use.discard(conn)
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._in_use.discard(conn)
+            self._in_use.add(fresh)
+        return fresh
+
+    def _expired(self, conn):
+        if not self.max_lifetime:
+            return False
+        created_at = self._created_at.get(conn)
+        return created_at is not None and time.monotonic() - created_at > self.max_lifetime
+
+    def _is_usable(self, conn, idle_since):
+        if conn.closed or self._expired(conn):
+            return False
+
+        if not self.health_check or time.monotonic() - idle_since < self.health_check_interval:
+            return True
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+        except Exception:
+            with self._condition:
+                self._counters["health_check_failures"] += 1
+            debug_log("Pooled PostgreSQL connection failed its health check; reconnecting.", level=logging.WARNING)
+            return False
+        return True
+
+    def _reset(self, conn):
+        status = conn.info.transaction_status
+        if status == TRANSACTION_STATUS_UNKNOWN:
+            raise PoolError("Connection is in an unknown transaction state.")
+        if status != TRANSACTION_STATUS_IDLE:
+            conn.rollback()
+
+        if self.reset == "discard":
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute("DISCARD ALL")
+        conn.autocommit = False
+
+    def _prune_idle(self):
+        # Idle connections are reused LIFO, so the least recently used ones sit
+        # at the front of the list and are the first to age out.
+        pruned = []
+        now = time.monotonic()
+        while (
+            self._idle
+            and self.size > self.min_size
+            and now - self._idle[0][1] > self.max_idle
+        ):
+            conn, _idle_since = self._idle.pop(0)
+            pruned.append(conn)
+        return pruned
+
+
+def config_flag(source, key, default=False):
+    """Read a boolean setting; strings count as true only for "1", "true" or "yes", like config.py."""
+    value = source.get(key, default)
+    if isinstance(value, str):
+        return value.strip().lower() in {"1", "true", "yes"}
+    return bool(value)
+
+
+def build_connection_pool(config_source=None):
+    source = load_runtime_config(config_source)
+    db_config = {
+        **get_db_config(source),
+        "cursor_factory": RealDictCursor,
+    }
+
+    def connect():
+        debug_log(
+            "Opening pooled PostgreSQL connection to %s:%s/%s as %s",
+            db_config["host"],
+            db_config["port"],
+            db_config["dbname"],
+            db_config["user"],
+        )
+        return psycopg2.connect(**db_config)
+
+    return ConnectionPool(
+        connect,
+        min_size=int(source.get("DB_POOL_MIN_SIZE", 1)),
+        max_size=int(source.get("DB_POOL_MAX_SIZE", 10)),
+        timeout=float(source.get("DB_POOL_TIMEOUT", 30)),
+        max_idle=float(source.get("DB_POOL_MAX_IDLE", 300)),
+        max_lifetime=float(source.get("DB_POOL_MAX_LIFETIME", 3600)),
+        health_check=config_flag(source, "DB_POOL_HEALTH_CHECK", True),
+        health_check_interval=float(source.get("DB_POOL_HEALTH_CHECK_INTERVAL", 30)),
+        reset=source.get("DB_POOL_RESET", "rollback"),
+        pgbouncer=config_flag(source, "DB_POOL_PGBOUNCER"),
+    )
+
+
+def get_pool():
+    if not current_app.config.get("DB_POOL_ENABLED", True):
+        return None
+
+    with _POOL_LOCK:
+        pool = current_app.extensions.get(POOL_EXTENSION_KEY)
+        if pool is not None and pool.pid != os.getpid():
+            # Connections inherited across fork() share sockets with the parent.
+            # Keep them referenced so garbage collection never sends a Terminate
+            # message over a socket the parent is still using.
+            _INHERITED_POOLS.append(pool)
+            pool = None
+        if pool is None:
+            pool = build_connection_pool(current_app.config)
+            current_app.extensions[POOL_EXTENSION_KEY] = pool
+            debug_log(
+                "Created PostgreSQL connection pool (pid=%s, min_size=%s, max_size=%s, pgbouncer=%s)",
+                pool.pid,
+                pool.min_size,
+                pool.max_size,
+                pool.pgbouncer,
+            )
+    return pool
+
+
+def get_pool_stats():
+    pool = current_app.extensions.get(POOL_EXTENSION_KEY)
+    if not current_app.config.get("DB_POOL_ENABLED", True) or pool is None:
+        return {"enabled": bool(current_app.config.get("DB_POOL_ENABLED", True)), "pid": os.getpid()}
+    return {"enabled": True, **pool.stats()}
+
+
 def get_conn():
     if "db" not in g:
+        pool = get_pool()
+        if pool is not None:
+            g.db = pool.getconn()
+            g.db_pool = pool
+            return g.db
+
         db_config = {
             **get_db_config(),
             "cursor_factory": RealDictCursor,
@@ -195,8 +572,15 @@ def check_images_table_exists():
 
 def close_db(e=None):
     db = g.pop("db", None)
+    pool = g.pop("db_pool", None)
+
+    if db is None:
+        return
 
-    if db is not None:
+    if pool is not None:
+        debug_log("Returning PostgreSQL connection to the pool.")
+        pool.putconn(db)
+    else:
         debug_log("Closing PostgreSQL connection.")
         db.close()
 
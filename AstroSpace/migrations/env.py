@@ -9,7 +9,8 @@ target_metadata = None
 
 
 def get_url():
-    return build_database_url()
+    # get_alembic_config() sets the URL for the database it was given; bare `alembic` runs fall back to the env.
+    return config.get_main_option("sqlalchemy.url") or build_database_url()
 
 
 def run_migrations_offline():
@@ -0,0 +1,24 @@
+"""Track cache versions so every worker can revalidate process-local caches."""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_0005"
+down_revision = "20260326_0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "cache_versions",
+        sa.Column("name", sa.Text(), primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+    )
+    op.execute("INSERT INTO cache_versions (name, version) VALUES ('web_info', 1)")
+
+
+def downgrade():
+    op.drop_table("cache_versions")
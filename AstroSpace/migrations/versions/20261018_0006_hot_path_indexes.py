@@ -0,0 +1,41 @@
+"""Add secondary indexes for the detail, profile, collection and comment hot paths.
+
+The indexes are built with CREATE INDEX CONCURRENTLY so upgrading a live
+database does not block writes. ``image_comments(visitor_hash, commented_at)``
+already exists from 20260326_0004.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_0006"
+down_revision = "20261018_0005"
+branch_labels = None
+depends_on = None
+
+
+HOT_PATH_INDEXES = (
+    ("ix_images_slug_created_at", "images", ["slug", sa.text("created_at DESC")]),
+    ("ix_images_author_created_at", "images", ["author", sa.text("created_at DESC")]),
+    ("ix_images_title_created_at", "images", ["title", sa.text("created_at DESC"), sa.text("id DESC")]),
+    ("ix_images_created_at_id", "images", [sa.text("created_at DESC"), sa.text("id DESC")]),
+    ("ix_capture_dates_image_id", "capture_dates", ["image_id", "capture_date"]),
+    ("ix_image_lights_image_id", "image_lights", ["image_id"]),
+    ("ix_image_software_image_id", "image_software", ["image_id"]),
+    ("ix_related_image_media_image_id", "related_image_media", ["image_id", "sort_order", "id"]),
+    ("ix_cam_filter_name", "cam_filter", ["name"]),
+)
+
+
+def upgrade():
+    # CONCURRENTLY cannot run inside the migration transaction.
+    with op.get_context().autocommit_block():
+        for name, table, columns in HOT_PATH_INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _columns in reversed(HOT_PATH_INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,41 @@
+"""Keep per-image view, like and comment counters in a side table."""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_0007"
+down_revision = "20261018_0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "image_counters",
+        sa.Column(
+            "image_id",
+            sa.Integer(),
+            sa.ForeignKey("images.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("view_count", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("like_count", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("comment_count", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+    )
+    op.execute(
+        """
+        INSERT INTO image_counters (image_id, view_count, like_count, comment_count)
+        SELECT
+            i.id,
+            (SELECT COUNT(*) FROM image_views v WHERE v.image_id = i.id),
+            (SELECT COUNT(*) FROM image_likes l WHERE l.image_id = i.id),
+            (SELECT COUNT(*) FROM image_comments c WHERE c.image_id = i.id AND c.status = 'published')
+        FROM images i
+        """
+    )
+
+
+def downgrade():
+    op.drop_table("image_counters")
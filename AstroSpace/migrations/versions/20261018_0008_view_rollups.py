@@ -0,0 +1,134 @@
+"""Count unique views with HyperLogLog sketches kept per image per day.
+
+Existing ``image_views`` rows are folded into the daily sketch of the day they
+were first and last seen, and into a lifetime sketch on ``image_counters``
+whose estimate becomes ``view_count``. Afterwards the raw rows can be pruned
+with ``python -m AstroSpace prune-views``. ``alembic upgrade --sql`` cannot
+read the rows; run ``python -m AstroSpace rebuild-view-rollups`` after
+applying the generated script instead.
+"""
+
+import math
+import zlib
+from collections import defaultdict
+from hashlib import blake2b
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "20261018_0008"
+down_revision = "20261018_0007"
+branch_labels = None
+depends_on = None
+
+# Frozen copy of the AstroSpace.services.hll register encoding at this revision.
+SKETCH_PRECISION = 11
+SKETCH_HASH_BITS = 64
+
+
+class _Sketch:
+    def __init__(self):
+        self.registers = bytearray(1 << SKETCH_PRECISION)
+
+    def add(self, value):
+        hashed = int.from_bytes(blake2b(str(value).encode("utf-8"), digest_size=8).digest(), "big")
+        remaining_bits = SKETCH_HASH_BITS - SKETCH_PRECISION
+        index = hashed >> remaining_bits
+        rank = remaining_bits - (hashed & ((1 << remaining_bits) - 1)).bit_length() + 1
+        self.registers[index] = max(self.registers[index], rank)
+
+    def estimate(self):
+        size = len(self.registers)
+        zeros = self.registers.count(0)
+        if zeros == size:
+            return 0
+        alpha = 0.7213 / (1 + 1.079 / size)
+        raw = alpha * size * size / sum(2.0 ** -register for register in self.registers)
+        if raw <= 2.5 * size and zeros:
+            return int(round(size * math.log(size / zeros)))
+        return int(round(raw))
+
+    def to_bytes(self):
+        return bytes([SKETCH_PRECISION]) + zlib.compress(bytes(self.registers))
+
+
+def _backfill_sketches(bind):
+    daily = defaultdict(_Sketch)
+    lifetime = defaultdict(_Sketch)
+    # Stream on the statement: Connection.execution_options() would switch every later
+    # statement of the migration, Alembic's version UPDATE included, to a server-side cursor.
+    rows = bind.execute(
+        sa.text(
+            """
+            SELECT
+                image_id,
+                visitor_hash,
+                COALESCE(viewed_at, last_seen_at)::date AS first_day,
+                COALESCE(last_seen_at, viewed_at)::date AS last_day
+            FROM image_views
+            WHERE image_id IS NOT NULL AND COALESCE(viewed_at, last_seen_at) IS NOT NULL
+            """
+        ).execution_options(stream_results=True)
+    )
+    for image_id, visitor_hash, first_day, last_day in rows:
+        daily[(image_id, first_day)].add(visitor_hash)
+        daily[(image_id, last_day)].add(visitor_hash)
+        lifetime[image_id].add(visitor_hash)
+
+    if daily:
+        bind.execute(
+            sa.text(
+                """
+                INSERT INTO image_view_rollups (image_id, day, sketch, visitors)
+                VALUES (:image_id, :day, :sketch, :visitors)
+                """
+            ),
+            [
+                {"image_id": image_id, "day": day, "sketch": sketch.to_bytes(), "visitors": sketch.estimate()}
+                for (image_id, day), sketch in daily.items()
+            ],
+        )
+    if lifetime:
+        bind.execute(
+            sa.text(
+                """
+                INSERT INTO image_counters (image_id, view_sketch, view_count)
+                VALUES (:image_id, :sketch, :visitors)
+                ON CONFLICT (image_id)
+                DO UPDATE SET view_sketch = EXCLUDED.view_sketch, view_count = EXCLUDED.view_count
+                """
+            ),
+            [
+                {"image_id": image_id, "sketch": sketch.to_bytes(), "visitors": sketch.estimate()}
+                for image_id, sketch in lifetime.items()
+            ],
+        )
+
+
+def upgrade():
+    op.create_table(
+        "image_view_rollups",
+        sa.Column(
+            "image_id",
+            sa.Integer(),
+            sa.ForeignKey("images.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("sketch", postgresql.BYTEA(), nullable=True),
+        sa.Column("visitors", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+    )
+    op.add_column("image_counters", sa.Column("view_sketch", postgresql.BYTEA(), nullable=True))
+    op.create_index("ix_image_views_last_seen_at", "image_views", ["last_seen_at"])
+    if context.is_offline_mode():
+        return
+    _backfill_sketches(op.get_bind())
+
+
+def downgrade():
+    op.drop_index("ix_image_views_last_seen_at", table_name="image_views")
+    op.drop_column("image_counters", "view_sketch")
+    op.drop_table("image_view_rollups")
@@ -0,0 +1,37 @@
+"""Index published comment threads in keyset order.
+
+Serves the inline thread preview and the paginated comments endpoint, which
+both read ``(commented_at, id)`` ranges of one image's published comments.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_0009"
+down_revision = "20261018_0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CONCURRENTLY cannot run inside the migration transaction.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_image_comments_published_thread",
+            "image_comments",
+            ["image_id", "commented_at", "id"],
+            postgresql_where=sa.text("status = 'published'"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_image_comments_published_thread",
+            table_name="image_comments",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
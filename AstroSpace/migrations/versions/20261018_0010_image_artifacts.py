@@ -0,0 +1,51 @@
+"""Move the heavy per-post payloads out of ``images`` into ``image_artifacts``.
+
+``header_json``, ``overlays_json``, ``meta_json`` and the two plot payloads are
+only read on the detail and edit pages, so listing scans no longer carry them.
+Dropping a column does not rewrite existing rows; run ``VACUUM FULL images``
+in a maintenance window to reclaim the space straight away.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "20261018_0010"
+down_revision = "20261018_0009"
+branch_labels = None
+depends_on = None
+
+
+ARTIFACT_COLUMNS = (
+    ("header_json", sa.Text()),
+    ("overlays_json", sa.Text()),
+    ("meta_json", sa.Text()),
+    ("guiding_plot_json", postgresql.JSONB(astext_type=sa.Text())),
+    ("calibration_plot_json", postgresql.JSONB(astext_type=sa.Text())),
+)
+
+
+def upgrade():
+    op.create_table(
+        "image_artifacts",
+        sa.Column(
+            "image_id",
+            sa.Integer(),
+            sa.ForeignKey("images.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        *[sa.Column(name, column_type, nullable=True) for name, column_type in ARTIFACT_COLUMNS],
+    )
+    columns = ", ".join(name for name, _column_type in ARTIFACT_COLUMNS)
+    op.execute(f"INSERT INTO image_artifacts (image_id, {columns}) SELECT id, {columns} FROM images")
+    for name, _column_type in ARTIFACT_COLUMNS:
+        op.drop_column("images", name)
+
+
+def downgrade():
+    for name, column_type in ARTIFACT_COLUMNS:
+        op.add_column("images", sa.Column(name, column_type, nullable=True))
+    assignments = ", ".join(f"{name} = a.{name}" for name, _column_type in ARTIFACT_COLUMNS)
+    op.execute(f"UPDATE images i SET {assignments} FROM image_artifacts a WHERE a.image_id = i.id")
+    op.drop_table("image_artifacts")
@@ -0,0 +1,69 @@
+"""Full-text search over posts and trigram autocomplete for object names.
+
+``images.search_document`` is a stored generated column, so PostgreSQL keeps it
+in step with every insert and update. Adding it rewrites ``images`` once. The
+trigram index needs the ``pg_trgm`` extension, which the migration role must be
+allowed to create.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "20261018_0011"
+down_revision = "20261018_0010"
+branch_labels = None
+depends_on = None
+
+
+# Title and author weigh most, then the teaser and object type, then the body.
+# The description is stored as sanitized HTML, so its tags are stripped first.
+SEARCH_DOCUMENT_EXPRESSION = """
+    setweight(to_tsvector('english'::regconfig, coalesce(title, '')), 'A')
+    || setweight(to_tsvector('simple'::regconfig, coalesce(author, '')), 'A')
+    || setweight(to_tsvector('english'::regconfig, coalesce(short_description, '')), 'B')
+    || setweight(to_tsvector('english'::regconfig, coalesce(object_type, '')), 'B')
+    || setweight(
+        to_tsvector('english'::regconfig, regexp_replace(coalesce(description, ''), '<[^>]*>', ' ', 'g')),
+        'C'
+    )
+"""
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column(
+        "images",
+        sa.Column(
+            "search_document",
+            postgresql.TSVECTOR(),
+            sa.Computed(SEARCH_DOCUMENT_EXPRESSION, persisted=True),
+        ),
+    )
+    # CONCURRENTLY cannot run inside the migration transaction.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_images_search_document",
+            "images",
+            ["search_document"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_images_title_trgm",
+            "images",
+            ["title"],
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_images_title_trgm", table_name="images", postgresql_concurrently=True, if_exists=True)
+        op.drop_index("ix_images_search_document", table_name="images", postgresql_concurrently=True, if_exists=True)
+    op.drop_column("images", "search_document")
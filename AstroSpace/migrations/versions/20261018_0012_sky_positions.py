@@ -0,0 +1,46 @@
+"""Store each post's sky position and index it by HEALPix pixel for cone searches.
+
+``healpix`` is the NESTED pixel of the field centre at order 10; the pixel at
+any coarser order ``k`` is ``healpix >> 2 * (10 - k)``, so one B-tree index
+serves range scans at every order. Existing posts get their positions from
+their stored WCS headers with ``python -m AstroSpace backfill-sky-positions``
+after upgrading; the WCS parsing lives in the application, not in the schema
+history.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "20261018_0012"
+down_revision = "20261018_0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("images", sa.Column("sky_ra", sa.Float(), nullable=True))
+    op.add_column("images", sa.Column("sky_dec", sa.Float(), nullable=True))
+    op.add_column("images", sa.Column("field_radius", sa.Float(), nullable=True))
+    op.add_column("images", sa.Column("footprint", postgresql.JSONB(), nullable=True))
+    op.add_column("images", sa.Column("healpix", sa.BigInteger(), nullable=True))
+
+    # CONCURRENTLY cannot run inside the migration transaction.
+    with op.get_context().autocommit_block():
+        op.create_index("ix_images_healpix", "images", ["healpix"], postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(
+            "ix_images_field_radius",
+            "images",
+            ["field_radius"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_images_field_radius", table_name="images", postgresql_concurrently=True, if_exists=True)
+        op.drop_index("ix_images_healpix", table_name="images", postgresql_concurrently=True, if_exists=True)
+    for column in ("healpix", "footprint", "field_radius", "sky_dec", "sky_ra"):
+        op.drop_column("images", column)
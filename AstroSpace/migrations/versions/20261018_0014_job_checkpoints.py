@@ -0,0 +1,53 @@
+"""Let long jobs checkpoint, report progress, be cancelled and record per-item outcomes.
+
+Admin maintenance rebuilds commit ``progress`` and ``checkpoint`` after every
+image, so a requeued job resumes where it stopped. ``job_items`` keeps the
+images (or files) a job skipped or failed on, for review and per-image retry.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "20261018_0014"
+down_revision = "20261018_0013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("jobs", sa.Column("progress", postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.add_column("jobs", sa.Column("checkpoint", postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.add_column(
+        "jobs",
+        sa.Column("cancel_requested", sa.Boolean(), nullable=False, server_default=sa.text("FALSE")),
+    )
+    op.drop_constraint("ck_jobs_status", "jobs", type_="check")
+    op.create_check_constraint(
+        "ck_jobs_status",
+        "jobs",
+        "status IN ('queued', 'running', 'succeeded', 'failed', 'cancelled')",
+    )
+    op.create_index("ix_jobs_kind_id", "jobs", ["kind", "id"])
+
+    op.create_table(
+        "job_items",
+        sa.Column("job_id", sa.BigInteger(), sa.ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("item_key", sa.Text(), primary_key=True),
+        sa.Column("image_id", sa.Integer(), sa.ForeignKey("images.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("status", sa.Text(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("updated_at", sa.TIMESTAMP(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+    )
+
+
+def downgrade():
+    op.drop_table("job_items")
+    op.drop_index("ix_jobs_kind_id", table_name="jobs")
+    op.execute("UPDATE jobs SET status = 'failed' WHERE status = 'cancelled'")
+    op.drop_constraint("ck_jobs_status", "jobs", type_="check")
+    op.create_check_constraint("ck_jobs_status", "jobs", "status IN ('queued', 'running', 'succeeded', 'failed')")
+    for column in ("cancel_requested", "checkpoint", "progress"):
+        op.drop_column("jobs", column)
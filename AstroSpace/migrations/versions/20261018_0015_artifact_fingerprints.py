@@ -0,0 +1,30 @@
+"""Record what each post's derived artifacts were built from.
+
+``artifact_fingerprints`` holds, per artifact, the hash of its inputs and the
+pipeline version that produced it, e.g.
+``{"thumbnail": {"source": ..., "path": ..., "version": 1},
+"overlays": {"header": ..., "version": 1}}``. Rebuilds skip artifacts whose
+fingerprint still matches. Existing rows start without one and are rebuilt
+once.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "20261018_0015"
+down_revision = "20261018_0014"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "image_artifacts",
+        sa.Column("artifact_fingerprints", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_column("image_artifacts", "artifact_fingerprints")
@@ -3,16 +3,29 @@ import os
 import logging
 from flask import Blueprint, render_template, current_app, g, request, jsonify
 from psycopg2 import sql
-from psycopg2.extras import Json
-from AstroSpace.constants import INVENTORY_TABLES, RELATED_MEDIA_VIDEO_EXTENSIONS
-from AstroSpace.db import get_conn
-from AstroSpace.auth import login_required
+from AstroSpace.constants import INVENTORY_TABLES
+from AstroSpace.db import get_conn, get_pool_stats
+from AstroSpace.auth import forget_user, login_required, user_cache_name
 from AstroSpace.logging_utils import debug_log
 from AstroSpace.services.authorization import current_user_is_admin, require_admin
+from AstroSpace.services.cache import bump_cache_version
+from AstroSpace.services.collection_filters import COLLECTION_FILTERS_CACHE_NAME, forget_collection_filter_metadata
 from AstroSpace.services.content import sanitize_rich_text
+from AstroSpace.services.ingest import INGEST_JOB_KIND
+from AstroSpace.services.jobs import fetch_job, job_payload, request_job_cancel
+from AstroSpace.services.maintenance import (
+    ITEM_FAILED,
+    MAINTENANCE_GUIDING,
+    MAINTENANCE_PLATE_SOLVE,
+    MAINTENANCE_PURGE_UPLOADS,
+    fetch_failed_image_ids,
+    fetch_job_items,
+    fetch_maintenance_jobs,
+    queue_maintenance_job,
+)
+from AstroSpace.services.site import WEB_INFO_CACHE_NAME, forget_web_info
 from AstroSpace.services.uploads import allowed_file
-from AstroSpace.utils.phd2logparser import build_plotly_payloads
-from AstroSpace.utils.platesolve import rebuild_plate_solve_artifacts
+from AstroSpace.utils.simbad_cache import get_simbad_cache
 from AstroSpace.utils.utils import (
     ALLOWED_IMG_EXTENSIONS,
     resize_image,
@@ -28,16 +41,6 @@ INVENTORY_FIELD_CHOICES = {
     "rotator": {"type": ("manual", "motorized")},
     "software": {"type": ("acquisition", "processing")},
 }
-PURGE_UPLOAD_EXTENSIONS = {
-    ".jpg",
-    ".jpeg",
-    ".png",
-    ".webp",
-    ".gif",
-    *{f".{extension}" for extension in RELATED_MEDIA_VIDEO_EXTENSIONS},
-}
-
-
 def normalize_inventory_values(table, values):
     normalized = dict(values)
     normalized["name"] = (normalized.get("name") or "").strip()
@@ -63,242 +66,6 @@ def normalize_inventory_values(table, values):
     return normalized
 
 
-def normalize_public_path(path):
-    if not path:
-        return ""
-    return str(path).replace("\\", "/").strip().lstrip("/")
-
-
-def resolve_upload_path(upload_root, public_path):
-    normalized = normalize_public_path(public_path)
-    if not normalized:
-        return ""
-    return os.path.normpath(os.path.join(upload_root, normalized.replace("/", os.sep)))
-
-
-def collect_referenced_upload_paths(rows):
-    referenced = set()
-    for row in rows:
-        for value in row:
-            if not value:
-                continue
-            for item in str(value).split(","):
-                normalized = normalize_public_path(item)
-                if normalized:
-                    referenced.add(normalized)
-    return referenced
-
-
-def collect_orphan_image_uploads(upload_root, referenced_paths):
-    referenced = {normalize_public_path(path) for path in referenced_paths if path}
-    orphans = []
-
-    if not os.path.isdir(upload_root):
-        return orphans
-
-    for root, _, files in os.walk(upload_root):
-        for filename in files:
-            ext = os.path.splitext(filename)[1].lower()
-            if ext not in PURGE_UPLOAD_EXTENSIONS:
-                continue
-
-            absolute_path = os.path.join(root, filename)
-            relative_path = normalize_public_path(os.path.relpath(absolute_path, upload_root))
-            if relative_path not in referenced:
-                orphans.append(absolute_path)
-
-    return sorted(orphans)
-
-
-def rebuild_all_guiding_plots(db, upload_root):
-    stats = {
-        "updated": 0,
-        "skipped": 0,
-        "missing_files": [],
-        "errors": [],
-    }
-
-    with db.cursor() as cur:
-        cur.execute(
-            """
-            SELECT id, guide_log
-            FROM images
-            WHERE guide_log IS NOT NULL AND NULLIF(BTRIM(guide_log), '') IS NOT NULL
-            ORDER BY id
-            """
-        )
-        rows = cur.fetchall()
-
-    for row in rows:
-        image_id = row["id"]
-        relative_logs = [normalize_public_path(path) for path in row["guide_log"].split(",") if normalize_public_path(path)]
-        absolute_logs = [resolve_upload_path(upload_root, path) for path in relative_logs]
-        missing = [path for path, absolute in zip(relative_logs, absolute_logs) if not os.path.exists(absolute)]
-
-        if missing:
-            stats["skipped"] += 1
-            stats["missing_files"].append({"image_id": image_id, "paths": missing})
-            continue
-
-        try:
-            guiding_plot, calibration_plot = build_plotly_payloads(",".join(absolute_logs))
-            with db.cursor() as cur:
-                cur.execute(
-                    """
-                    UPDATE images
-                    SET guiding_plot_json = %s,
-                        calibration_plot_json = %s,
-                        edited_at = CURRENT_TIMESTAMP
-                    WHERE id = %s
-                    """,
-                    (Json(guiding_plot), Json(calibration_plot), image_id),
-                )
-            db.commit()
-            stats["updated"] += 1
-        except Exception as exc:
-            db.rollback()
-            stats["skipped"] += 1
-            stats["errors"].append({"image_id": image_id, "error": str(exc)})
-    return stats
-
-
-def rebuild_all_plate_solves(db, upload_root):
-    stats = {
-        "updated": 0,
-        "skipped": 0,
-        "missing_files": [],
-        "errors": [],
-    }
-
-    with db.cursor() as cur:
-        cur.execute(
-            """
-            SELECT id, image_path, header_json
-            FROM images
-            WHERE image_path IS NOT NULL AND NULLIF(BTRIM(image_path), '') IS NOT NULL
-              AND header_json IS NOT NULL AND NULLIF(BTRIM(header_json), '') IS NOT NULL
-            ORDER BY id
-            """
-        )
-        rows = cur.fetchall()
-
-    current_app.logger.info("Starting plate-solve rebuild for %s images", len(rows))
-
-    for row in rows:
-        image_id = row["id"]
-        public_image_path = normalize_public_path(row["image_path"])
-        absolute_image_path = resolve_upload_path(upload_root, public_image_path)
-
-        if not os.path.exists(absolute_image_path):
-            stats["skipped"] += 1
-            stats["missing_files"].append({"image_id": image_id, "path": public_image_path})
-            current_app.logger.warning(
-                "Skipping plate-solve rebuild for image_id=%s because image file is missing: %s",
-                image_id,
-                public_image_path,
-            )
-            continue
-
-        try:
-            thumbnail_path, pixel_scale, overlays_json, header_json = rebuild_plate_solve_artifacts(
-                absolute_image_path,
-                public_image_path,
-                row["header_json"],
-            )
-            with db.cursor() as cur:
-                cur.execute(
-                    """
-                    UPDATE images
-                    SET image_thumbnail = %s,
-                        pixel_scale = %s,
-                        overlays_json = %s,
-                        header_json = %s,
-                        edited_at = CURRENT_TIMESTAMP
-                    WHERE id = %s
-                    """,
-                    (thumbnail_path, pixel_scale, overlays_json, header_json, image_id),
-                )
-            db.commit()
-            stats["updated"] += 1
-            debug_log(
-                "Rebuilt plate-solve artifacts for image_id=%s thumbnail=%s pixel_scale=%s",
-                image_id,
-                thumbnail_path,
-                pixel_scale,
-            )
-        except Exception as exc:
-            db.rollback()
-            stats["skipped"] += 1
-            stats["errors"].append({"image_id": image_id, "error": str(exc)})
-            current_app.logger.warning(
-                "Skipping plate-solve rebuild for image_id=%s because artifact rebuild failed: %s",
-                image_id,
-                exc,
-            )
-
-    current_app.logger.info(
-        "Plate-solve rebuild finished (updated=%s, skipped=%s)",
-        stats["updated"],
-        stats["skipped"],
-    )
-    return stats
-
-
-def purge_unbound_image_uploads(db, upload_root):
-    with db.cursor() as cur:
-        cur.execute(
-            """
-            SELECT image_path, image_thumbnail, starless_image_path
-            FROM images
-            """
-        )
-        image_rows = cur.fetchall()
-        cur.execute(
-            """
-            SELECT media_path
-            FROM related_image_media
-            WHERE media_path IS NOT NULL AND NULLIF(BTRIM(media_path), '') IS NOT NULL
-            """
-        )
-        related_media_rows = cur.fetchall()
-        cur.execute(
-            """
-            SELECT display_image
-            FROM users
-            WHERE display_image IS NOT NULL AND NULLIF(BTRIM(display_image), '') IS NOT NULL
-            """
-        )
-        user_rows = cur.fetchall()
-
-    referenced = collect_referenced_upload_paths(
-        [
-            (
-                row.get("image_path"),
-                row.get("image_thumbnail"),
-                row.get("starless_image_path"),
-            )
-            for row in image_rows
-        ]
-        + [(row.get("media_path"),) for row in related_media_rows]
-        + [(row.get("display_image"),) for row in user_rows]
-    )
-    orphans = collect_orphan_image_uploads(upload_root, referenced)
-
-    deleted = []
-    errors = []
-    for absolute_path in orphans:
-        try:
-            os.remove(absolute_path)
-            deleted.append(absolute_path)
-        except OSError as exc:
-            errors.append({"path": absolute_path, "error": str(exc)})
-
-    return {
-        "deleted": len(deleted),
-        "errors": errors,
-        "deleted_paths": [normalize_public_path(os.path.relpath(path, upload_root)) for path in deleted],
-    }
-
 @bp.route("/profile")
 @login_required
 def profile():
@@ -311,8 +78,21 @@ def profile():
     db = get_conn()
     with db.cursor() as cur:
         cur.execute(
-            "SELECT id, title, short_description, image_thumbnail, slug, pixel_scale, object_type, location, created_at FROM images WHERE author = %s ORDER BY created_at DESC",
-            (g.user["username"],),
+            """
+            SELECT i.id, i.title, i.short_description, i.image_path, i.image_thumbnail, i.slug, i.pixel_scale,
+                   i.object_type, i.location, i.created_at, j.id AS job_id, j.status AS job_status, j.error AS job_error
+            FROM images i
+            LEFT JOIN LATERAL (
+                SELECT id, status, error
+                FROM jobs
+                WHERE image_id = i.id AND kind = %s
+                ORDER BY id DESC
+                LIMIT 1
+            ) j ON TRUE
+            WHERE i.author = %s
+            ORDER BY i.created_at DESC
+            """,
+            (INGEST_JOB_KIND, g.user["username"]),
         )
         posts = cur.fetchall()
 
@@ -398,6 +178,9 @@ def profile():
         WebName=current_app.config["TITLE"],
         web_info = web_info,
         can_manage_site=current_user_is_admin(),
+        maintenance_jobs=(
+            {job["kind"]: job_payload(job) for job in fetch_maintenance_jobs()} if current_user_is_admin() else {}
+        ),
         active_tab=active_tab,
     )
 
@@ -485,8 +268,11 @@ def update_inventory():
                     tid,
                     name,
                 )
-        
+
+        with db.cursor() as cur:
+            bump_cache_version(cur, COLLECTION_FILTERS_CACHE_NAME)
         db.commit()
+        forget_collection_filter_metadata()
     except Exception as exc:
         db.rollback()
         current_app.logger.exception(
@@ -507,82 +293,99 @@ def update_inventory():
     return jsonify({"message": "Inventory updated successfully"}), 200
 
 
+def _maintenance_job_response(job_id, created, label):
+    job = job_payload(fetch_job(job_id))
+    if not created:
+        return jsonify({"message": f"{label} is already queued or running.", "job": job}), 409
+    current_app.logger.info("Admin user=%s queued %s as job %s", g.user["username"], label.lower(), job_id)
+    return jsonify({"message": f"{label} queued. You can close this page while it runs.", "job": job}), 202
+
+
 @bp.route("/admin/redo_guiding_graphs", methods=["POST"])
 @login_required
 def redo_guiding_graphs():
     require_admin()
-    db = get_conn()
-
-    try:
-        stats = rebuild_all_guiding_plots(db, current_app.config["UPLOAD_PATH"])
-    except Exception as exc:
-        db.rollback()
-        current_app.logger.exception("Failed to rebuild guiding plots")
-        return jsonify({"message": f"Failed to rebuild guiding plots: {exc}"}), 500
-
-    message = f"Updated {stats['updated']} images."
-    if stats["skipped"]:
-        message += f" Skipped {stats['skipped']} images."
-
-    return jsonify(
-        {
-            "message": message,
-            "stats": stats,
-        }
-    ), 200
+    return _maintenance_job_response(*queue_maintenance_job(MAINTENANCE_GUIDING), "Guiding graph rebuild")
 
 
 @bp.route("/admin/redo_plate_solving", methods=["POST"])
 @login_required
 def redo_plate_solving():
     require_admin()
-    db = get_conn()
-    current_app.logger.info(
-        "Admin user=%s requested plate-solve rebuild for all images",
-        g.user["username"],
+    force = request.args.get("force") in {"1", "true", "on"}
+    dry_run = request.args.get("dry_run") in {"1", "true", "on"}
+    label = "Stale plate-solve check" if dry_run else "Plate-solve rebuild"
+    return _maintenance_job_response(
+        *queue_maintenance_job(MAINTENANCE_PLATE_SOLVE, force=force, dry_run=dry_run), label
     )
 
-    try:
-        stats = rebuild_all_plate_solves(db, current_app.config["UPLOAD_PATH"])
-    except Exception as exc:
-        db.rollback()
-        current_app.logger.exception("Failed to rebuild plate-solving artifacts")
-        return jsonify({"message": f"Failed to rebuild plate-solving artifacts: {exc}"}), 500
 
-    message = f"Updated {stats['updated']} images."
-    if stats["skipped"]:
-        message += f" Skipped {stats['skipped']} images."
+@bp.route("/admin/purge_orphan_image_uploads", methods=["POST"])
+@login_required
+def purge_orphan_image_uploads():
+    require_admin()
+    return _maintenance_job_response(*queue_maintenance_job(MAINTENANCE_PURGE_UPLOADS), "Upload purge")
+
+
+@bp.route("/admin/maintenance_jobs")
+@login_required
+def maintenance_jobs():
+    require_admin()
+    return jsonify({"jobs": [job_payload(job) for job in fetch_maintenance_jobs()]}), 200
+
+
+@bp.route("/admin/jobs/<int:job_id>/cancel", methods=["POST"])
+@login_required
+def cancel_maintenance_job(job_id):
+    require_admin()
+    status = request_job_cancel(get_conn(), job_id)
+    if status is None:
+        return jsonify({"message": "Job has already finished."}), 409
+    message = "Job cancelled." if status == "cancelled" else "Cancel requested; the job stops after its current item."
+    return jsonify({"message": message, "job": job_payload(fetch_job(job_id))}), 200
+
 
+@bp.route("/admin/jobs/<int:job_id>/items")
+@login_required
+def maintenance_job_items(job_id):
+    require_admin()
+    items = fetch_job_items(job_id, status=request.args.get("status") or None)
     return jsonify(
         {
-            "message": message,
-            "stats": stats,
+            "items": [
+                {**item, "updated_at": item["updated_at"].isoformat() if item["updated_at"] else None}
+                for item in items
+            ]
         }
     ), 200
 
 
-@bp.route("/admin/purge_orphan_image_uploads", methods=["POST"])
+@bp.route("/admin/jobs/<int:job_id>/retry_failed", methods=["POST"])
 @login_required
-def purge_orphan_image_uploads():
+def retry_failed_maintenance_items(job_id):
     require_admin()
-    db = get_conn()
+    job = fetch_job(job_id)
+    if not job or job["kind"] not in (MAINTENANCE_GUIDING, MAINTENANCE_PLATE_SOLVE):
+        return jsonify({"message": "Only plate-solve and guiding rebuilds can be retried per image."}), 400
+    image_ids = fetch_failed_image_ids(job_id)
+    if not image_ids:
+        return jsonify({"message": f"Job {job_id} has no {ITEM_FAILED} images to retry."}), 400
+    label = f"Retry of {len(image_ids)} failed image(s)"
+    return _maintenance_job_response(*queue_maintenance_job(job["kind"], image_ids=image_ids, retry_of=job_id), label)
 
-    try:
-        stats = purge_unbound_image_uploads(db, current_app.config["UPLOAD_PATH"])
-    except Exception as exc:
-        current_app.logger.exception("Failed to purge unbound image uploads")
-        return jsonify({"message": f"Failed to purge unbound images/thumbnails: {exc}"}), 500
 
-    message = f"Deleted {stats['deleted']} unbound images/thumbnails."
-    if stats["errors"]:
-        message += f" {len(stats['errors'])} deletions failed."
+@bp.route("/admin/simbad_cache_stats")
+@login_required
+def simbad_cache_stats():
+    require_admin()
+    return jsonify(get_simbad_cache().stats()), 200
+
 
-    return jsonify(
-        {
-            "message": message,
-            "stats": stats,
-        }
-    ), 200
+@bp.route("/admin/db_pool_stats")
+@login_required
+def db_pool_stats():
+    require_admin()
+    return jsonify(get_pool_stats()), 200
 
 @bp.route("/update_settings", methods=["POST"])
 @login_required
@@ -662,7 +465,9 @@ def update_settings():
                     """,
                     (filename_to_store, user_id),
                 )
+            bump_cache_version(cur, user_cache_name(user_id))
         db.commit()
+        forget_user(user_id)
         debug_log("User settings committed for user_id=%s", user_id, level=logging.INFO)
     except Exception as e:
         debug_log(
@@ -698,8 +503,10 @@ def update_settings():
                         INSERT INTO web_info (welcome_message, site_name)
                         VALUES (%s, %s)
                     """, (welcome_note, site_name))
+                bump_cache_version(cur, WEB_INFO_CACHE_NAME)
 
             db.commit()
+            forget_web_info()
             debug_log("web_info content committed successfully", level=logging.INFO)
 
         except Exception as e:
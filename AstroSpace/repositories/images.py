@@ -1,9 +1,18 @@
 import json
 import os
+from datetime import date
 
 from psycopg2 import sql
 
-from AstroSpace.constants import DB_TABLES, RELATED_MEDIA_VIDEO_EXTENSIONS
+from AstroSpace.constants import (
+    COLLECTION_COUNT_CAP,
+    COLLECTION_PAGE_SIZE,
+    DB_TABLES,
+    IMAGE_ARTIFACT_COLUMNS,
+    RELATED_MEDIA_VIDEO_EXTENSIONS,
+    SEARCH_RESULT_LIMIT,
+    SEARCH_SUGGESTION_LIMIT,
+)
 from AstroSpace.db import get_conn
 from AstroSpace.utils.phd2logparser import deserialize_plot_payload
 from AstroSpace.utils.platesolve import get_overlays
@@ -18,21 +27,28 @@ def _related_media_kind(path):
     return "video" if extension in RELATED_MEDIA_VIDEO_EXTENSIONS else "image"
 
 
+# A post is listed once per title, as its most recent version.
+_LATEST_VERSION_SQL = """
+    NOT EXISTS (
+        SELECT 1
+        FROM images newer
+        WHERE newer.title = {alias}.title
+          AND (newer.created_at, newer.id) > ({alias}.created_at, {alias}.id)
+    )
+"""
+
+
 def get_all_images(unique=False, limit=None):
     conn = get_conn()
     cur = conn.cursor()
 
     if unique:
         cur.execute(
-            """
-            SELECT id, title, short_description, slug, image_path, image_thumbnail, created_at
-            FROM (
-                SELECT DISTINCT ON (title)
-                    id, title, short_description, slug, image_path, image_thumbnail, created_at
-                FROM images
-                ORDER BY title, created_at DESC
-            ) t
-            ORDER BY created_at DESC
+            f"""
+            SELECT i.id, i.title, i.short_description, i.slug, i.image_path, i.image_thumbnail, i.created_at
+            FROM images i
+            WHERE {_LATEST_VERSION_SQL.format(alias="i")}
+            ORDER BY i.created_at DESC, i.id DESC
             LIMIT %s
             """,
             (limit,),
@@ -59,101 +75,181 @@ def get_all_images(unique=False, limit=None):
     return cur.fetchall()
 
 
-def _fetch_distinct_values(cur, query):
+ADJACENT_POSTS_QUERY = f"""
+    WITH anchor AS (
+        SELECT created_at, id
+        FROM (
+            SELECT i.created_at, i.id, 0 AS preference
+            FROM images i
+            WHERE i.id = %(image_id)s
+              AND {_LATEST_VERSION_SQL.format(alias="i")}
+            UNION ALL
+            (
+                SELECT i.created_at, i.id, 1 AS preference
+                FROM images i
+                WHERE i.slug = %(slug)s
+                  AND {_LATEST_VERSION_SQL.format(alias="i")}
+                ORDER BY i.created_at DESC, i.id DESC
+                LIMIT 1
+            )
+        ) candidates
+        ORDER BY preference
+        LIMIT 1
+    )
+    SELECT 'previous' AS direction, p.*
+    FROM anchor
+    CROSS JOIN LATERAL (
+        SELECT i.id, i.title, i.short_description, i.slug, i.image_path, i.image_thumbnail, i.created_at
+        FROM images i
+        WHERE (i.created_at, i.id) > (anchor.created_at, anchor.id)
+          AND {_LATEST_VERSION_SQL.format(alias="i")}
+        ORDER BY i.created_at ASC, i.id ASC
+        LIMIT 1
+    ) p
+    UNION ALL
+    SELECT 'next' AS direction, n.*
+    FROM anchor
+    CROSS JOIN LATERAL (
+        SELECT i.id, i.title, i.short_description, i.slug, i.image_path, i.image_thumbnail, i.created_at
+        FROM images i
+        WHERE (i.created_at, i.id) < (anchor.created_at, anchor.id)
+          AND {_LATEST_VERSION_SQL.format(alias="i")}
+        ORDER BY i.created_at DESC, i.id DESC
+        LIMIT 1
+    ) n
+"""
+
+
+def get_adjacent_posts(image_id, slug):
+    """Return the posts listed directly before and after ``image_id``.
+
+    Mirrors ``get_all_images(unique=True)`` ordering (newest first, one entry per
+    title) without loading it: the current post is located by id, falling back
+    to the newest listed post with the same slug, and its neighbours are found
+    with keyset lookups on ``(created_at, id)``.
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(ADJACENT_POSTS_QUERY, {"image_id": image_id, "slug": slug})
+    rows = cur.fetchall()
+    cur.close()
+
+    neighbours = {"previous": None, "next": None}
+    for row in rows:
+        neighbours[row.pop("direction")] = row
+    return neighbours
+
+
+def _fetch_facet(cur, query):
     cur.execute(query)
-    return [row["value"] for row in cur.fetchall() if row.get("value") not in (None, "")]
+    rows = [row for row in cur.fetchall() if row.get("value") not in (None, "")]
+    return [row["value"] for row in rows], {row["value"]: int(row["result_count"]) for row in rows}
 
 
-def get_collection_filter_metadata():
+def load_collection_filter_metadata():
+    """Compute facet values, per-value result counts and slider ranges for ``/collection``.
+
+    Counts are distinct titles, matching the one-card-per-title listing.
+    """
     conn = get_conn()
     cur = conn.cursor()
 
-    dropdowns = {
-        "telescope_type": _fetch_distinct_values(
+    facets = {
+        "telescope_type": _fetch_facet(
             cur,
             """
-            SELECT DISTINCT t.type AS value
+            SELECT t.type AS value, COUNT(DISTINCT i.title) AS result_count
             FROM images i
             JOIN telescope t ON t.id = i.telescope_id
             WHERE t.type IS NOT NULL AND BTRIM(t.type) <> ''
+            GROUP BY value
             ORDER BY value
             """,
         ),
-        "telescope_name": _fetch_distinct_values(
+        "telescope_name": _fetch_facet(
             cur,
             """
-            SELECT DISTINCT t.name AS value
+            SELECT t.name AS value, COUNT(DISTINCT i.title) AS result_count
             FROM images i
             JOIN telescope t ON t.id = i.telescope_id
             WHERE t.name IS NOT NULL AND BTRIM(t.name) <> ''
+            GROUP BY value
             ORDER BY value
             """,
         ),
-        "main_camera": _fetch_distinct_values(
+        "main_camera": _fetch_facet(
             cur,
             """
-            SELECT DISTINCT c.name AS value
+            SELECT c.name AS value, COUNT(DISTINCT i.title) AS result_count
             FROM images i
             JOIN camera c ON c.id = i.camera_id
             WHERE c.name IS NOT NULL AND BTRIM(c.name) <> ''
+            GROUP BY value
             ORDER BY value
             """,
         ),
-        "guide_camera": _fetch_distinct_values(
+        "guide_camera": _fetch_facet(
             cur,
             """
-            SELECT DISTINCT c.name AS value
+            SELECT c.name AS value, COUNT(DISTINCT i.title) AS result_count
             FROM images i
             JOIN camera c ON c.id = i.guide_camera_id
             WHERE c.name IS NOT NULL AND BTRIM(c.name) <> ''
+            GROUP BY value
             ORDER BY value
             """,
         ),
-        "filter_type": _fetch_distinct_values(
+        "filter_type": _fetch_facet(
             cur,
             """
-            SELECT DISTINCT cf.type AS value
+            SELECT cf.type AS value, COUNT(DISTINCT i.title) AS result_count
             FROM images i
             JOIN image_lights il ON il.image_id = i.id
             JOIN cam_filter cf ON cf.name = il.cam_filter
             WHERE cf.type IS NOT NULL AND BTRIM(cf.type) <> ''
+            GROUP BY value
             ORDER BY value
             """,
         ),
-        "mount": _fetch_distinct_values(
+        "mount": _fetch_facet(
             cur,
             """
-            SELECT DISTINCT m.name AS value
+            SELECT m.name AS value, COUNT(DISTINCT i.title) AS result_count
             FROM images i
             JOIN mount m ON m.id = i.mount_id
             WHERE m.name IS NOT NULL AND BTRIM(m.name) <> ''
+            GROUP BY value
             ORDER BY value
             """,
         ),
-        "object_type": _fetch_distinct_values(
+        "object_type": _fetch_facet(
             cur,
             """
-            SELECT DISTINCT i.object_type AS value
+            SELECT i.object_type AS value, COUNT(DISTINCT i.title) AS result_count
             FROM images i
             WHERE i.object_type IS NOT NULL AND BTRIM(i.object_type) <> ''
+            GROUP BY value
             ORDER BY value
             """,
         ),
-        "moon_phase": _fetch_distinct_values(
+        "moon_phase": _fetch_facet(
             cur,
             """
-            SELECT DISTINCT cd.moon_phase AS value
+            SELECT cd.moon_phase AS value, COUNT(DISTINCT i.title) AS result_count
             FROM capture_dates cd
+            JOIN images i ON i.id = cd.image_id
             WHERE cd.moon_phase IS NOT NULL AND BTRIM(cd.moon_phase) <> ''
+            GROUP BY value
             ORDER BY value
             """,
         ),
-        "author": _fetch_distinct_values(
+        "author": _fetch_facet(
             cur,
             """
-            SELECT DISTINCT i.author AS value
+            SELECT i.author AS value, COUNT(DISTINCT i.title) AS result_count
             FROM images i
             WHERE i.author IS NOT NULL AND BTRIM(i.author) <> ''
+            GROUP BY value
             ORDER BY value
             """,
         ),
@@ -185,7 +281,8 @@ def get_collection_filter_metadata():
     cur.close()
 
     return {
-        "dropdowns": dropdowns,
+        "dropdowns": {field: values for field, (values, _counts) in facets.items()},
+        "counts": {field: counts for field, (_values, counts) in facets.items()},
         "ranges": {
             "focal_length": {
                 "min": range_row.get("min_focal_length"),
@@ -203,24 +300,23 @@ def get_collection_filter_metadata():
     }
 
 
-def build_collection_query(filters):
-    query = """
-        SELECT id, title, short_description, slug, image_path, image_thumbnail, created_at
-        FROM (
-            SELECT DISTINCT ON (i.title)
-                i.id,
-                i.title,
-                i.short_description,
-                i.slug,
-                i.image_path,
-                i.image_thumbnail,
-                i.created_at
-            FROM images i
-            LEFT JOIN telescope t ON t.id = i.telescope_id
-            LEFT JOIN camera main_camera ON main_camera.id = i.camera_id
-            LEFT JOIN camera guide_camera ON guide_camera.id = i.guide_camera_id
-            LEFT JOIN mount m ON m.id = i.mount_id
-            WHERE 1 = 1
+def build_collection_query(filters, after=None, limit=None):
+    """Build the one-card-per-title collection query, newest first.
+
+    Each title is represented by its latest version, and the filters apply to
+    that version. ``after`` is the ``(created_at, id)`` of the last card
+    already shown and ``limit`` the page size. The keyset and the limit sit
+    next to the filters, so a page walks ``ix_images_created_at_id`` and stops
+    once it is full instead of deduplicating the whole catalogue.
+    """
+    query = f"""
+        SELECT i.id, i.title, i.short_description, i.slug, i.image_path, i.image_thumbnail, i.created_at
+        FROM images i
+        LEFT JOIN telescope t ON t.id = i.telescope_id
+        LEFT JOIN camera main_camera ON main_camera.id = i.camera_id
+        LEFT JOIN camera guide_camera ON guide_camera.id = i.guide_camera_id
+        LEFT JOIN mount m ON m.id = i.mount_id
+        WHERE {_LATEST_VERSION_SQL.format(alias="i")}
     """
 
     conditions = []
@@ -292,50 +388,211 @@ def build_collection_query(filters):
         )
         params.append(filters["filter_type"])
 
+    if after is not None:
+        conditions.append("(i.created_at, i.id) < (%s, %s)")
+        params.extend(after)
+
     if conditions:
-        query += "\n            AND " + "\n            AND ".join(conditions)
+        query += "\n        AND " + "\n        AND ".join(conditions)
 
     query += """
-            ORDER BY i.title, i.created_at DESC
-        ) filtered_images
-        ORDER BY created_at DESC
+        ORDER BY i.created_at DESC, i.id DESC
+    """
+
+    if limit is not None:
+        query += """
+        LIMIT %s
     """
+        params.append(limit)
 
     return query, params
 
 
-def get_collection_images(filters):
+def get_collection_page(filters, after=None, limit=COLLECTION_PAGE_SIZE):
+    """Return one page of collection cards and the keyset of the next page, if any."""
     conn = get_conn()
     cur = conn.cursor()
-    query, params = build_collection_query(filters)
+    query, params = build_collection_query(filters, after=after, limit=limit + 1)
     cur.execute(query, params)
     rows = cur.fetchall()
     cur.close()
-    return rows
 
+    next_after = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_after = (rows[-1]["created_at"], rows[-1]["id"])
+    return rows, next_after
 
-def get_image_by_id(image_id):
+
+def count_collection_images(filters, cap=COLLECTION_COUNT_CAP):
+    """Count matching collection cards, stopping one past ``cap``.
+
+    A result above ``cap`` means "more than cap"; the count never walks the
+    whole catalogue just to print an exact total.
+    """
     conn = get_conn()
     cur = conn.cursor()
-    cur.execute("SELECT * FROM images WHERE id = %s", (image_id,))
-    row = cur.fetchone()
-    if not row:
-        return None
+    query, params = build_collection_query(filters, limit=cap + 1)
+    cur.execute(f"SELECT COUNT(*) AS total FROM ({query}) matched", params)
+    row = cur.fetchone() or {}
+    cur.close()
+    return int(row.get("total") or 0)
+
+
+# The full-text match is selective, so the latest-version check runs as one index probe per match.
+SEARCH_QUERY = f"""
+    SELECT
+        i.id,
+        i.title,
+        i.short_description,
+        i.slug,
+        i.image_path,
+        i.image_thumbnail,
+        i.created_at,
+        ts_rank_cd(i.search_document, q.query) AS rank
+    FROM images i, websearch_to_tsquery('english', %(terms)s) AS q (query)
+    WHERE i.search_document @@ q.query
+      AND {_LATEST_VERSION_SQL.format(alias="i")}
+    ORDER BY rank DESC, i.created_at DESC, i.id DESC
+    LIMIT %(limit)s
+"""
+
+OBJECT_SUGGESTION_QUERY = """
+    SELECT title
+    FROM images
+    WHERE title ILIKE %(prefix)s OR title %% %(term)s
+    GROUP BY title
+    ORDER BY BOOL_OR(title ILIKE %(prefix)s) DESC, MAX(similarity(title, %(term)s)) DESC, title
+    LIMIT %(limit)s
+"""
+
+
+def _escape_like(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_images(terms, limit=SEARCH_RESULT_LIMIT):
+    """Return posts matching ``terms`` (web-search syntax), best match first.
+
+    Title and author weigh most, then the short description and object type,
+    then the description body; see ``images.search_document``. Only the
+    latest version of each title is returned, as in the collection.
+    """
+    conn = get_conn()
+    with conn.cursor() as cur:
+        cur.execute(SEARCH_QUERY, {"terms": terms, "limit": limit})
+        return cur.fetchall()
+
+
+def suggest_object_names(term, limit=SEARCH_SUGGESTION_LIMIT):
+    """Return distinct post titles for autocomplete: prefix matches first, then trigram look-alikes."""
+    conn = get_conn()
+    with conn.cursor() as cur:
+        cur.execute(
+            OBJECT_SUGGESTION_QUERY,
+            {"term": term, "prefix": f"{_escape_like(term)}%", "limit": limit},
+        )
+        return [row["title"] for row in cur.fetchall()]
+
+
+IMAGE_CARD_COLUMNS = (
+    "id",
+    "title",
+    "slug",
+    "author",
+    "short_description",
+    "image_thumbnail",
+    "created_at",
+)
+IMAGE_CARD_QUERY = f"SELECT {', '.join(IMAGE_CARD_COLUMNS)} FROM images WHERE id = %s"
+
+
+def image_exists(image_id):
+    """Return whether a post with ``image_id`` exists without reading any of its columns."""
+    conn = get_conn()
+    with conn.cursor() as cur:
+        cur.execute("SELECT EXISTS(SELECT 1 FROM images WHERE id = %s) AS present", (image_id,))
+        return bool(cur.fetchone()["present"])
+
+
+def get_image_card(image_id):
+    """Return the light ``IMAGE_CARD_COLUMNS`` of a post (enough for links and ownership checks)."""
+    conn = get_conn()
+    with conn.cursor() as cur:
+        cur.execute(IMAGE_CARD_QUERY, (image_id,))
+        return cur.fetchone()
+
+
+IMAGE_ARTIFACTS_QUERY = f"SELECT {', '.join(IMAGE_ARTIFACT_COLUMNS)} FROM image_artifacts WHERE image_id = %s"
+def fetch_image_artifacts(image_id):
+    """Return the ``IMAGE_ARTIFACT_COLUMNS`` of a post, all ``None`` when it has none stored."""
+    conn = get_conn()
+    with conn.cursor() as cur:
+        cur.execute(IMAGE_ARTIFACTS_QUERY, (image_id,))
+        row = cur.fetchone()
+    return {column: (row or {}).get(column) for column in IMAGE_ARTIFACT_COLUMNS}
+
 
-    author = row.get("author")
+def save_image_artifacts(cur, image_id, artifacts):
+    """Insert or replace the artifacts given in ``artifacts`` inside the caller's transaction.
+
+    Artifact columns missing from ``artifacts`` keep their stored value.
+    """
+    columns = [column for column in IMAGE_ARTIFACT_COLUMNS if column in artifacts]
+    if not columns:
+        return
+    cur.execute(
+        f"""
+        INSERT INTO image_artifacts (image_id, {', '.join(columns)})
+        VALUES (%s, {', '.join(['%s'] * len(columns))})
+        ON CONFLICT (image_id)
+        DO UPDATE SET {', '.join(f'{column} = EXCLUDED.{column}' for column in columns)}
+        """,
+        (image_id, *(artifacts[column] for column in columns)),
+    )
+
+
+class ImageRecord(dict):
+    """An ``images`` row whose artifact columns are fetched from ``image_artifacts`` on first access."""
+
+    def __missing__(self, key):
+        if key not in IMAGE_ARTIFACT_COLUMNS:
+            raise KeyError(key)
+        self.update(fetch_image_artifacts(self["id"]))
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+def get_image_by_id(image_id):
+    """Return every ``images`` column of a post plus the author's ``user_image``.
+
+    Artifact columns are loaded lazily, so callers that never read them do not
+    pay for the blobs.
+    """
+    conn = get_conn()
+    cur = conn.cursor()
     cur.execute(
         """
-        SELECT display_image
-        FROM users
-        WHERE username = %s
+        SELECT i.*, u.display_image AS detail_user_image
+        FROM images i
+        LEFT JOIN users u ON u.username = i.author
+        WHERE i.id = %s
         """,
-        (author,),
+        (image_id,),
     )
-    user_row = cur.fetchone()
-    if user_row:
-        row["user_image"] = user_row["display_image"]
+    row = cur.fetchone()
+    if not row:
+        return None
 
-    return row
+    user_image = row.pop("detail_user_image", None)
+    if user_image is not None:
+        row["user_image"] = user_image
+    return ImageRecord(row)
 
 
 def fetch_options(table):
@@ -352,48 +609,148 @@ def fetch_options(table):
     return options
 
 
-def get_image_tables(image_id, keep_original=False, testing=False):
-    image = get_image_by_id(image_id)
-    if not image:
-        return "Image not found!, 404"
+def _equipment_union_sql():
+    selects = []
+    for position, table in enumerate(DB_TABLES):
+        query_table = "camera" if table == "guide_camera" else table
+        selects.append(
+            sql.SQL(
+                "SELECT {position} AS sort_key, to_jsonb(t) || jsonb_build_object('table', {label}::text) AS payload "
+                "FROM {table} t WHERE t.id = i.{column}"
+            ).format(
+                position=sql.Literal(position),
+                label=sql.Literal(table),
+                table=sql.Identifier(query_table),
+                column=sql.Identifier(f"{table}_id"),
+            )
+        )
+    return sql.SQL(" UNION ALL ").join(selects)
 
-    conn = get_conn()
-    equipment_list = []
-    for table in DB_TABLES:
-        if image[f"{table}_id"]:
-            equipment_id = image[f"{table}_id"]
-            cur = conn.cursor()
-            original_table = table
-            query_table = "camera" if table == "guide_camera" else table
-            cur.execute(
-                sql.SQL("SELECT * FROM {} WHERE id = %s").format(sql.Identifier(query_table)),
-                (equipment_id,),
+
+IMAGE_DETAIL_QUERY = sql.SQL(
+    """
+    SELECT
+        i.*,
+        u.id AS detail_user_id,
+        u.display_image AS detail_user_image,
+        COALESCE((
+            SELECT jsonb_agg(e.payload ORDER BY e.sort_key)
+            FROM ({equipment}) e
+        ), '[]'::jsonb) AS detail_equipment,
+        COALESCE((
+            SELECT jsonb_agg(to_jsonb(cd) ORDER BY cd.capture_date, cd.id)
+            FROM capture_dates cd
+            WHERE cd.image_id = i.id
+        ), '[]'::jsonb) AS detail_dates,
+        COALESCE((
+            SELECT jsonb_agg(
+                jsonb_build_object('light', to_jsonb(il), 'filter', to_jsonb(cf))
+                ORDER BY il.id
+            )
+            FROM image_lights il
+            LEFT JOIN LATERAL (
+                SELECT * FROM cam_filter WHERE name = il.cam_filter LIMIT 1
+            ) cf ON TRUE
+            WHERE il.image_id = i.id
+        ), '[]'::jsonb) AS detail_lights,
+        COALESCE((
+            SELECT jsonb_agg(
+                jsonb_build_object('software_id', isw.software_id, 'software', to_jsonb(s))
+                ORDER BY isw.id
             )
-            equipment = cur.fetchone()
-            if equipment:
-                equipment["table"] = original_table
-                equipment_list.append(equipment)
-            cur.close()
+            FROM image_software isw
+            LEFT JOIN software s ON s.id = isw.software_id
+            WHERE isw.image_id = i.id
+        ), '[]'::jsonb) AS detail_software,
+        COALESCE((
+            SELECT jsonb_agg(to_jsonb(m) - 'created_at' ORDER BY m.sort_order, m.id)
+            FROM related_image_media m
+            WHERE m.image_id = i.id
+        ), '[]'::jsonb) AS detail_related_media,
+        a.overlays_json,
+        a.meta_json,
+        a.guiding_plot_json,
+        a.calibration_plot_json
+    FROM images i
+    LEFT JOIN users u ON u.username = i.author
+    LEFT JOIN image_artifacts a ON a.image_id = i.id
+    WHERE i.id = ANY(%s)
+    """
+).format(equipment=_equipment_union_sql())
+
+# jsonb keeps 12.0 as 12, so FLOAT columns are coerced back to what a plain
+# SELECT * would have returned.
+CAPTURE_DATE_FLOAT_COLUMNS = ("moon_illumination", "mean_temperature", "mean_humidity", "mean_wind_speed")
+IMAGE_LIGHT_FLOAT_COLUMNS = ("temperature",)
+CAM_FILTER_FLOAT_COLUMNS = ("bandpass",)
+CAMERA_FLOAT_COLUMNS = (
+    "sensor_width",
+    "sensor_height",
+    "sensor_diagonal",
+    "pixel_size",
+    "well_capacity",
+    "read_noise",
+    "quantum_efficiency",
+)
+EQUIPMENT_FLOAT_COLUMNS = {
+    "camera": CAMERA_FLOAT_COLUMNS,
+    "guide_camera": CAMERA_FLOAT_COLUMNS,
+    "telescope": ("aperture", "focal_length", "f_ratio"),
+    "reducer": ("reduction_ratio",),
+    "mount": ("payload_capacity",),
+    "tripod": ("payload_capacity",),
+}
+
+
+def _restore_floats(row, columns):
+    for column in columns:
+        if row.get(column) is not None:
+            row[column] = float(row[column])
+    return row
+
+
+def fetch_image_detail_rows(image_ids):
+    """Return ``{image_id: row}`` with every detail relation aggregated into the row."""
+    if not image_ids:
+        return {}
 
+    conn = get_conn()
     cur = conn.cursor()
-    cur.execute(
-        "SELECT * FROM capture_dates WHERE image_id = %s ORDER BY capture_date",
-        (image_id,),
-    )
-    dates = cur.fetchall()
+    cur.execute(IMAGE_DETAIL_QUERY, (list(image_ids),))
+    rows = cur.fetchall()
+    cur.close()
+    return {row["id"]: row for row in rows}
 
-    if not keep_original:
-        for capture_date in dates:
-            capture_date["capture_date"] = capture_date["capture_date"].strftime("%d %B %Y")
+
+def build_image_tables(row, keep_original=False, testing=False):
+    # header_json is left out of the detail query; only the testing path reads it.
+    image = ImageRecord(row)
+    user_id = image.pop("detail_user_id", None)
+    user_image = image.pop("detail_user_image", None)
+    if user_id is not None:
+        image["user_image"] = user_image
+
+    equipment_list = [
+        _restore_floats(item, EQUIPMENT_FLOAT_COLUMNS.get(item.get("table"), ()))
+        for item in image.pop("detail_equipment", None) or []
+    ]
+
+    dates = [_restore_floats(d, CAPTURE_DATE_FLOAT_COLUMNS) for d in image.pop("detail_dates", None) or []]
+    for capture_date in dates:
+        value = date.fromisoformat(capture_date["capture_date"])
+        capture_date["capture_date"] = value if keep_original else value.strftime("%d %B %Y")
 
     meta_json = image.get("meta_json", "{}") or "{}"
     meta_json = json.loads(meta_json)
 
-    cur.execute("SELECT * FROM image_lights WHERE image_id = %s", (image_id,))
-    lights = cur.fetchall()
+    light_rows = image.pop("detail_lights", None) or []
+    lights = [_restore_floats(entry["light"], IMAGE_LIGHT_FLOAT_COLUMNS) for entry in light_rows]
+    for entry in light_rows:
+        if entry.get("filter"):
+            _restore_floats(entry["filter"], CAM_FILTER_FLOAT_COLUMNS)
     if not keep_original:
         weights = meta_json.get("variable", {})
-        for light in lights:
+        for light, entry in zip(lights, light_rows):
             light["temperature"] = f"{light['temperature']:.1f} °C"
             if "WBPP weight 1" in weights:
                 red = sum(map(float, weights.get("WBPP weight 1", [])))
@@ -406,41 +763,20 @@ def get_image_tables(image_id, keep_original=False, testing=False):
 
             light["total_time"] = print_time(light["light_count"] * light["exposure_time"])
             light["exposure_time"] = f"{light['exposure_time']:.0f} sec"
-            cur.execute("SELECT * FROM cam_filter WHERE name = %s", (light["cam_filter"],))
-            filter_row = cur.fetchone()
-            if filter_row:
-                light["filter_link"] = filter_row["link"]
-
-    cur.execute("SELECT * FROM image_software WHERE image_id = %s", (image_id,))
-    software = cur.fetchall()
+            if entry.get("filter"):
+                light["filter_link"] = entry["filter"]["link"]
 
+    software = image.pop("detail_software", None) or []
     if not keep_original:
-        software_list = []
-        for software_row in software:
-            cur.execute("SELECT * FROM software WHERE id = %s", (software_row["software_id"],))
-            soft = cur.fetchone()
-            if soft:
-                software_list.append(soft)
+        software_list = [entry["software"] for entry in software if entry.get("software")]
     else:
-        software_list = [software_row["software_id"] for software_row in software]
+        software_list = [entry["software_id"] for entry in software]
 
-    cur.execute(
-        """
-        SELECT id, image_id, media_path, caption, sort_order, created_at
-        FROM related_image_media
-        WHERE image_id = %s
-        ORDER BY sort_order ASC, id ASC
-        """,
-        (image_id,),
-    )
-    related_media = cur.fetchall()
+    related_media = image.pop("detail_related_media", None) or []
     for media in related_media:
-        media.pop("created_at", None)
         media["media_kind"] = _related_media_kind(media.get("media_path"))
         media["display_name"] = os.path.basename((media.get("media_path") or "").replace("\\", "/"))
 
-    cur.close()
-
     guiding_plot, calibration_plot, svg_image = "", "", ""
     if not keep_original:
         guiding_plot = deserialize_plot_payload(image.get("guiding_plot_json"), "Guiding")
@@ -449,7 +785,8 @@ def get_image_tables(image_id, keep_original=False, testing=False):
         if testing:
             if image["header_json"]:
                 svg_image = get_overlays(image["header_json"])
-        else:
+        elif image["overlays_json"]:
+            # Stays empty until the post's ingest job has drawn the overlays.
             svg_image = json.loads(image["overlays_json"])
 
     return (
@@ -464,3 +801,19 @@ def get_image_tables(image_id, keep_original=False, testing=False):
         meta_json,
         related_media,
     )
+
+
+def get_image_detail_bundles(image_ids, keep_original=False, testing=False):
+    """Return ``{image_id: detail tables}`` for several images from one query."""
+    rows = fetch_image_detail_rows(image_ids)
+    return {
+        image_id: build_image_tables(row, keep_original=keep_original, testing=testing)
+        for image_id, row in rows.items()
+    }
+
+
+def get_image_tables(image_id, keep_original=False, testing=False):
+    row = fetch_image_detail_rows([image_id]).get(image_id)
+    if not row:
+        return "Image not found!, 404"
+    return build_image_tables(row, keep_original=keep_original, testing=testing)
@@ -0,0 +1,38 @@
+from flask import current_app
+from flask.ctx import _AppCtxGlobals
+
+
+LAZY_GLOBALS_EXTENSION_KEY = "astrospace_lazy_globals"
+
+
+class LazyRequestGlobals(_AppCtxGlobals):
+    """``g`` that resolves registered attributes the first time they are read.
+
+    Requests that never touch ``g.user`` or ``g.web_info`` (uploads, static
+    assets, the favicon) therefore never open a database connection.
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__[name]
+        except KeyError:
+            pass
+
+        loader = current_app.extensions.get(LAZY_GLOBALS_EXTENSION_KEY, {}).get(name)
+        if loader is None:
+            raise AttributeError(name)
+
+        value = loader()
+        self.__dict__[name] = value
+        return value
+
+    def get(self, name, default=None):
+        if name in self.__dict__:
+            return self.__dict__[name]
+        if name in current_app.extensions.get(LAZY_GLOBALS_EXTENSION_KEY, {}):
+            return getattr(self, name)
+        return default
+
+
+def register_lazy_global(app, name, loader):
+    app.extensions.setdefault(LAZY_GLOBALS_EXTENSION_KEY, {})[name] = loader
@@ -0,0 +1,73 @@
+import hashlib
+
+from AstroSpace.utils.platesolve import OVERLAY_PIPELINE_VERSION, THUMBNAIL_PIPELINE_VERSION
+
+
+THUMBNAIL_ARTIFACT = "thumbnail"
+OVERLAYS_ARTIFACT = "overlays"
+PLATE_ARTIFACTS = (THUMBNAIL_ARTIFACT, OVERLAYS_ARTIFACT)
+FINGERPRINT_CHUNK_SIZE = 1024 * 1024
+
+
+def file_fingerprint(path):
+    """Return the SHA-256 of the file at ``path``."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(FINGERPRINT_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def header_fingerprint(header_json):
+    return hashlib.sha256((header_json or "").encode("utf-8")).hexdigest()
+
+
+def thumbnail_fingerprint(source_hash, thumbnail_path):
+    return {"source": source_hash, "path": thumbnail_path, "version": THUMBNAIL_PIPELINE_VERSION}
+
+
+def overlays_fingerprint(header_json):
+    return {"header": header_fingerprint(header_json), "version": OVERLAY_PIPELINE_VERSION}
+
+
+def thumbnail_is_fresh(fingerprints, source_hash, thumbnail_path, thumbnail_exists=True):
+    """The thumbnail is stale when the source image, its path or the pipeline changed, or the file is gone."""
+    return thumbnail_exists and (fingerprints or {}).get(THUMBNAIL_ARTIFACT) == thumbnail_fingerprint(
+        source_hash, thumbnail_path
+    )
+
+
+def overlays_are_fresh(fingerprints, header_json):
+    """The overlays are stale when the stored header or the overlay pipeline changed."""
+    return (fingerprints or {}).get(OVERLAYS_ARTIFACT) == overlays_fingerprint(header_json)
+
+
+def stale_plate_artifacts(fingerprints, source_hash, thumbnail_path, header_json, thumbnail_exists=True, force=False):
+    """Return the plate-solve artifacts (``PLATE_ARTIFACTS`` names) that need rebuilding.
+
+    Images without fingerprints are stale; ``force`` marks everything stale.
+    """
+    if force:
+        return list(PLATE_ARTIFACTS)
+    stale = []
+    if not thumbnail_is_fresh(fingerprints, source_hash, thumbnail_path, thumbnail_exists):
+        stale.append(THUMBNAIL_ARTIFACT)
+    if not overlays_are_fresh(fingerprints, header_json):
+        stale.append(OVERLAYS_ARTIFACT)
+    return stale
+
+
+def updated_fingerprints(fingerprints, rebuilt, source_hash, thumbnail_path, header_json):
+    """Return ``fingerprints`` with the entries of the ``rebuilt`` artifacts replaced."""
+    updated = dict(fingerprints or {})
+    if THUMBNAIL_ARTIFACT in rebuilt:
+        updated[THUMBNAIL_ARTIFACT] = thumbnail_fingerprint(source_hash, thumbnail_path)
+    if OVERLAYS_ARTIFACT in rebuilt:
+        updated[OVERLAYS_ARTIFACT] = overlays_fingerprint(header_json)
+    return updated
+
+
+def fetch_artifact_fingerprints(cur, image_id):
+    cur.execute("SELECT artifact_fingerprints FROM image_artifacts WHERE image_id = %s", (image_id,))
+    row = cur.fetchone()
+    return (row or {}).get("artifact_fingerprints") or {}
@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from flask import current_app
+
+
+PROCESS_CACHE_EXTENSION_KEY = "astrospace_process_cache"
+
+
+@dataclass
+class CacheEntry:
+    value: object
+    version: int
+    expires_at: float
+
+
+class ProcessCache:
+    """Per-process LRU cache whose entries are revalidated against ``cache_versions``.
+
+    A fresh entry is served without touching the database. Once its TTL runs
+    out, a single version lookup decides whether the cached value is still
+    current, so other workers pick up a bumped version within one TTL.
+    """
+
+    def __init__(self, max_entries=1024):
+        self._entries = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, ttl, load, current_version):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if ttl > 0 and entry is not None and now < entry.expires_at:
+            self.hits += 1
+            return entry.value
+
+        version = current_version()
+        if ttl > 0 and entry is not None and entry.version == version:
+            entry.expires_at = now + ttl
+            self.hits += 1
+            return entry.value
+
+        self.misses += 1
+        value = load()
+        with self._lock:
+            self._entries[key] = CacheEntry(value=value, version=version, expires_at=now + ttl)
+            self._entries.move_to_end(key)
+            while self._max_entries and len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def get_process_cache(app=None):
+    app = app or current_app
+    cache = app.extensions.get(PROCESS_CACHE_EXTENSION_KEY)
+    if cache is None:
+        cache = app.extensions.setdefault(
+            PROCESS_CACHE_EXTENSION_KEY,
+            ProcessCache(max_entries=int(app.config.get("PROCESS_CACHE_MAX_ENTRIES", 1024))),
+        )
+    return cache
+
+
+def fetch_cache_version(conn, name):
+    with conn.cursor() as cur:
+        cur.execute("SELECT version FROM cache_versions WHERE name = %s", (name,))
+        row = cur.fetchone()
+    return int(row["version"]) if row else 0
+
+
+def bump_cache_version(cur, name):
+    cur.execute(
+        """
+        INSERT INTO cache_versions (name, version, updated_at)
+        VALUES (%s, 1, CURRENT_TIMESTAMP)
+        ON CONFLICT (name)
+        DO UPDATE SET
+            version = cache_versions.version + 1,
+            updated_at = CURRENT_TIMESTAMP
+        """,
+        (name,),
+    )
@@ -2,8 +2,16 @@ from datetime import date
 import math
 from urllib.parse import urlencode
 
+from flask import current_app
+
+from AstroSpace.db import get_conn
+from AstroSpace.repositories.images import load_collection_filter_metadata
+from AstroSpace.services.cache import fetch_cache_version, get_process_cache
+from AstroSpace.services.cursors import decode_keyset_cursor, encode_keyset_cursor
+
 
 PYTHON_UNIX_EPOCH_ORDINAL = 719163
+COLLECTION_FILTERS_CACHE_NAME = "collection_filters"
 
 COLLECTION_SELECT_FIELDS = (
     ("telescope_type", "Telescope Type"),
@@ -81,6 +89,24 @@ def _date_from_ordinal(value):
     return date.fromordinal(value)
 
 
+def get_collection_filter_metadata():
+    return get_process_cache().get(
+        COLLECTION_FILTERS_CACHE_NAME,
+        float(current_app.config.get("COLLECTION_FILTERS_CACHE_TTL", 60)),
+        load_collection_filter_metadata,
+        lambda: fetch_cache_version(get_conn(), COLLECTION_FILTERS_CACHE_NAME),
+    )
+
+
+def forget_collection_filter_metadata():
+    get_process_cache().invalidate(COLLECTION_FILTERS_CACHE_NAME)
+
+
+# Collection pages are keyed on ``(created_at, id)``.
+encode_collection_cursor = encode_keyset_cursor
+decode_collection_cursor = decode_keyset_cursor
+
+
 def normalize_collection_filters(raw_args, metadata):
     dropdowns = metadata.get("dropdowns", {})
     ranges = metadata.get("ranges", {})
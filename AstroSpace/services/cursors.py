@@ -0,0 +1,20 @@
+import base64
+import binascii
+from datetime import datetime
+
+
+def encode_keyset_cursor(after):
+    """Encode a ``(timestamp, id)`` keyset as an opaque URL-safe token."""
+    timestamp, row_id = after
+    token = f"{timestamp.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(token).decode("ascii").rstrip("=")
+
+
+def decode_keyset_cursor(token):
+    """Return the ``(timestamp, id)`` keyset encoded in ``token``, or ``None`` if it is malformed."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        timestamp, row_id = base64.urlsafe_b64decode(padded).decode("utf-8").split("|")
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
@@ -5,8 +5,11 @@ from dataclasses import dataclass
 from hashlib import sha256
 
 from flask import current_app, request
+from psycopg2 import sql
 
 from AstroSpace.db import get_conn
+from AstroSpace.services.rate_limit import TokenBucketLimiter, get_app_limiter
+from AstroSpace.services.view_buffer import build_view_entry, get_view_buffer, write_view_batch
 from AstroSpace.services.cookies import (
     COMMENTER_COOKIE_MAX_AGE,
     COMMENTER_NAME_COOKIE_NAME,
@@ -24,7 +27,12 @@ COMMENT_BURST_LIMIT = 5
 COMMENT_BURST_WINDOW_MINUTES = 15
 COMMENT_TEXT_LIMIT = 1500
 COMMENT_NAME_LIMIT = 40
-COMMENT_THREAD_LIMIT = 100
+COMMENT_INLINE_LIMIT = 3
+COMMENT_PAGE_SIZE = 20
+COMMENT_PAGE_SIZE_LIMIT = 50
+COMMENT_COOLDOWN_MESSAGE = f"Please wait {COMMENT_COOLDOWN_SECONDS} seconds before posting another comment."
+COMMENT_BURST_MESSAGE = "You have reached the temporary comment limit. Please try again in a few minutes."
+ENGAGEMENT_COUNTER_COLUMNS = {"like_count", "comment_count"}
 
 
 class EngagementError(ValueError):
@@ -164,92 +172,148 @@ def commenter_name_from_request(request_like=None):
     return (request_like.cookies.get(COMMENTER_NAME_COOKIE_NAME) or "").strip()
 
 
-def record_image_view(image_id, visitor_identity):
-    conn = get_conn()
-    with conn.cursor() as cur:
-        cur.execute(
+def _adjust_counter(cur, image_id, column, delta):
+    if column not in ENGAGEMENT_COUNTER_COLUMNS:
+        raise ValueError(f"Unsupported engagement counter: {column}")
+
+    cur.execute(
+        sql.SQL(
             """
-            INSERT INTO image_views (
-                image_id,
-                user_id,
-                visitor_hash,
-                visitor_source,
-                ip_hash,
-                user_agent_hash,
-                visitor_cookie_hash,
-                viewed_at,
-                last_seen_at
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-            ON CONFLICT (image_id, visitor_hash)
+            INSERT INTO image_counters (image_id, {column}, updated_at)
+            VALUES (%s, GREATEST(%s, 0), CURRENT_TIMESTAMP)
+            ON CONFLICT (image_id)
             DO UPDATE SET
-                last_seen_at = CURRENT_TIMESTAMP,
-                visitor_source = EXCLUDED.visitor_source,
-                ip_hash = COALESCE(EXCLUDED.ip_hash, image_views.ip_hash),
-                user_agent_hash = COALESCE(EXCLUDED.user_agent_hash, image_views.user_agent_hash),
-                visitor_cookie_hash = COALESCE(EXCLUDED.visitor_cookie_hash, image_views.visitor_cookie_hash)
-            """,
-            (
-                image_id,
-                visitor_identity.visitor_hash,
-                visitor_identity.visitor_hash,
-                visitor_identity.visitor_source,
-                visitor_identity.ip_hash,
-                visitor_identity.user_agent_hash,
-                visitor_identity.visitor_cookie_hash,
-            ),
-        )
-    conn.commit()
+                {column} = GREATEST(image_counters.{column} + %s, 0),
+                updated_at = CURRENT_TIMESTAMP
+            """
+        ).format(column=sql.Identifier(column)),
+        (image_id, delta, delta),
+    )
+
+
+def record_image_view(image_id, visitor_identity):
+    if current_app.config.get("VIEW_BUFFER_ENABLED", True):
+        # Buffered views are written in the background; the request never waits.
+        get_view_buffer().record(image_id, visitor_identity)
+        return
+
+    write_view_batch(get_conn(), [build_view_entry(image_id, visitor_identity)])
 
 
 def fetch_image_engagement_state(image_id, visitor_identity, include_comments=True):
+    states = fetch_image_engagement_states([image_id], visitor_identity, include_comments=include_comments)
+    return states[image_id]
+
+
+def fetch_image_engagement_states(image_ids, visitor_identity, include_comments=True):
+    """Return ``{image_id: state}`` for every id using one summary and one comment query.
+
+    Counts come from ``image_counters``; see ``reconcile_engagement_counters``.
+    Only the first ``COMMENT_INLINE_LIMIT`` comments of each thread are loaded;
+    ``comments_after`` is the keyset to continue from with
+    ``fetch_image_comments_page`` when the thread has more.
+    """
+    image_ids = list(dict.fromkeys(image_ids))
+    if not image_ids:
+        return {}
+
     conn = get_conn()
     with conn.cursor() as cur:
         cur.execute(
             """
             SELECT
-                (SELECT COUNT(*) FROM image_views WHERE image_id = %s) AS view_count,
-                (SELECT COUNT(*) FROM image_likes WHERE image_id = %s) AS like_count,
-                (SELECT COUNT(*) FROM image_comments WHERE image_id = %s AND status = 'published') AS comment_count,
+                ids.image_id,
+                counters.view_count,
+                counters.like_count,
+                counters.comment_count,
                 EXISTS(
                     SELECT 1
-                    FROM image_likes
-                    WHERE image_id = %s
-                      AND visitor_hash = %s
+                    FROM image_likes l
+                    WHERE l.image_id = ids.image_id
+                      AND l.visitor_hash = %s
                 ) AS liked
+            FROM unnest(%s::int[]) AS ids(image_id)
+            LEFT JOIN image_counters counters ON counters.image_id = ids.image_id
             """,
-            (
-                image_id,
-                image_id,
-                image_id,
-                image_id,
-                visitor_identity.visitor_hash,
-            ),
+            (visitor_identity.visitor_hash, image_ids),
         )
-        summary = cur.fetchone() or {}
+        summaries = {row["image_id"]: row for row in cur.fetchall()}
 
-        comments = []
+        comments_by_image = {image_id: [] for image_id in image_ids}
         if include_comments:
             cur.execute(
                 """
-                SELECT id, commented_by, comment, commented_at
-                FROM image_comments
-                WHERE image_id = %s
-                  AND status = 'published'
-                ORDER BY commented_at ASC
-                LIMIT %s
+                SELECT image_id, id, commented_by, comment, commented_at
+                FROM (
+                    SELECT
+                        image_id,
+                        id,
+                        commented_by,
+                        comment,
+                        commented_at,
+                        ROW_NUMBER() OVER (PARTITION BY image_id ORDER BY commented_at ASC, id ASC) AS thread_position
+                    FROM image_comments
+                    WHERE image_id = ANY(%s)
+                      AND status = 'published'
+                ) threads
+                WHERE thread_position <= %s
+                ORDER BY image_id, commented_at ASC, id ASC
                 """,
-                (image_id, COMMENT_THREAD_LIMIT),
+                # One extra row per thread tells us whether there is more to fetch.
+                (image_ids, COMMENT_INLINE_LIMIT + 1),
             )
-            comments = cur.fetchall()
+            for comment in cur.fetchall():
+                comments_by_image[comment.pop("image_id")].append(comment)
+
+    states = {}
+    for image_id in image_ids:
+        summary = summaries.get(image_id) or {}
+        comments = comments_by_image[image_id]
+        comments_after = None
+        if len(comments) > COMMENT_INLINE_LIMIT:
+            comments = comments[:COMMENT_INLINE_LIMIT]
+            comments_after = (comments[-1]["commented_at"], comments[-1]["id"])
+        states[image_id] = {
+            "view_count": int(summary.get("view_count") or 0),
+            "like_count": int(summary.get("like_count") or 0),
+            "comment_count": int(summary.get("comment_count") or 0),
+            "liked": bool(summary.get("liked")),
+            "comments": comments,
+            "comments_after": comments_after,
+        }
+    return states
+
+
+def fetch_image_comments_page(image_id, after=None, limit=COMMENT_PAGE_SIZE):
+    """Return ``(comments, next_after)`` for the published comments after the ``(commented_at, id)`` keyset."""
+    params = [image_id]
+    keyset_clause = ""
+    if after is not None:
+        keyset_clause = "AND (commented_at, id) > (%s, %s)"
+        params.extend(after)
+    params.append(limit + 1)
 
-    return {
-        "view_count": int(summary.get("view_count") or 0),
-        "like_count": int(summary.get("like_count") or 0),
-        "comment_count": int(summary.get("comment_count") or 0),
-        "liked": bool(summary.get("liked")),
-        "comments": comments,
-    }
+    conn = get_conn()
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT id, commented_by, comment, commented_at
+            FROM image_comments
+            WHERE image_id = %s
+              AND status = 'published'
+              {keyset_clause}
+            ORDER BY commented_at ASC, id ASC
+            LIMIT %s
+            """,
+            tuple(params),
+        )
+        comments = cur.fetchall()
+
+    next_after = None
+    if len(comments) > limit:
+        comments = comments[:limit]
+        next_after = (comments[-1]["commented_at"], comments[-1]["id"])
+    return comments, next_after
 
 
 def like_image(image_id, visitor_identity):
@@ -294,82 +358,153 @@ def like_image(image_id, visitor_identity):
                 ),
             )
             liked = cur.fetchone() is not None
+        if removed or liked:
+            _adjust_counter(cur, image_id, "like_count", -1 if removed else 1)
     conn.commit()
     return liked
 
 
+def _comment_limiter():
+    if not current_app.config.get("COMMENT_TOKEN_BUCKET_ENABLED", True):
+        return None
+    return get_app_limiter(
+        "comments",
+        lambda: TokenBucketLimiter(
+            capacity=COMMENT_BURST_LIMIT,
+            window_seconds=COMMENT_BURST_WINDOW_MINUTES * 60,
+            cooldown_seconds=COMMENT_COOLDOWN_SECONDS,
+            max_keys=int(current_app.config.get("COMMENT_TOKEN_BUCKET_MAX_KEYS", 10000)),
+        ),
+    )
+
+
+def _comment_rate_limit_error(reason):
+    if reason == "cooldown":
+        return CommentRateLimitError(COMMENT_COOLDOWN_MESSAGE)
+    return CommentRateLimitError(COMMENT_BURST_MESSAGE)
+
+
 def submit_image_comment(image_id, visitor_identity, display_name, comment):
+    """Insert a published comment unless the visitor is cooling down or over the burst limit.
+
+    The cooldown check, burst check, insert and counter bump run as one
+    statement; ``ix_image_comments_visitor_hash_commented_at`` serves the checks.
+    """
+    limiter = _comment_limiter()
+    if limiter is not None:
+        rejected = limiter.acquire(visitor_identity.visitor_hash)
+        if rejected:
+            raise _comment_rate_limit_error(rejected)
+
     conn = get_conn()
     with conn.cursor() as cur:
         cur.execute(
             """
-            SELECT commented_at
-            FROM image_comments
-            WHERE visitor_hash = %s
-            ORDER BY commented_at DESC
-            LIMIT 1
-            """,
-            (visitor_identity.visitor_hash,),
-        )
-        last_comment = cur.fetchone()
-        if last_comment:
-            cur.execute(
-                """
-                SELECT EXTRACT(EPOCH FROM (CURRENT_TIMESTAMP - %s)) AS elapsed_seconds
-                """,
-                (last_comment["commented_at"],),
-            )
-            elapsed_row = cur.fetchone() or {}
-            if (elapsed_row.get("elapsed_seconds") or 0) < COMMENT_COOLDOWN_SECONDS:
-                raise CommentRateLimitError(
-                    f"Please wait {COMMENT_COOLDOWN_SECONDS} seconds before posting another comment."
+            WITH recent AS (
+                SELECT
+                    COALESCE(
+                        BOOL_OR(commented_at > CURRENT_TIMESTAMP - make_interval(secs => %(cooldown)s)),
+                        FALSE
+                    ) AS cooling_down,
+                    COUNT(*) FILTER (
+                        WHERE commented_at >= CURRENT_TIMESTAMP - make_interval(mins => %(burst_minutes)s)
+                    ) AS burst_count
+                FROM image_comments
+                WHERE visitor_hash = %(visitor_hash)s
+                  AND commented_at >= CURRENT_TIMESTAMP - GREATEST(
+                      make_interval(secs => %(cooldown)s),
+                      make_interval(mins => %(burst_minutes)s)
+                  )
+            ),
+            inserted AS (
+                INSERT INTO image_comments (
+                    image_id,
+                    ip_address,
+                    comment,
+                    commented_at,
+                    commented_by,
+                    visitor_hash,
+                    visitor_source,
+                    ip_hash,
+                    user_agent_hash,
+                    visitor_cookie_hash,
+                    status
                 )
-
-        cur.execute(
-            f"""
-            SELECT COUNT(*) AS burst_count
-            FROM image_comments
-            WHERE visitor_hash = %s
-              AND commented_at >= (CURRENT_TIMESTAMP - INTERVAL '{COMMENT_BURST_WINDOW_MINUTES} minutes')
+                SELECT
+                    %(image_id)s,
+                    %(ip_hash)s,
+                    %(comment)s,
+                    CURRENT_TIMESTAMP,
+                    %(display_name)s,
+                    %(visitor_hash)s,
+                    %(visitor_source)s,
+                    %(ip_hash)s,
+                    %(user_agent_hash)s,
+                    %(visitor_cookie_hash)s,
+                    'published'
+                FROM recent
+                WHERE NOT recent.cooling_down AND recent.burst_count < %(burst_limit)s
+                RETURNING id, image_id, commented_at
+            ),
+            counted AS (
+                INSERT INTO image_counters (image_id, comment_count, updated_at)
+                SELECT image_id, 1, CURRENT_TIMESTAMP FROM inserted
+                ON CONFLICT (image_id)
+                DO UPDATE SET
+                    comment_count = image_counters.comment_count + 1,
+                    updated_at = CURRENT_TIMESTAMP
+            )
+            SELECT inserted.id, inserted.commented_at, recent.cooling_down, recent.burst_count
+            FROM recent
+            LEFT JOIN inserted ON TRUE
             """,
-            (visitor_identity.visitor_hash,),
+            {
+                "image_id": image_id,
+                "comment": comment,
+                "display_name": display_name,
+                "visitor_hash": visitor_identity.visitor_hash,
+                "visitor_source": visitor_identity.visitor_source,
+                "ip_hash": visitor_identity.ip_hash,
+                "user_agent_hash": visitor_identity.user_agent_hash,
+                "visitor_cookie_hash": visitor_identity.visitor_cookie_hash,
+                "cooldown": COMMENT_COOLDOWN_SECONDS,
+                "burst_minutes": COMMENT_BURST_WINDOW_MINUTES,
+                "burst_limit": COMMENT_BURST_LIMIT,
+            },
         )
-        burst_row = cur.fetchone() or {}
-        if int(burst_row.get("burst_count") or 0) >= COMMENT_BURST_LIMIT:
-            raise CommentRateLimitError(
-                "You have reached the temporary comment limit. Please try again in a few minutes."
-            )
+        row = cur.fetchone()
+    if row["id"] is None:
+        raise _comment_rate_limit_error("cooldown" if row["cooling_down"] else "burst")
+    conn.commit()
+    return {"id": row["id"], "commented_at": row["commented_at"]}
+
 
+def reconcile_engagement_counters(conn):
+    """Recompute like and comment counters and return how many rows changed.
+
+    ``view_count`` is not touched: it is the estimate of the lifetime visitor
+    sketch, which is written together with the count.
+    """
+    with conn.cursor() as cur:
         cur.execute(
             """
-            INSERT INTO image_comments (
-                image_id,
-                ip_address,
-                comment,
-                commented_at,
-                commented_by,
-                visitor_hash,
-                visitor_source,
-                ip_hash,
-                user_agent_hash,
-                visitor_cookie_hash,
-                status
-            )
-            VALUES (%s, %s, %s, CURRENT_TIMESTAMP, %s, %s, %s, %s, %s, %s, 'published')
-            RETURNING id, commented_at
-            """,
-            (
-                image_id,
-                visitor_identity.ip_hash,
-                comment,
-                display_name,
-                visitor_identity.visitor_hash,
-                visitor_identity.visitor_source,
-                visitor_identity.ip_hash,
-                visitor_identity.user_agent_hash,
-                visitor_identity.visitor_cookie_hash,
-            ),
+            INSERT INTO image_counters (image_id, like_count, comment_count, updated_at)
+            SELECT
+                i.id,
+                (SELECT COUNT(*) FROM image_likes l WHERE l.image_id = i.id),
+                (SELECT COUNT(*) FROM image_comments c WHERE c.image_id = i.id AND c.status = 'published'),
+                CURRENT_TIMESTAMP
+            FROM images i
+            ON CONFLICT (image_id)
+            DO UPDATE SET
+                like_count = EXCLUDED.like_count,
+                comment_count = EXCLUDED.comment_count,
+                updated_at = EXCLUDED.updated_at
+            WHERE (image_counters.like_count, image_counters.comment_count)
+                IS DISTINCT FROM (EXCLUDED.like_count, EXCLUDED.comment_count)
+            RETURNING image_id
+            """
         )
-        inserted = cur.fetchone()
+        corrected = len(cur.fetchall())
     conn.commit()
-    return inserted
+    return corrected
@@ -0,0 +1,72 @@
+import math
+import zlib
+from hashlib import blake2b
+
+
+HLL_PRECISION = 11
+HLL_HASH_BITS = 64
+
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch with ``2 ** precision`` one-byte registers.
+
+    The standard error is about ``1.04 / sqrt(2 ** precision)`` (2.3% at the
+    default precision); small sets fall back to linear counting and are close
+    to exact. Sketches merge by taking the register-wise maximum, so folding
+    the same visitor in twice never changes the estimate.
+    """
+
+    def __init__(self, precision=HLL_PRECISION, registers=None):
+        if not 4 <= precision <= 16:
+            raise ValueError(f"Unsupported HyperLogLog precision: {precision}")
+        self.precision = precision
+        size = 1 << precision
+        if registers is None:
+            registers = bytearray(size)
+        elif len(registers) != size:
+            raise ValueError("HyperLogLog register count does not match its precision.")
+        self.registers = bytearray(registers)
+
+    def add(self, value):
+        hashed = int.from_bytes(blake2b(str(value).encode("utf-8"), digest_size=8).digest(), "big")
+        remaining_bits = HLL_HASH_BITS - self.precision
+        index = hashed >> remaining_bits
+        remainder = hashed & ((1 << remaining_bits) - 1)
+        rank = remaining_bits - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            return True
+        return False
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+        return self
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precisions.")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def estimate(self):
+        size = len(self.registers)
+        zeros = self.registers.count(0)
+        if zeros == size:
+            return 0
+
+        alpha = 0.7213 / (1 + 1.079 / size)
+        raw = alpha * size * size / sum(2.0 ** -register for register in self.registers)
+        if raw <= 2.5 * size and zeros:
+            return int(round(size * math.log(size / zeros)))
+        return int(round(raw))
+
+    def to_bytes(self):
+        return bytes([self.precision]) + zlib.compress(bytes(self.registers))
+
+    @classmethod
+    def from_bytes(cls, data, precision=HLL_PRECISION):
+        if not data:
+            return cls(precision)
+        data = bytes(data)
+        return cls(data[0], zlib.decompress(data[1:]))
@@ -0,0 +1,216 @@
+import json
+import logging
+import os
+
+from astroquery.simbad import Simbad
+from flask import g, has_request_context
+from psycopg2.extras import Json
+from werkzeug.datastructures import FileStorage
+
+from AstroSpace.logging_utils import debug_log
+from AstroSpace.repositories.images import fetch_image_artifacts, save_image_artifacts
+from AstroSpace.services.artifact_fingerprints import (
+    OVERLAYS_ARTIFACT,
+    THUMBNAIL_ARTIFACT,
+    fetch_artifact_fingerprints,
+    file_fingerprint,
+    overlays_are_fresh,
+    thumbnail_is_fresh,
+    updated_fingerprints,
+)
+from AstroSpace.services.cache import bump_cache_version
+from AstroSpace.services.collection_filters import COLLECTION_FILTERS_CACHE_NAME
+from AstroSpace.services.jobs import JOB_SUCCEEDED, enqueue_job, run_job_now
+from AstroSpace.services.sky_positions import SKY_POSITION_COLUMNS, sky_position_from_header, sky_position_values
+from AstroSpace.utils.phd2logparser import build_plotly_payloads
+from AstroSpace.utils.platesolve import get_overlays, platesolve
+from AstroSpace.utils.simbad_cache import get_simbad_cache
+from AstroSpace.utils.utils import slugify
+
+
+INGEST_JOB_KIND = "ingest_post"
+
+
+def resolve_object_name(title):
+    """Return SIMBAD's main identifier and object type for ``title``, or ``(title, "Unknown")``.
+
+    Name lookups are not cached, so SIMBAD offline mode leaves the title unresolved.
+    """
+    if get_simbad_cache().offline:
+        debug_log("SIMBAD offline mode; leaving title=%s unresolved", title)
+        return title, "Unknown"
+
+    Simbad.reset_votable_fields()
+    Simbad.add_votable_fields("otype_txt")
+
+    debug_log("Querying SIMBAD for title=%s", title)
+    query = Simbad.query_object(title)
+    if query and len(query) > 0:
+        resolved = query[0]["main_id"].replace("NAME", "").strip()
+        debug_log("SIMBAD resolved title=%s object_type=%s", resolved, query[0]["otype_txt"])
+        return resolved, query[0]["otype_txt"]
+    debug_log("SIMBAD returned no result for title=%s", title)
+    return title, "Unknown"
+
+
+def build_ingest_payload(
+    user_id, title, image_path=None, fits_path=None, regenerate_overlays=False, guide_logs=None, force=False
+):
+    """Describe the slow part of a post save for ``run_ingest_job``.
+
+    ``image_path`` (absolute) asks for a plate solve, optionally from the header
+    stored at ``fits_path``; a plate solve also checks the overlays. The
+    thumbnail and overlays are only regenerated when their fingerprints are
+    stale, or always with ``force``. ``guide_logs`` is the comma-separated list
+    of absolute PHD2 log paths.
+    """
+    return {
+        "user_id": str(user_id),
+        "title": title,
+        "plate_solve": {"image_path": image_path, "fits_path": fits_path} if image_path else None,
+        "regenerate_overlays": bool(regenerate_overlays or image_path),
+        "guide_logs": guide_logs or None,
+        "force": bool(force),
+    }
+
+
+def _open_stored_header(fits_path):
+    if not fits_path or not os.path.exists(fits_path):
+        return None
+    # platesolve() expects an uploaded file: a name to pick the parser and a readable stream.
+    return FileStorage(stream=open(fits_path, "rb"), filename=os.path.basename(fits_path))
+
+
+def discard_staged_header(payload):
+    """Delete the header staged for ``payload``'s plate solve; nothing else references it."""
+    remove_staged_header((payload.get("plate_solve") or {}).get("fits_path"))
+
+
+def remove_staged_header(fits_path):
+    """Delete a staged header file, if there is one."""
+    if not fits_path:
+        return
+    try:
+        os.remove(fits_path)
+    except FileNotFoundError:
+        pass
+    except OSError:
+        debug_log("Could not delete staged header %s", fits_path, level=logging.WARNING)
+
+
+def _post_exists(cur, image_id):
+    cur.execute("SELECT id FROM images WHERE id = %s FOR UPDATE", (image_id,))
+    return cur.fetchone() is not None
+
+
+def run_ingest_job(conn, job):
+    """Resolve the title, plate solve, draw overlays and parse guide logs for one saved post.
+
+    All network and CPU work happens before the first write, so the post row
+    is only locked for the final updates. The staged header is deleted once
+    the job succeeds or its last attempt fails.
+    """
+    try:
+        result = _run_ingest(conn, job)
+    except Exception:
+        if job["attempts"] >= job["max_attempts"]:
+            discard_staged_header(job["payload"])
+        raise
+    discard_staged_header(job["payload"])
+    return result
+
+
+def _run_ingest(conn, job):
+    payload = job["payload"]
+    image_id = job["image_id"]
+    if not has_request_context():
+        # The Astrometry.net fallback in platesolve() reads the owner's key through g.user_secrets.
+        g.user = {"id": int(payload["user_id"])}
+
+    image_updates = {}
+    artifacts = {}
+    steps = []
+
+    title, object_type = resolve_object_name(payload["title"])
+    image_updates.update(title=title, slug=slugify(title), object_type=object_type)
+    steps.append("title")
+
+    force = payload.get("force", False)
+    plate = payload.get("plate_solve")
+    fingerprints = {}
+    if plate or payload.get("regenerate_overlays"):
+        with conn.cursor() as cur:
+            fingerprints = fetch_artifact_fingerprints(cur, image_id)
+    rebuilt = []
+    up_to_date = []
+    header_json = source_hash = thumbnail_path = None
+
+    if plate:
+        image_path = plate["image_path"]
+        source_hash = file_fingerprint(image_path)
+        thumbnail_file = os.path.splitext(image_path)[0] + "_thumbnail.jpg"
+        expected_thumbnail = f"{payload['user_id']}/{os.path.basename(thumbnail_file)}"
+        make_thumbnail = force or not thumbnail_is_fresh(
+            fingerprints, source_hash, expected_thumbnail, os.path.exists(thumbnail_file)
+        )
+        fits_file = _open_stored_header(plate.get("fits_path"))
+        try:
+            header_json, thumbnail_path, pixel_scale = platesolve(
+                image_path, payload["user_id"], fits_file, make_thumbnail=make_thumbnail
+            )
+        finally:
+            if fits_file is not None:
+                fits_file.close()
+        image_updates.update(image_thumbnail=thumbnail_path, pixel_scale=pixel_scale)
+        image_updates.update(zip(SKY_POSITION_COLUMNS, sky_position_values(sky_position_from_header(header_json))))
+        artifacts["header_json"] = header_json
+        (rebuilt if make_thumbnail else up_to_date).append(THUMBNAIL_ARTIFACT)
+        steps.append("plate_solve")
+
+    if plate or payload.get("regenerate_overlays"):
+        if header_json is None:
+            header_json = fetch_image_artifacts(image_id)["header_json"]
+        if force or not overlays_are_fresh(fingerprints, header_json):
+            artifacts["overlays_json"] = json.dumps(get_overlays(header_json))
+            rebuilt.append(OVERLAYS_ARTIFACT)
+            steps.append("overlays")
+        else:
+            debug_log("Overlays of post %s are up to date; skipping SIMBAD.", image_id)
+            up_to_date.append(OVERLAYS_ARTIFACT)
+
+    if rebuilt:
+        artifacts["artifact_fingerprints"] = Json(
+            updated_fingerprints(fingerprints, rebuilt, source_hash, thumbnail_path, header_json)
+        )
+
+    if payload.get("guide_logs"):
+        guiding_plot, calibration_plot = build_plotly_payloads(payload["guide_logs"])
+        artifacts["guiding_plot_json"] = Json(guiding_plot)
+        artifacts["calibration_plot_json"] = Json(calibration_plot)
+        steps.append("guiding")
+
+    with conn.cursor() as cur:
+        if not _post_exists(cur, image_id):
+            debug_log("Post %s was deleted before its ingest job ran.", image_id, level=logging.WARNING)
+            return {"skipped": "post deleted"}
+
+        cur.execute(
+            f"UPDATE images SET {', '.join(f'{column} = %s' for column in image_updates)} WHERE id = %s",
+            (*image_updates.values(), image_id),
+        )
+        if artifacts:
+            save_image_artifacts(cur, image_id, artifacts)
+        bump_cache_version(cur, COLLECTION_FILTERS_CACHE_NAME)
+    result = {"steps": steps, "title": title}
+    if up_to_date:
+        result["up_to_date"] = up_to_date
+    return result
+
+
+def queue_post_ingest(cur, image_id, payload, max_attempts):
+    return enqueue_job(cur, INGEST_JOB_KIND, payload, image_id=image_id, max_attempts=max_attempts)
+
+
+def run_post_ingest_now(conn, job_id):
+    """Run a just-committed ingest job in this request; ``False`` when it failed or a worker claimed it first."""
+    return run_job_now(conn, job_id, {INGEST_JOB_KIND: run_ingest_job}) == JOB_SUCCEEDED
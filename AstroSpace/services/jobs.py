@@ -0,0 +1,349 @@
+import logging
+import os
+import select
+import signal
+import socket
+import time
+
+from psycopg2.extras import Json
+
+from AstroSpace.db import get_conn
+from AstroSpace.logging_utils import debug_log
+
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+ACTIVE_JOB_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+JOB_NOTIFY_CHANNEL = "astrospace_jobs"
+JOB_ERROR_MAX_LENGTH = 2000
+
+logger = logging.getLogger("AstroSpace.jobs")
+
+CLAIMED_JOB_COLUMNS = "id, kind, payload, image_id, attempts, max_attempts, progress, checkpoint"
+
+CLAIM_JOB_QUERY = f"""
+    UPDATE jobs
+    SET status = 'running',
+        attempts = attempts + 1,
+        locked_by = %(worker)s,
+        locked_at = CURRENT_TIMESTAMP,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = (
+        SELECT id
+        FROM jobs
+        WHERE status = 'queued' AND run_after <= CURRENT_TIMESTAMP AND kind = ANY(%(kinds)s)
+        ORDER BY run_after, id
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING {CLAIMED_JOB_COLUMNS}
+"""
+
+CLAIM_JOB_BY_ID_QUERY = f"""
+    UPDATE jobs
+    SET status = 'running',
+        attempts = attempts + 1,
+        locked_by = %(worker)s,
+        locked_at = CURRENT_TIMESTAMP,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = %(job_id)s AND status = 'queued'
+    RETURNING {CLAIMED_JOB_COLUMNS}
+"""
+
+FINISH_JOB_QUERY = """
+    UPDATE jobs
+    SET status = 'succeeded', result = %s, error = NULL, locked_by = NULL, locked_at = NULL,
+        updated_at = CURRENT_TIMESTAMP, finished_at = CURRENT_TIMESTAMP
+    WHERE id = %s
+"""
+
+FAIL_JOB_QUERY = """
+    UPDATE jobs
+    SET status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END,
+        run_after = CURRENT_TIMESTAMP + make_interval(secs => %s * attempts),
+        error = %s,
+        locked_by = NULL,
+        locked_at = NULL,
+        updated_at = CURRENT_TIMESTAMP,
+        finished_at = CASE WHEN attempts < max_attempts THEN NULL ELSE CURRENT_TIMESTAMP END
+    WHERE id = %s
+    RETURNING status
+"""
+
+CANCEL_JOB_QUERY = """
+    UPDATE jobs
+    SET status = 'cancelled', result = %s, locked_by = NULL, locked_at = NULL,
+        updated_at = CURRENT_TIMESTAMP, finished_at = CURRENT_TIMESTAMP
+    WHERE id = %s
+"""
+
+REQUEST_CANCEL_QUERY = """
+    UPDATE jobs
+    SET cancel_requested = TRUE,
+        status = CASE WHEN status = 'queued' THEN 'cancelled' ELSE status END,
+        finished_at = CASE WHEN status = 'queued' THEN CURRENT_TIMESTAMP ELSE finished_at END,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = %s AND status IN ('queued', 'running')
+    RETURNING status
+"""
+
+SAVE_CHECKPOINT_QUERY = """
+    UPDATE jobs
+    SET progress = %s, checkpoint = %s, locked_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+    WHERE id = %s
+    RETURNING cancel_requested
+"""
+
+REQUEUE_STALE_JOBS_QUERY = """
+    UPDATE jobs
+    SET status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END,
+        error = 'Worker stopped responding while running this job.',
+        locked_by = NULL,
+        locked_at = NULL,
+        updated_at = CURRENT_TIMESTAMP,
+        finished_at = CASE WHEN attempts < max_attempts THEN NULL ELSE CURRENT_TIMESTAMP END
+    WHERE status = 'running' AND locked_at < CURRENT_TIMESTAMP - make_interval(secs => %s)
+"""
+
+JOB_STATUS_COLUMNS = (
+    "id, kind, status, image_id, attempts, max_attempts, progress, cancel_requested, "
+    "result, error, created_at, updated_at, finished_at"
+)
+
+
+class JobCancelled(Exception):
+    """Raised by a handler that noticed ``cancel_requested``; ``result`` is stored on the job."""
+
+    def __init__(self, result=None):
+        super().__init__("Job cancelled.")
+        self.result = result
+
+
+def enqueue_job(cur, kind, payload, image_id=None, max_attempts=3):
+    """Queue a job inside the caller's transaction; workers are woken when it commits."""
+    cur.execute(
+        """
+        INSERT INTO jobs (kind, payload, image_id, max_attempts)
+        VALUES (%s, %s, %s, %s)
+        RETURNING id
+        """,
+        (kind, Json(payload), image_id, max_attempts),
+    )
+    job_id = cur.fetchone()["id"]
+    cur.execute("SELECT pg_notify(%s, %s)", (JOB_NOTIFY_CHANNEL, kind))
+    return job_id
+
+
+def claim_job(conn, worker_id, kinds):
+    """Lock the next runnable job of ``kinds`` for ``worker_id`` and commit the claim."""
+    with conn.cursor() as cur:
+        cur.execute(CLAIM_JOB_QUERY, {"worker": worker_id, "kinds": list(kinds)})
+        job = cur.fetchone()
+    conn.commit()
+    return job
+
+
+def claim_job_by_id(conn, job_id, worker_id):
+    """Lock one specific queued job for ``worker_id``; ``None`` when it is no longer queued."""
+    with conn.cursor() as cur:
+        cur.execute(CLAIM_JOB_BY_ID_QUERY, {"worker": worker_id, "job_id": job_id})
+        job = cur.fetchone()
+    conn.commit()
+    return job
+
+
+def finish_job(conn, job_id, result=None):
+    """Mark a job done and commit it together with whatever its handler wrote."""
+    with conn.cursor() as cur:
+        cur.execute(FINISH_JOB_QUERY, (Json(result or {}), job_id))
+    conn.commit()
+
+
+def fail_job(conn, job_id, error, retry_delay):
+    """Record ``error``; the job is retried after ``retry_delay * attempts`` seconds until it runs out of attempts."""
+    conn.rollback()
+    with conn.cursor() as cur:
+        cur.execute(FAIL_JOB_QUERY, (retry_delay, str(error)[:JOB_ERROR_MAX_LENGTH], job_id))
+        row = cur.fetchone()
+    conn.commit()
+    return row["status"] if row else None
+
+
+def cancel_job(conn, job_id, result=None):
+    with conn.cursor() as cur:
+        cur.execute(CANCEL_JOB_QUERY, (Json(result or {}), job_id))
+    conn.commit()
+
+
+def request_job_cancel(conn, job_id):
+    """Cancel a queued job at once, or ask its worker to stop; returns the job's status or ``None`` if it already ended."""
+    with conn.cursor() as cur:
+        cur.execute(REQUEST_CANCEL_QUERY, (job_id,))
+        row = cur.fetchone()
+    conn.commit()
+    return row["status"] if row else None
+
+
+def save_job_checkpoint(conn, job_id, progress, checkpoint):
+    """Commit the handler's writes together with its progress and resume point.
+
+    Also renews the job's lease, and returns ``True`` once a cancel was requested.
+    """
+    with conn.cursor() as cur:
+        cur.execute(SAVE_CHECKPOINT_QUERY, (Json(progress), Json(checkpoint), job_id))
+        row = cur.fetchone()
+    conn.commit()
+    return bool(row and row["cancel_requested"])
+
+
+def requeue_stale_jobs(conn, stale_after):
+    """Hand back jobs whose worker has held them longer than ``stale_after`` seconds."""
+    with conn.cursor() as cur:
+        cur.execute(REQUEUE_STALE_JOBS_QUERY, (stale_after,))
+        requeued = cur.rowcount
+    conn.commit()
+    return requeued
+
+
+def fetch_job(job_id):
+    with get_conn().cursor() as cur:
+        cur.execute(f"SELECT {JOB_STATUS_COLUMNS} FROM jobs WHERE id = %s", (job_id,))
+        return cur.fetchone()
+
+
+def job_payload(job):
+    return {
+        "id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "image_id": job["image_id"],
+        "attempts": job["attempts"],
+        "max_attempts": job["max_attempts"],
+        "progress": job["progress"],
+        "cancel_requested": job["cancel_requested"],
+        "result": job["result"],
+        "error": job["error"],
+        "created_at": job["created_at"].isoformat() if job["created_at"] else None,
+        "finished_at": job["finished_at"].isoformat() if job["finished_at"] else None,
+    }
+
+
+def run_claimed_job(conn, job, handlers, retry_delay):
+    """Run ``job`` with its handler and record the outcome; returns the job's new status.
+
+    A handler receives ``(conn, job)``, writes through ``conn`` without
+    committing and returns a JSON-serialisable result, so its writes commit
+    atomically with the job being marked as succeeded. Long handlers may
+    commit along the way through ``save_job_checkpoint`` and resume from
+    ``job["checkpoint"]`` when a later attempt picks the job up again.
+    """
+    handler = handlers[job["kind"]]
+    started = time.perf_counter()
+    try:
+        result = handler(conn, job)
+    except JobCancelled as exc:
+        conn.rollback()
+        cancel_job(conn, job["id"], exc.result)
+        logger.info("Job %s (%s) was cancelled", job["id"], job["kind"])
+        return JOB_CANCELLED
+    except Exception as exc:
+        logger.exception("Job %s (%s) failed on attempt %s", job["id"], job["kind"], job["attempts"])
+        return fail_job(conn, job["id"], f"{type(exc).__name__}: {exc}", retry_delay)
+
+    finish_job(conn, job["id"], result)
+    debug_log("Job %s (%s) finished in %.1fs", job["id"], job["kind"], time.perf_counter() - started)
+    return JOB_SUCCEEDED
+
+
+def run_job_now(conn, job_id, handlers):
+    """Run a just-committed job in the current request, for deployments without a worker.
+
+    Returns the job's final status, or ``None`` when a worker claimed it first.
+    """
+    job = claim_job_by_id(conn, job_id, "request")
+    if job is None:
+        return None
+    return run_claimed_job(conn, job, handlers, retry_delay=0)
+
+
+def default_job_handlers():
+    from AstroSpace.services.ingest import INGEST_JOB_KIND, run_ingest_job
+    from AstroSpace.services.maintenance import MAINTENANCE_JOB_KINDS, run_maintenance_job
+
+    return {INGEST_JOB_KIND: run_ingest_job, **dict.fromkeys(MAINTENANCE_JOB_KINDS, run_maintenance_job)}
+
+
+class JobWorker:
+    """Polls the ``jobs`` table and runs claimed jobs one at a time inside an app context.
+
+    Idle workers sleep on ``LISTEN astrospace_jobs`` for up to
+    ``poll_interval`` seconds, so a newly committed job starts at once while a
+    missed notification only costs one poll.
+    """
+
+    def __init__(self, app, handlers, listen_conn=None, worker_id=None):
+        self.app = app
+        self.handlers = handlers
+        self.listen_conn = listen_conn
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = float(app.config.get("JOB_POLL_INTERVAL", 5))
+        self.stale_after = float(app.config.get("JOB_STALE_AFTER", 3600))
+        self.retry_delay = float(app.config.get("JOB_RETRY_DELAY", 60))
+        self._stopped = False
+        self._last_stale_check = 0.0
+
+    def stop(self, *_args):
+        self._stopped = True
+
+    def run_once(self):
+        """Claim and run one job; returns its final status, or ``None`` when the queue is empty."""
+        with self.app.app_context():
+            conn = get_conn()
+            if time.monotonic() - self._last_stale_check >= self.stale_after / 4:
+                self._last_stale_check = time.monotonic()
+                requeued = requeue_stale_jobs(conn, self.stale_after)
+                if requeued:
+                    logger.warning("Requeued %s job(s) abandoned by a stopped worker", requeued)
+
+            job = claim_job(conn, self.worker_id, self.handlers)
+            if job is None:
+                return None
+            logger.info("Running job %s (%s), attempt %s of %s", job["id"], job["kind"], job["attempts"], job["max_attempts"])
+            return run_claimed_job(conn, job, self.handlers, self.retry_delay)
+
+    def wait_for_work(self):
+        if self.listen_conn is None:
+            time.sleep(self.poll_interval)
+            return
+        if select.select([self.listen_conn], [], [], self.poll_interval) != ([], [], []):
+            self.listen_conn.poll()
+            self.listen_conn.notifies.clear()
+
+    def run(self):
+        if self.listen_conn is not None:
+            self.listen_conn.autocommit = True
+            with self.listen_conn.cursor() as cur:
+                cur.execute(f"LISTEN {JOB_NOTIFY_CHANNEL}")
+        logger.info("Job worker %s started for %s", self.worker_id, ", ".join(sorted(self.handlers)))
+        while not self._stopped:
+            if self.run_once() is None and not self._stopped:
+                self.wait_for_work()
+        logger.info("Job worker %s stopped", self.worker_id)
+
+
+def run_worker(app, handlers=None, listen_conn=None, kinds=None):
+    """Run a worker until SIGTERM/SIGINT; ``kinds`` limits it to some job kinds."""
+    handlers = handlers or default_job_handlers()
+    if kinds:
+        unknown = set(kinds) - set(handlers)
+        if unknown:
+            raise ValueError(f"Unknown job kind(s): {', '.join(sorted(unknown))}")
+        handlers = {kind: handler for kind, handler in handlers.items() if kind in kinds}
+    worker = JobWorker(app, handlers, listen_conn=listen_conn)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+    return worker
@@ -0,0 +1,622 @@
+import os
+import time
+
+from flask import current_app
+from psycopg2.extras import Json
+
+from AstroSpace.constants import RELATED_MEDIA_VIDEO_EXTENSIONS
+from AstroSpace.db import get_conn
+from AstroSpace.logging_utils import debug_log
+from AstroSpace.repositories.images import save_image_artifacts
+from AstroSpace.services.artifact_fingerprints import (
+    OVERLAYS_ARTIFACT,
+    file_fingerprint,
+    stale_plate_artifacts,
+    updated_fingerprints,
+)
+from AstroSpace.services.cache import bump_cache_version
+from AstroSpace.services.collection_filters import COLLECTION_FILTERS_CACHE_NAME, forget_collection_filter_metadata
+from AstroSpace.services.ingest import INGEST_JOB_KIND
+from AstroSpace.services.jobs import JOB_STATUS_COLUMNS, JobCancelled, enqueue_job, save_job_checkpoint
+from AstroSpace.services.sky_positions import SKY_POSITION_ASSIGNMENTS, sky_position_from_header, sky_position_values
+from AstroSpace.utils.phd2logparser import build_plotly_payloads
+from AstroSpace.utils.platesolve import thumbnail_path_for
+from AstroSpace.services.plate_rebuild import PlateRebuildPool
+
+
+MAINTENANCE_PLATE_SOLVE = "maintenance_plate_solve"
+MAINTENANCE_GUIDING = "maintenance_guiding"
+MAINTENANCE_PURGE_UPLOADS = "maintenance_purge_uploads"
+MAINTENANCE_JOB_KINDS = (MAINTENANCE_PLATE_SOLVE, MAINTENANCE_GUIDING, MAINTENANCE_PURGE_UPLOADS)
+# Job-level attempts: each one resumes from the last checkpoint.
+MAINTENANCE_MAX_ATTEMPTS = 5
+MAINTENANCE_ITEM_ATTEMPTS = 2
+MAINTENANCE_BATCH_SIZE = 50
+MAINTENANCE_ITEM_LIMIT = 200
+
+ITEM_UPDATED = "updated"
+ITEM_SKIPPED = "skipped"
+ITEM_FAILED = "failed"
+# Plate-solve rebuilds only: fingerprints match, or (dry run) would be rebuilt.
+ITEM_UP_TO_DATE = "up_to_date"
+ITEM_STALE = "stale"
+RECORDED_ITEM_OUTCOMES = (ITEM_SKIPPED, ITEM_FAILED)
+
+PURGE_UPLOAD_EXTENSIONS = {
+    ".jpg",
+    ".jpeg",
+    ".png",
+    ".webp",
+    ".gif",
+    *{f".{extension}" for extension in RELATED_MEDIA_VIDEO_EXTENSIONS},
+}
+
+# Purge item keys of leftover staged FITS/XISF headers, next to the upload paths.
+INGEST_STAGING_KEY_PREFIX = "ingest-staging/"
+# Younger staged headers may belong to a post whose save has not committed its ingest job yet.
+INGEST_STAGING_GRACE = 3600
+
+ACTIVE_STAGED_HEADERS_QUERY = """
+    SELECT payload->'plate_solve'->>'fits_path' AS fits_path
+    FROM jobs
+    WHERE kind = %s AND status IN ('queued', 'running')
+"""
+
+RECORD_ITEM_QUERY = """
+    INSERT INTO job_items (job_id, item_key, image_id, status, attempts, error)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON CONFLICT (job_id, item_key)
+    DO UPDATE SET status = EXCLUDED.status,
+                  attempts = job_items.attempts + EXCLUDED.attempts,
+                  error = EXCLUDED.error,
+                  updated_at = CURRENT_TIMESTAMP
+"""
+
+GUIDING_ROWS_QUERY = """
+    SELECT id, guide_log
+    FROM images
+    WHERE guide_log IS NOT NULL AND NULLIF(BTRIM(guide_log), '') IS NOT NULL
+      AND (%(image_ids)s::int[] IS NULL OR id = ANY(%(image_ids)s::int[]))
+      AND id > %(after)s
+    ORDER BY id
+"""
+
+PLATE_SOLVE_ROWS_QUERY = """
+    SELECT i.id, i.image_path, a.header_json, a.artifact_fingerprints
+    FROM images i
+    JOIN image_artifacts a ON a.image_id = i.id
+    WHERE i.image_path IS NOT NULL AND NULLIF(BTRIM(i.image_path), '') IS NOT NULL
+      AND a.header_json IS NOT NULL AND NULLIF(BTRIM(a.header_json), '') IS NOT NULL
+      AND (%(image_ids)s::int[] IS NULL OR i.id = ANY(%(image_ids)s::int[]))
+      AND i.id > %(after)s
+    ORDER BY i.id
+"""
+
+
+class MissingUpload(Exception):
+    """An item's source files are gone; it is recorded as skipped instead of retried."""
+
+
+def normalize_public_path(path):
+    if not path:
+        return ""
+    return str(path).replace("\\", "/").strip().lstrip("/")
+
+
+def resolve_upload_path(upload_root, public_path):
+    normalized = normalize_public_path(public_path)
+    if not normalized:
+        return ""
+    return os.path.normpath(os.path.join(upload_root, normalized.replace("/", os.sep)))
+
+
+def collect_referenced_upload_paths(rows):
+    referenced = set()
+    for row in rows:
+        for value in row:
+            if not value:
+                continue
+            for item in str(value).split(","):
+                normalized = normalize_public_path(item)
+                if normalized:
+                    referenced.add(normalized)
+    return referenced
+
+
+def collect_orphan_image_uploads(upload_root, referenced_paths):
+    referenced = {normalize_public_path(path) for path in referenced_paths if path}
+    orphans = []
+
+    if not os.path.isdir(upload_root):
+        return orphans
+
+    for root, _, files in os.walk(upload_root):
+        for filename in files:
+            ext = os.path.splitext(filename)[1].lower()
+            if ext not in PURGE_UPLOAD_EXTENSIONS:
+                continue
+
+            absolute_path = os.path.join(root, filename)
+            relative_path = normalize_public_path(os.path.relpath(absolute_path, upload_root))
+            if relative_path not in referenced:
+                orphans.append(absolute_path)
+
+    return sorted(orphans)
+
+
+def _image_rows(db, query, image_ids, after):
+    """Yield rows of ``query`` in id order, fetched in keyset batches after ``after``."""
+    while True:
+        with db.cursor() as cur:
+            cur.execute(
+                f"{query} LIMIT %(limit)s",
+                {"image_ids": image_ids, "after": after or 0, "limit": MAINTENANCE_BATCH_SIZE},
+            )
+            rows = cur.fetchall()
+        yield from rows
+        if len(rows) < MAINTENANCE_BATCH_SIZE:
+            return
+        after = rows[-1]["id"]
+
+
+def _count_rows(db, query, image_ids):
+    with db.cursor() as cur:
+        cur.execute(f"SELECT COUNT(*) AS total FROM ({query}) AS candidates", {"image_ids": image_ids, "after": 0})
+        return cur.fetchone()["total"]
+
+
+def rebuild_guiding_plot(db, upload_root, row):
+    """Re-parse one image's PHD2 logs; writes are left for the caller to commit."""
+    image_id = row["id"]
+    relative_logs = [normalize_public_path(path) for path in row["guide_log"].split(",") if normalize_public_path(path)]
+    absolute_logs = [resolve_upload_path(upload_root, path) for path in relative_logs]
+    missing = [path for path, absolute in zip(relative_logs, absolute_logs) if not os.path.exists(absolute)]
+    if missing:
+        raise MissingUpload(f"Missing guide log(s): {', '.join(missing)}")
+
+    guiding_plot, calibration_plot = build_plotly_payloads(",".join(absolute_logs))
+    with db.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO image_artifacts (image_id, guiding_plot_json, calibration_plot_json)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (image_id)
+            DO UPDATE SET
+                guiding_plot_json = EXCLUDED.guiding_plot_json,
+                calibration_plot_json = EXCLUDED.calibration_plot_json
+            """,
+            (image_id, Json(guiding_plot), Json(calibration_plot)),
+        )
+        cur.execute("UPDATE images SET edited_at = CURRENT_TIMESTAMP WHERE id = %s", (image_id,))
+
+
+def plate_rebuild_plan(upload_root, row, force=False):
+    """Work out what a plate-solve rebuild of ``row`` needs; raises ``MissingUpload`` without its image.
+
+    Returns ``(absolute_image_path, public_image_path, source_hash, stale)``
+    where ``stale`` lists the artifacts to regenerate.
+    """
+    public_image_path = normalize_public_path(row["image_path"])
+    absolute_image_path = resolve_upload_path(upload_root, public_image_path)
+    if not os.path.exists(absolute_image_path):
+        raise MissingUpload(f"Missing image file: {public_image_path}")
+
+    source_hash = file_fingerprint(absolute_image_path)
+    thumbnail_path = thumbnail_path_for(public_image_path)
+    stale = stale_plate_artifacts(
+        row.get("artifact_fingerprints"),
+        source_hash,
+        thumbnail_path,
+        row["header_json"],
+        thumbnail_exists=os.path.exists(resolve_upload_path(upload_root, thumbnail_path)),
+        force=force,
+    )
+    return absolute_image_path, public_image_path, source_hash, stale
+
+
+def save_plate_solve_artifacts(db, image_id, artifacts, fingerprints):
+    """Write one image's rebuilt thumbnail, pixel scale and sky position, plus overlays and header when rebuilt."""
+    with db.cursor() as cur:
+        cur.execute(
+            f"""
+            UPDATE images
+            SET image_thumbnail = %s,
+                pixel_scale = %s,
+                {SKY_POSITION_ASSIGNMENTS},
+                edited_at = CURRENT_TIMESTAMP
+            WHERE id = %s
+            """,
+            (
+                artifacts["thumbnail_path"],
+                artifacts["pixel_scale"],
+                *sky_position_values(sky_position_from_header(artifacts["header_json"])),
+                image_id,
+            ),
+        )
+        stored = {"artifact_fingerprints": Json(fingerprints)}
+        if "overlays_json" in artifacts:
+            # The display transform annotation rewrites the header, and the overlays are drawn from it.
+            stored.update(overlays_json=artifacts["overlays_json"], header_json=artifacts["header_json"])
+        save_image_artifacts(cur, image_id, stored)
+    debug_log(
+        "Rebuilt plate-solve artifacts for image_id=%s thumbnail=%s pixel_scale=%s",
+        image_id,
+        artifacts["thumbnail_path"],
+        artifacts["pixel_scale"],
+    )
+
+
+def list_orphan_image_uploads(db, upload_root):
+    with db.cursor() as cur:
+        cur.execute(
+            """
+            SELECT image_path, image_thumbnail, starless_image_path
+            FROM images
+            """
+        )
+        image_rows = cur.fetchall()
+        cur.execute(
+            """
+            SELECT media_path
+            FROM related_image_media
+            WHERE media_path IS NOT NULL AND NULLIF(BTRIM(media_path), '') IS NOT NULL
+            """
+        )
+        related_media_rows = cur.fetchall()
+        cur.execute(
+            """
+            SELECT display_image
+            FROM users
+            WHERE display_image IS NOT NULL AND NULLIF(BTRIM(display_image), '') IS NOT NULL
+            """
+        )
+        user_rows = cur.fetchall()
+
+    referenced = collect_referenced_upload_paths(
+        [
+            (
+                row.get("image_path"),
+                row.get("image_thumbnail"),
+                row.get("starless_image_path"),
+            )
+            for row in image_rows
+        ]
+        + [(row.get("media_path"),) for row in related_media_rows]
+        + [(row.get("display_image"),) for row in user_rows]
+    )
+    return [
+        normalize_public_path(os.path.relpath(path, upload_root))
+        for path in collect_orphan_image_uploads(upload_root, referenced)
+    ]
+
+
+def list_leftover_ingest_staging(db, staging_root):
+    """Return staged headers (relative to ``staging_root``) that no queued or running ingest job still reads."""
+    if not staging_root or not os.path.isdir(staging_root):
+        return []
+    with db.cursor() as cur:
+        cur.execute(ACTIVE_STAGED_HEADERS_QUERY, (INGEST_JOB_KIND,))
+        active = {os.path.normpath(row["fits_path"]) for row in cur.fetchall() if row.get("fits_path")}
+
+    cutoff = time.time() - INGEST_STAGING_GRACE
+    leftovers = []
+    for root, _, files in os.walk(staging_root):
+        for filename in files:
+            absolute_path = os.path.join(root, filename)
+            if os.path.normpath(absolute_path) in active or os.path.getmtime(absolute_path) > cutoff:
+                continue
+            leftovers.append(normalize_public_path(os.path.relpath(absolute_path, staging_root)))
+    return sorted(leftovers)
+
+
+def delete_orphan_upload(_db, _upload_root, absolute_path):
+    os.remove(absolute_path)
+
+
+class MaintenanceTask:
+    """One item per batch, each with its own retries; the batch is committed with the checkpoint."""
+
+    batch_size = 1
+
+    def run_batch(self, db, upload_root, batch):
+        """Process ``(key, image_id, row)`` items; returns ``(key, image_id, outcome, attempts, error)`` for each."""
+        return [(key, image_id, *_process_item(db, self, upload_root, row)) for key, image_id, row in batch]
+
+    def close(self):
+        pass
+
+
+class ImageTask(MaintenanceTask):
+    """Walks ``images`` in id order; the checkpoint is the last image id handled."""
+
+    def __init__(self, query, process):
+        self.query = query
+        self.process = process
+
+    def count(self, db, _upload_root, payload):
+        return _count_rows(db, self.query, payload.get("image_ids"))
+
+    def items(self, db, _upload_root, payload, after):
+        for row in _image_rows(db, self.query, payload.get("image_ids"), after):
+            yield row["id"], row["id"], row
+
+
+class PlateSolveTask(ImageTask):
+    """Rebuilds the stale artifacts of a batch of images in a ``PlateRebuildPool``, then writes them in one transaction.
+
+    Images whose fingerprints still match are counted as up to date unless
+    ``force`` is set; ``dry_run`` only counts them. Each image is written under
+    its own savepoint, so one bad row does not undo the rest of the batch.
+    """
+
+    def __init__(self, processes, simbad_concurrency, batch_size, force=False, dry_run=False):
+        super().__init__(PLATE_SOLVE_ROWS_QUERY, None)
+        self.processes = processes
+        self.simbad_concurrency = simbad_concurrency
+        self.batch_size = max(1, batch_size)
+        self.force = force
+        self.dry_run = dry_run
+        self._pool = None
+
+    def _rebuild(self, pending):
+        if not pending:
+            return []
+        if self._pool is None:
+            self._pool = PlateRebuildPool(self.processes, self.simbad_concurrency, attempts=MAINTENANCE_ITEM_ATTEMPTS)
+        return self._pool.rebuild(pending)
+
+    def run_batch(self, db, upload_root, batch):
+        outcomes = {}
+        plans = {}
+        for key, _image_id, row in batch:
+            try:
+                plan = plate_rebuild_plan(upload_root, row, force=self.force)
+            except MissingUpload as exc:
+                outcomes[key] = (ITEM_SKIPPED, 1, str(exc))
+                continue
+            if not plan[3]:
+                outcomes[key] = (ITEM_UP_TO_DATE, 0, None)
+            elif self.dry_run:
+                outcomes[key] = (ITEM_STALE, 0, None)
+            else:
+                plans[key] = (row, plan)
+
+        rebuilt = self._rebuild(
+            [
+                (key, absolute_path, public_path, row["header_json"], stale)
+                for key, (row, (absolute_path, public_path, _source_hash, stale)) in plans.items()
+            ]
+        )
+        for key, artifacts, attempts, error in rebuilt:
+            if artifacts is None:
+                outcomes[key] = (ITEM_FAILED, attempts, error)
+                continue
+            row, (_absolute_path, _public_path, source_hash, stale) = plans[key]
+            fingerprints = updated_fingerprints(
+                row.get("artifact_fingerprints"),
+                stale,
+                source_hash,
+                artifacts["thumbnail_path"],
+                artifacts["header_json"] if OVERLAYS_ARTIFACT in stale else row["header_json"],
+            )
+            with db.cursor() as cur:
+                cur.execute("SAVEPOINT plate_rebuild_item")
+                try:
+                    save_plate_solve_artifacts(db, key, artifacts, fingerprints)
+                except Exception as exc:
+                    cur.execute("ROLLBACK TO SAVEPOINT plate_rebuild_item")
+                    outcomes[key] = (ITEM_FAILED, attempts, f"{type(exc).__name__}: {exc}")
+                    continue
+                cur.execute("RELEASE SAVEPOINT plate_rebuild_item")
+            outcomes[key] = (ITEM_UPDATED, attempts, None)
+
+        if any(outcome == ITEM_UPDATED for outcome, _attempts, _error in outcomes.values()):
+            with db.cursor() as cur:
+                # Pixel scales feed the collection slider range.
+                bump_cache_version(cur, COLLECTION_FILTERS_CACHE_NAME)
+        return [(key, image_id, *outcomes[key]) for key, image_id, _row in batch]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+
+class OrphanUploadTask(MaintenanceTask):
+    """Deletes unreferenced uploads and leftover staged headers in path order; the checkpoint is the last path handled.
+
+    The orphan list is recomputed on resume, so files referenced again in the
+    meantime are left alone.
+    """
+
+    process = staticmethod(delete_orphan_upload)
+
+    def __init__(self, staging_root=None):
+        self.staging_root = staging_root
+        self._orphans = None
+
+    def _list(self, db, upload_root):
+        if self._orphans is None:
+            orphans = [
+                (public_path, resolve_upload_path(upload_root, public_path))
+                for public_path in list_orphan_image_uploads(db, upload_root)
+            ]
+            orphans += [
+                (f"{INGEST_STAGING_KEY_PREFIX}{staged_path}", resolve_upload_path(self.staging_root, staged_path))
+                for staged_path in list_leftover_ingest_staging(db, self.staging_root)
+            ]
+            self._orphans = sorted(orphans)
+        return self._orphans
+
+    def count(self, db, upload_root, _payload):
+        return len(self._list(db, upload_root))
+
+    def items(self, db, upload_root, _payload, after):
+        for key, absolute_path in self._list(db, upload_root):
+            if after is None or key > after:
+                yield key, None, absolute_path
+
+
+def maintenance_task(kind, payload=None):
+    payload = payload or {}
+    if kind == MAINTENANCE_PLATE_SOLVE:
+        config = current_app.config
+        return PlateSolveTask(
+            config["PLATE_REBUILD_PROCESSES"],
+            config["SIMBAD_CONCURRENCY"],
+            config["PLATE_REBUILD_BATCH_SIZE"],
+            force=bool(payload.get("force")),
+            dry_run=bool(payload.get("dry_run")),
+        )
+    if kind == MAINTENANCE_GUIDING:
+        return ImageTask(GUIDING_ROWS_QUERY, rebuild_guiding_plot)
+    if kind == MAINTENANCE_PURGE_UPLOADS:
+        return OrphanUploadTask(current_app.config.get("INGEST_STAGING_PATH"))
+    raise ValueError(f"Unknown maintenance job kind: {kind}")
+
+
+def _process_item(db, task, upload_root, row):
+    """Run one item with up to ``MAINTENANCE_ITEM_ATTEMPTS`` tries; returns ``(outcome, attempts, error)``."""
+    error = None
+    for attempt in range(1, MAINTENANCE_ITEM_ATTEMPTS + 1):
+        try:
+            task.process(db, upload_root, row)
+            return ITEM_UPDATED, attempt, None
+        except MissingUpload as exc:
+            db.rollback()
+            return ITEM_SKIPPED, attempt, str(exc)
+        except Exception as exc:
+            db.rollback()
+            error = f"{type(exc).__name__}: {exc}"
+    return ITEM_FAILED, MAINTENANCE_ITEM_ATTEMPTS, error
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run_maintenance_job(conn, job):
+    """Run a catalogue-wide maintenance job, committing each batch with the job's checkpoint.
+
+    A job picked up again after a crash, a deploy or a failed attempt resumes
+    after the last committed batch. Skipped and failed items are kept in
+    ``job_items``; a cancel request stops the job after the current batch.
+    """
+    payload = job["payload"] or {}
+    task = maintenance_task(job["kind"], payload)
+    upload_root = current_app.config["UPLOAD_PATH"]
+    progress = {"total": None, "processed": 0, ITEM_UPDATED: 0, ITEM_SKIPPED: 0, ITEM_FAILED: 0}
+    progress.update(job.get("progress") or {})
+    checkpoint = job.get("checkpoint") or {}
+
+    if progress["total"] is None:
+        progress["total"] = progress["processed"] + task.count(conn, upload_root, payload)
+        if save_job_checkpoint(conn, job["id"], progress, checkpoint):
+            raise JobCancelled(progress)
+    current_app.logger.info(
+        "Maintenance job %s (%s) at %s of %s items", job["id"], job["kind"], progress["processed"], progress["total"]
+    )
+
+    try:
+        for batch in _batches(task.items(conn, upload_root, payload, checkpoint.get("after")), task.batch_size):
+            for key, image_id, outcome, attempts, error in task.run_batch(conn, upload_root, batch):
+                if outcome in RECORDED_ITEM_OUTCOMES:
+                    with conn.cursor() as cur:
+                        cur.execute(RECORD_ITEM_QUERY, (job["id"], str(key), image_id, outcome, attempts, error))
+                    current_app.logger.warning("Maintenance job %s %s item %s: %s", job["id"], outcome, key, error)
+                progress["processed"] += 1
+                progress[outcome] = progress.get(outcome, 0) + 1
+            checkpoint = {"after": batch[-1][0]}
+            if save_job_checkpoint(conn, job["id"], progress, checkpoint):
+                raise JobCancelled(progress)
+    finally:
+        task.close()
+
+    if progress[ITEM_UPDATED] and job["kind"] == MAINTENANCE_PLATE_SOLVE:
+        forget_collection_filter_metadata()
+    return progress
+
+
+def queue_maintenance_job(kind, image_ids=None, retry_of=None, force=False, dry_run=False):
+    """Queue ``kind`` unless one is already waiting or running; returns ``(job_id, created)``.
+
+    ``force`` and ``dry_run`` apply to plate-solve rebuilds: rebuild up-to-date
+    images too, or only count the stale ones.
+    """
+    conn = get_conn()
+    with conn.cursor() as cur:
+        # Serialise concurrent "run" clicks on the same kind.
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (kind,))
+        cur.execute(
+            "SELECT id FROM jobs WHERE kind = %s AND status IN ('queued', 'running') ORDER BY id DESC LIMIT 1",
+            (kind,),
+        )
+        active = cur.fetchone()
+        if active:
+            conn.rollback()
+            return active["id"], False
+        payload = {"image_ids": image_ids, "retry_of": retry_of, "force": force, "dry_run": dry_run}
+        job_id = enqueue_job(cur, kind, payload, max_attempts=MAINTENANCE_MAX_ATTEMPTS)
+    conn.commit()
+    return job_id, True
+
+
+def count_stale_plate_solves(conn, upload_root, image_ids=None):
+    """Count images whose plate-solve artifacts a rebuild would regenerate, without a job or any writes."""
+    counts = {"total": 0, ITEM_STALE: 0, ITEM_UP_TO_DATE: 0, ITEM_SKIPPED: 0}
+    for row in _image_rows(conn, PLATE_SOLVE_ROWS_QUERY, image_ids, 0):
+        counts["total"] += 1
+        try:
+            stale = plate_rebuild_plan(upload_root, row)[3]
+        except MissingUpload:
+            counts[ITEM_SKIPPED] += 1
+            continue
+        counts[ITEM_STALE if stale else ITEM_UP_TO_DATE] += 1
+    return counts
+
+
+def fetch_maintenance_jobs():
+    """Return the latest job of each maintenance kind."""
+    with get_conn().cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT DISTINCT ON (kind) {JOB_STATUS_COLUMNS}
+            FROM jobs
+            WHERE kind = ANY(%s)
+            ORDER BY kind, id DESC
+            """,
+            (list(MAINTENANCE_JOB_KINDS),),
+        )
+        return cur.fetchall()
+
+
+def fetch_job_items(job_id, status=None, limit=MAINTENANCE_ITEM_LIMIT):
+    with get_conn().cursor() as cur:
+        cur.execute(
+            """
+            SELECT item_key, image_id, status, attempts, error, updated_at
+            FROM job_items
+            WHERE job_id = %s AND (%s::text IS NULL OR status = %s)
+            ORDER BY item_key
+            LIMIT %s
+            """,
+            (job_id, status, status, limit),
+        )
+        return cur.fetchall()
+
+
+def fetch_failed_image_ids(job_id):
+    with get_conn().cursor() as cur:
+        cur.execute(
+            "SELECT image_id FROM job_items WHERE job_id = %s AND status = %s AND image_id IS NOT NULL ORDER BY image_id",
+            (job_id, ITEM_FAILED),
+        )
+        return [row["image_id"] for row in cur.fetchall()]
+
@@ -0,0 +1,98 @@
+import json
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from AstroSpace.logging_utils import debug_log
+from AstroSpace.services.artifact_fingerprints import OVERLAYS_ARTIFACT, THUMBNAIL_ARTIFACT
+from AstroSpace.utils.platesolve import (
+    build_overlay_payload,
+    overlay_field,
+    prepare_plate_rebuild,
+    query_overlay_catalogues,
+)
+
+
+def prepare_stage(image_path, public_path, header_json, thumbnail=True):
+    """CPU stage one: WCS, pixel scale, thumbnail and the overlay field."""
+    prepared = prepare_plate_rebuild(image_path, public_path, header_json, thumbnail=thumbnail)
+    prepared["field"] = overlay_field(prepared["header_json"])
+    return prepared
+
+
+def finish_stage(prepared, objects, stars):
+    """CPU stage two: project the SIMBAD results and draw the grid lines into ``overlays_json``."""
+    artifacts = {key: value for key, value in prepared.items() if key != "field"}
+    artifacts["overlays_json"] = json.dumps(build_overlay_payload(prepared["field"], objects, stars))
+    return artifacts
+
+
+class PlateRebuildPool:
+    """Rebuild plate-solve artifacts for many images at once.
+
+    The WCS, thumbnail and overlay drawing run in ``processes`` worker
+    processes (inline when ``processes`` is 1 or less); the SIMBAD queries run
+    on coordinator threads, at most ``simbad_concurrency`` at a time. Each image
+    is tried up to ``attempts`` times.
+    """
+
+    def __init__(self, processes, simbad_concurrency, attempts=1, query=None):
+        self.processes = max(1, int(processes))
+        self.simbad_concurrency = max(1, int(simbad_concurrency))
+        self.attempts = max(1, int(attempts))
+        self.query = query or query_overlay_catalogues
+        self._simbad_slots = threading.Semaphore(self.simbad_concurrency)
+        self._executor = None
+        if self.processes > 1:
+            # Forked children would inherit the parent's DB connections and SIMBAD sessions.
+            self._executor = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn"))
+        # Enough coordinators to keep every process busy while others wait on SIMBAD.
+        self._coordinators = ThreadPoolExecutor(self.processes + self.simbad_concurrency)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        self._coordinators.shutdown(wait=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _cpu(self, stage, *args):
+        if self._executor is None:
+            return stage(*args)
+        return self._executor.submit(stage, *args).result()
+
+    def _rebuild_one(self, image_path, public_path, header_json, parts):
+        prepared = self._cpu(prepare_stage, image_path, public_path, header_json, THUMBNAIL_ARTIFACT in parts)
+        if OVERLAYS_ARTIFACT not in parts:
+            return {key: value for key, value in prepared.items() if key != "field"}
+        with self._simbad_slots:
+            objects, stars = self.query(prepared["field"])
+        return self._cpu(finish_stage, prepared, objects, stars)
+
+    def _rebuild_with_retries(self, item):
+        key, image_path, public_path, header_json, parts = item
+        error = None
+        for attempt in range(1, self.attempts + 1):
+            try:
+                return key, self._rebuild_one(image_path, public_path, header_json, parts), attempt, None
+            except Exception as exc:
+                error = f"{type(exc).__name__}: {exc}"
+                debug_log("Plate-solve rebuild attempt %s failed for %s: %s", attempt, key, error)
+        return key, None, self.attempts, error
+
+    def rebuild(self, items):
+        """Rebuild ``(key, image_path, public_path, header_json, parts)`` items.
+
+        ``parts`` names the ``PLATE_ARTIFACTS`` to regenerate; without
+        ``"overlays"`` SIMBAD is not queried. Returns ``(key, artifacts,
+        attempts, error)`` per item, in input order: ``artifacts`` holds
+        ``thumbnail_path``, ``pixel_scale``, ``header_json``,
+        ``display_transform`` and, when rebuilt, ``overlays_json``; it is
+        ``None`` when every attempt failed.
+        """
+        return list(self._coordinators.map(self._rebuild_with_retries, items))
@@ -0,0 +1,62 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+
+LIMITERS_EXTENSION_KEY = "astrospace_rate_limiters"
+_LIMITER_LOCK = threading.Lock()
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets with a minimum gap between accepted events.
+
+    Each key starts with ``capacity`` tokens, regains ``capacity`` tokens per
+    ``window_seconds`` and must wait ``cooldown_seconds`` after an accepted
+    event. Only the ``max_keys`` most recently used keys are remembered; a key
+    that was forgotten starts again with a full bucket.
+    """
+
+    def __init__(self, capacity, window_seconds, cooldown_seconds, max_keys=10000, clock=time.monotonic):
+        self.capacity = float(capacity)
+        self.refill_rate = self.capacity / float(window_seconds)
+        self.cooldown_seconds = float(cooldown_seconds)
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        """Take a token for ``key``; return ``None`` on success or ``"cooldown"``/``"burst"``."""
+        now = self.clock()
+        with self._lock:
+            tokens, last_refill, last_accepted = self._buckets.pop(key, (self.capacity, now, None))
+            tokens = min(self.capacity, tokens + (now - last_refill) * self.refill_rate)
+            if last_accepted is not None and now - last_accepted < self.cooldown_seconds:
+                verdict = "cooldown"
+            elif tokens < 1:
+                verdict = "burst"
+            else:
+                verdict = None
+                tokens -= 1
+                last_accepted = now
+
+            self._buckets[key] = (tokens, now, last_accepted)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return verdict
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+def get_app_limiter(name, factory):
+    """Return the app's limiter called ``name``, building it with ``factory`` on first use."""
+    app = current_app._get_current_object()
+    with _LIMITER_LOCK:
+        limiters = app.extensions.setdefault(LIMITERS_EXTENSION_KEY, {})
+        if name not in limiters:
+            limiters[name] = factory()
+        return limiters[name]
@@ -0,0 +1,27 @@
+from flask import current_app
+
+from AstroSpace.db import get_conn
+from AstroSpace.services.cache import fetch_cache_version, get_process_cache
+
+
+WEB_INFO_CACHE_NAME = "web_info"
+
+
+def _load_web_info():
+    with get_conn().cursor() as cur:
+        cur.execute("SELECT * FROM web_info LIMIT 1")
+        info = cur.fetchone()
+    return info or {}
+
+
+def get_web_info():
+    return get_process_cache().get(
+        WEB_INFO_CACHE_NAME,
+        float(current_app.config.get("WEB_INFO_CACHE_TTL", 30)),
+        _load_web_info,
+        lambda: fetch_cache_version(get_conn(), WEB_INFO_CACHE_NAME),
+    )
+
+
+def forget_web_info():
+    get_process_cache().invalidate(WEB_INFO_CACHE_NAME)
@@ -0,0 +1,183 @@
+import logging
+import warnings
+
+import numpy as np
+from astropy.io.fits import Header
+from astropy.wcs import WCS
+from psycopg2.extras import Json
+
+from AstroSpace.db import get_conn
+from AstroSpace.logging_utils import debug_log
+from AstroSpace.utils.healpix import HEALPIX_INDEX_ORDER, angular_separation_deg, ang2pix, cone_index_ranges
+
+
+SKY_POSITION_COLUMNS = ("sky_ra", "sky_dec", "field_radius", "footprint", "healpix")
+SKY_POSITION_ASSIGNMENTS = ", ".join(f"{column} = %s" for column in SKY_POSITION_COLUMNS)
+CONE_SEARCH_LIMIT = 50
+CONE_SEARCH_LIMIT_MAX = 200
+MAX_CONE_RADIUS = 30.0
+SKY_POSITION_BACKFILL_BATCH_SIZE = 200
+
+EMPTY_SKY_POSITION = dict.fromkeys(SKY_POSITION_COLUMNS)
+
+# Only the latest version of each title is listed, checked with one index probe per candidate. The
+# NOT EXISTS form the repositories use (``_LATEST_VERSION_SQL``) stays a nested-loop probe there, but
+# behind the HEALPix range join the planner expects too many candidates and picks a hash anti-join
+# that reads every image.
+CONE_SEARCH_QUERY = """
+    SELECT
+        i.id,
+        i.title,
+        i.short_description,
+        i.slug,
+        i.image_path,
+        i.image_thumbnail,
+        i.created_at,
+        i.sky_ra,
+        i.sky_dec,
+        i.field_radius,
+        s.separation
+    FROM unnest(%(low)s::bigint[], %(high)s::bigint[]) AS r (low, high)
+    JOIN images i ON i.healpix BETWEEN r.low AND r.high
+    CROSS JOIN LATERAL (
+        SELECT degrees(2 * asin(sqrt(LEAST(1.0,
+            sin(radians(i.sky_dec - %(dec)s) / 2) ^ 2
+            + cos(radians(i.sky_dec)) * cos(radians(%(dec)s)) * sin(radians(i.sky_ra - %(ra)s) / 2) ^ 2
+        )))) AS separation
+    ) s
+    WHERE s.separation <= %(radius)s + i.field_radius
+      AND i.id = (
+          SELECT newer.id
+          FROM images newer
+          WHERE newer.title = i.title
+          ORDER BY newer.created_at DESC, newer.id DESC
+          LIMIT 1
+      )
+    ORDER BY s.separation, i.id
+    LIMIT %(limit)s
+"""
+
+
+def _load_header(header_json):
+    if isinstance(header_json, Header):
+        return header_json
+    return Header.fromstring(header_json)
+
+
+def sky_position_from_header(header_json):
+    """Extract the field centre, radius, corner footprint and HEALPix pixel from a stored WCS header.
+
+    ``header_json`` is the header string kept in ``image_artifacts``. The centre
+    is ``CRVAL1/2``, the radius the largest separation from it to a corner, and
+    ``healpix`` the NESTED pixel id of the centre at ``HEALPIX_INDEX_ORDER``.
+    Headers without a usable celestial WCS give all-``None`` values.
+    """
+    if not header_json:
+        return dict(EMPTY_SKY_POSITION)
+
+    try:
+        # Stored headers carry non-standard cards (e.g. the display transform); astropy only warns about them.
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            header = _load_header(header_json)
+            ra, dec = float(header["CRVAL1"]), float(header["CRVAL2"])
+            width = header.get("IMAGEW", header.get("NAXIS1"))
+            height = header.get("IMAGEH", header.get("NAXIS2"))
+            wcs = WCS(header, naxis=2)
+            corner_ra, corner_dec = wcs.pixel_to_world_values(
+                np.array([0, width, width, 0], dtype=float),
+                np.array([0, 0, height, height], dtype=float),
+            )
+    except Exception as exc:
+        debug_log("Stored header has no usable sky position: %s", exc, level=logging.WARNING)
+        return dict(EMPTY_SKY_POSITION)
+
+    if not np.all(np.isfinite([ra, dec, *corner_ra, *corner_dec])):
+        return dict(EMPTY_SKY_POSITION)
+
+    ra %= 360.0
+    return {
+        "sky_ra": ra,
+        "sky_dec": dec,
+        "field_radius": float(angular_separation_deg(ra, dec, corner_ra, corner_dec).max()),
+        "footprint": [[float(c_ra) % 360.0, float(c_dec)] for c_ra, c_dec in zip(corner_ra, corner_dec)],
+        "healpix": int(ang2pix(HEALPIX_INDEX_ORDER, ra, dec)),
+    }
+
+
+def sky_position_values(position):
+    """Return ``position`` as values in ``SKY_POSITION_COLUMNS`` order, ready for psycopg2."""
+    return [
+        Json(position[column]) if column == "footprint" and position[column] is not None else position[column]
+        for column in SKY_POSITION_COLUMNS
+    ]
+
+
+def backfill_sky_positions(conn, batch_size=SKY_POSITION_BACKFILL_BATCH_SIZE):
+    """Set the sky position of posts with a stored WCS header but no position yet; returns how many were set.
+
+    Walks ``images`` in id order and commits after every batch, so an
+    interrupted run can simply be started again.
+    """
+    after = 0
+    filled = 0
+    while True:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT i.id, a.header_json
+                FROM images i
+                JOIN image_artifacts a ON a.image_id = i.id
+                WHERE i.healpix IS NULL AND i.id > %s
+                  AND a.header_json IS NOT NULL AND NULLIF(BTRIM(a.header_json), '') IS NOT NULL
+                ORDER BY i.id
+                LIMIT %s
+                """,
+                (after, batch_size),
+            )
+            rows = cur.fetchall()
+            for row in rows:
+                position = sky_position_from_header(row["header_json"])
+                if position["healpix"] is None:
+                    continue
+                cur.execute(
+                    f"UPDATE images SET {SKY_POSITION_ASSIGNMENTS} WHERE id = %s",
+                    (*sky_position_values(position), row["id"]),
+                )
+                filled += 1
+        conn.commit()
+        if len(rows) < batch_size:
+            return filled
+        after = rows[-1]["id"]
+
+
+def fetch_max_field_radius(cur):
+    cur.execute("SELECT MAX(field_radius) AS field_radius FROM images")
+    row = cur.fetchone() or {}
+    return float(row.get("field_radius") or 0.0)
+
+
+def cone_search(ra, dec, radius, limit=CONE_SEARCH_LIMIT):
+    """Return posts whose field overlaps the cone of ``radius`` degrees around ``(ra, dec)``, nearest first.
+
+    Candidates come from HEALPix id ranges on ``images.healpix``; the cone is
+    widened by the largest stored field radius so wide fields centred outside
+    it are still found, then the exact separation filters them. Only the
+    latest version of each title is returned.
+    """
+    conn = get_conn()
+    with conn.cursor() as cur:
+        reach = radius + fetch_max_field_radius(cur)
+        ranges = cone_index_ranges(ra, dec, reach)
+        cur.execute(
+            CONE_SEARCH_QUERY,
+            {
+                "low": [low for low, _high in ranges],
+                "high": [high for _low, high in ranges],
+                "ra": ra,
+                "dec": dec,
+                "radius": radius,
+                "limit": limit,
+            },
+        )
+        return cur.fetchall()
@@ -0,0 +1,223 @@
+import atexit
+import os
+import threading
+import time
+
+from flask import current_app
+from psycopg2.extras import execute_values
+
+from AstroSpace.db import get_conn
+from AstroSpace.services.view_rollups import record_view_sketches
+
+
+VIEW_BUFFER_EXTENSION_KEY = "astrospace_view_buffer"
+_VIEW_BUFFER_LOCK = threading.Lock()
+
+
+class ViewBuffer:
+    """Collects detail-page views in memory and writes them in batches.
+
+    A visitor seen again for the same image within ``dedupe_window`` seconds is
+    dropped before it reaches the database. Pending views are written by a
+    background thread every ``flush_interval`` seconds, or sooner once
+    ``max_pending`` distinct views are waiting, and once more on shutdown.
+    """
+
+    def __init__(self, write_batch, dedupe_window=600, flush_interval=5, max_pending=500, logger=None):
+        self.write_batch = write_batch
+        self.dedupe_window = dedupe_window
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.logger = logger
+        self.pid = os.getpid()
+        self._pending = {}
+        self._seen = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self.recorded = 0
+        self.deduplicated = 0
+        self.flushed = 0
+        self.failed = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="astrospace-view-buffer", daemon=True)
+        self._thread.start()
+        return self
+
+    def record(self, image_id, visitor_identity):
+        now = time.monotonic()
+        key = (image_id, visitor_identity.visitor_hash)
+        with self._lock:
+            last_seen = self._seen.get(key)
+            if last_seen is not None and now - last_seen < self.dedupe_window:
+                self.deduplicated += 1
+                return False
+            self._seen[key] = now
+            self._pending[key] = build_view_entry(image_id, visitor_identity)
+            self.recorded += 1
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake.set()
+        return True
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending.values())
+                self._pending = {}
+                cutoff = time.monotonic() - self.dedupe_window
+                self._seen = {key: seen for key, seen in self._seen.items() if seen >= cutoff}
+            if not batch:
+                return 0
+            try:
+                self.write_batch(batch)
+            except Exception:
+                if len(batch) == 1:
+                    self._drop(batch)
+                    return 0
+                if self.logger is not None:
+                    self.logger.warning("Writing %s buffered image view(s) failed; retrying one by one", len(batch))
+                # One bad row (say, a view of a post deleted before the flush) fails the whole
+                # statement, so retry each view on its own and drop only the ones that still fail.
+                written = 0
+                for view in batch:
+                    try:
+                        self.write_batch([view])
+                    except Exception:
+                        self._drop([view])
+                    else:
+                        written += 1
+                self.flushed += written
+                return written
+            self.flushed += len(batch)
+            return len(batch)
+
+    def _drop(self, views):
+        # Views are best-effort; a failed write is dropped rather than retried forever.
+        self.failed += len(views)
+        if self.logger is not None:
+            self.logger.exception("Failed to write %s buffered image view(s)", len(views))
+
+    def close(self):
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "pending": pending,
+            "recorded": self.recorded,
+            "deduplicated": self.deduplicated,
+            "flushed": self.flushed,
+            "failed": self.failed,
+        }
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._stopped:
+                break
+            self.flush()
+
+
+def build_view_entry(image_id, visitor_identity, seen_at=None):
+    return {
+        "image_id": image_id,
+        "visitor_hash": visitor_identity.visitor_hash,
+        "visitor_source": visitor_identity.visitor_source,
+        "ip_hash": visitor_identity.ip_hash,
+        "user_agent_hash": visitor_identity.user_agent_hash,
+        "visitor_cookie_hash": visitor_identity.visitor_cookie_hash,
+        "seen_at": time.time() if seen_at is None else seen_at,
+    }
+
+
+def write_view_batch(conn, batch):
+    """Upsert views into ``image_views`` and fold their visitors into the unique-view sketches."""
+    try:
+        _write_view_rows(conn, batch)
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def _write_view_rows(conn, batch):
+    with conn.cursor() as cur:
+        execute_values(
+            cur,
+            """
+            INSERT INTO image_views (
+                image_id,
+                user_id,
+                visitor_hash,
+                visitor_source,
+                ip_hash,
+                user_agent_hash,
+                visitor_cookie_hash,
+                viewed_at,
+                last_seen_at
+            )
+            VALUES %s
+            ON CONFLICT (image_id, visitor_hash)
+            DO UPDATE SET
+                last_seen_at = GREATEST(image_views.last_seen_at, EXCLUDED.last_seen_at),
+                visitor_source = EXCLUDED.visitor_source,
+                ip_hash = COALESCE(EXCLUDED.ip_hash, image_views.ip_hash),
+                user_agent_hash = COALESCE(EXCLUDED.user_agent_hash, image_views.user_agent_hash),
+                visitor_cookie_hash = COALESCE(EXCLUDED.visitor_cookie_hash, image_views.visitor_cookie_hash)
+            """,
+            [
+                (
+                    view["image_id"],
+                    view["visitor_hash"],
+                    view["visitor_hash"],
+                    view["visitor_source"],
+                    view["ip_hash"],
+                    view["user_agent_hash"],
+                    view["visitor_cookie_hash"],
+                    view["seen_at"],
+                    view["seen_at"],
+                )
+                for view in batch
+            ],
+            template="(%s, %s, %s, %s, %s, %s, %s, to_timestamp(%s) AT TIME ZONE 'UTC', to_timestamp(%s) AT TIME ZONE 'UTC')",
+            page_size=len(batch),
+        )
+        record_view_sketches(cur, batch)
+
+
+def build_view_buffer(app):
+    def write_batch(batch):
+        # The app context hands the pooled connection back on teardown.
+        with app.app_context():
+            write_view_batch(get_conn(), batch)
+
+    buffer = ViewBuffer(
+        write_batch,
+        dedupe_window=float(app.config.get("VIEW_BUFFER_DEDUPE_WINDOW", 600)),
+        flush_interval=float(app.config.get("VIEW_BUFFER_FLUSH_INTERVAL", 5)),
+        max_pending=int(app.config.get("VIEW_BUFFER_MAX_PENDING", 500)),
+        logger=app.logger,
+    )
+    return buffer.start()
+
+
+def get_view_buffer():
+    app = current_app._get_current_object()
+    with _VIEW_BUFFER_LOCK:
+        buffer = app.extensions.get(VIEW_BUFFER_EXTENSION_KEY)
+        if buffer is None or buffer.pid != os.getpid():
+            # A buffer inherited across fork() has no flush thread in this process.
+            buffer = build_view_buffer(app)
+            app.extensions[VIEW_BUFFER_EXTENSION_KEY] = buffer
+            atexit.register(buffer.close)
+    return buffer
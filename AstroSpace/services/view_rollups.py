@@ -0,0 +1,164 @@
+from datetime import datetime, timedelta, timezone
+
+from psycopg2.extras import execute_values
+
+from AstroSpace.db import get_conn
+from AstroSpace.services.hll import HyperLogLog
+
+
+VIEW_HISTORY_DAYS = 30
+MAX_VIEW_HISTORY_DAYS = 366
+REBUILD_BATCH_SIZE = 5000
+
+DAILY_SKETCH_SQL = {
+    "key_columns": ("image_id", "day"),
+    "create": "INSERT INTO image_view_rollups (image_id, day) VALUES %s ON CONFLICT DO NOTHING",
+    "lock": """
+        SELECT t.image_id, t.day, t.sketch
+        FROM image_view_rollups t
+        JOIN (VALUES %s) AS v (image_id, day) ON t.image_id = v.image_id AND t.day = v.day
+        ORDER BY t.image_id, t.day
+        FOR UPDATE OF t
+    """,
+    "store": """
+        UPDATE image_view_rollups t
+        SET sketch = v.sketch, visitors = v.estimate, updated_at = CURRENT_TIMESTAMP
+        FROM (VALUES %s) AS v (image_id, day, sketch, estimate)
+        WHERE t.image_id = v.image_id AND t.day = v.day
+    """,
+}
+
+LIFETIME_SKETCH_SQL = {
+    "key_columns": ("image_id",),
+    "create": "INSERT INTO image_counters (image_id) VALUES %s ON CONFLICT DO NOTHING",
+    "lock": """
+        SELECT t.image_id, t.view_sketch AS sketch
+        FROM image_counters t
+        JOIN (VALUES %s) AS v (image_id) ON t.image_id = v.image_id
+        ORDER BY t.image_id
+        FOR UPDATE OF t
+    """,
+    "store": """
+        UPDATE image_counters t
+        SET view_sketch = v.sketch, view_count = v.estimate, updated_at = CURRENT_TIMESTAMP
+        FROM (VALUES %s) AS v (image_id, sketch, estimate)
+        WHERE t.image_id = v.image_id
+    """,
+}
+
+
+def view_day(seen_at):
+    return datetime.fromtimestamp(seen_at, timezone.utc).date()
+
+
+def _merge_sketches(cur, statements, additions):
+    """Fold ``additions`` (``{key: HyperLogLog}``) into stored sketches and refresh their estimates."""
+    keys = sorted(additions)
+    # Create missing rows first so concurrent writers queue on the row lock below.
+    execute_values(cur, statements["create"], keys)
+    locked_rows = execute_values(cur, statements["lock"], keys, fetch=True)
+
+    merged = []
+    for row in locked_rows:
+        key = tuple(row[column] for column in statements["key_columns"])
+        sketch = HyperLogLog.from_bytes(row["sketch"]).merge(additions[key])
+        merged.append((*key, sketch.to_bytes(), sketch.estimate()))
+    execute_values(cur, statements["store"], merged)
+
+
+def record_view_sketches(cur, batch):
+    """Add every visitor in ``batch`` to its image's daily and lifetime sketches."""
+    daily = {}
+    lifetime = {}
+    for view in batch:
+        daily.setdefault((view["image_id"], view_day(view["seen_at"])), HyperLogLog()).add(view["visitor_hash"])
+        lifetime.setdefault((view["image_id"],), HyperLogLog()).add(view["visitor_hash"])
+
+    if not daily:
+        return
+    _merge_sketches(cur, DAILY_SKETCH_SQL, daily)
+    _merge_sketches(cur, LIFETIME_SKETCH_SQL, lifetime)
+
+
+def rebuild_view_rollups(conn, batch_size=REBUILD_BATCH_SIZE):
+    """Fold every ``image_views`` row into the daily and lifetime sketches and return how many were read.
+
+    Each visitor counts on the UTC day it was first and last seen. Sketches
+    merge by register maximum, so visitors already in them are not counted
+    again and the command is safe to re-run. Commits after every batch.
+    """
+    after = 0
+    folded = 0
+    while True:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT
+                    id,
+                    image_id,
+                    visitor_hash,
+                    COALESCE(viewed_at, last_seen_at) AS first_seen_at,
+                    COALESCE(last_seen_at, viewed_at) AS last_seen_at
+                FROM image_views
+                WHERE id > %s AND image_id IS NOT NULL AND COALESCE(viewed_at, last_seen_at) IS NOT NULL
+                ORDER BY id
+                LIMIT %s
+                """,
+                (after, batch_size),
+            )
+            rows = cur.fetchall()
+            record_view_sketches(
+                cur,
+                [
+                    {
+                        "image_id": row["image_id"],
+                        "visitor_hash": row["visitor_hash"],
+                        "seen_at": row[column].replace(tzinfo=timezone.utc).timestamp(),
+                    }
+                    for row in rows
+                    for column in ("first_seen_at", "last_seen_at")
+                ],
+            )
+        conn.commit()
+        folded += len(rows)
+        if len(rows) < batch_size:
+            return folded
+        after = rows[-1]["id"]
+
+
+def fetch_view_history(image_id, days=VIEW_HISTORY_DAYS, today=None):
+    """Return ``[{"day", "visitors"}]`` for the last ``days`` UTC days, oldest first, gaps as zero."""
+    today = today or datetime.now(timezone.utc).date()
+    first_day = today - timedelta(days=days - 1)
+    conn = get_conn()
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT day, visitors
+            FROM image_view_rollups
+            WHERE image_id = %s AND day >= %s
+            ORDER BY day
+            """,
+            (image_id, first_day),
+        )
+        visitors_by_day = {row["day"]: row["visitors"] for row in cur.fetchall()}
+
+    return [
+        {"day": day.isoformat(), "visitors": int(visitors_by_day.get(day, 0))}
+        for day in (first_day + timedelta(days=offset) for offset in range(days))
+    ]
+
+
+def prune_image_views(conn, retention_days):
+    """Delete ``image_views`` rows not seen within ``retention_days`` and return how many went.
+
+    Their visitors are already folded into the daily and lifetime sketches.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            "DELETE FROM image_views WHERE last_seen_at < CURRENT_TIMESTAMP - make_interval(days => %s)",
+            (int(retention_days),),
+        )
+        pruned = cur.rowcount
+    conn.commit()
+    return pruned
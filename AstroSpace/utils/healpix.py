@@ -0,0 +1,156 @@
+"""HEALPix NESTED pixel numbering (Gorski et al. 2005) for sky-position indexing.
+
+Only the pieces the cone search needs are implemented: angle <-> pixel
+conversion and a hierarchical cone cover. In the NESTED scheme the four
+children of pixel ``p`` at order ``k`` are ``4p .. 4p + 3`` at order ``k + 1``,
+so a pixel id stored at a fine order answers any coarser order with a shift,
+and every coarse pixel is a contiguous id range at the fine order.
+"""
+
+import math
+
+import numpy as np
+
+
+HEALPIX_INDEX_ORDER = 10  # nside 1024, pixels about 3.4 arcmin across
+HEALPIX_MAX_SEARCH_ORDER = 8
+# The farthest point of a pixel lies up to ~1.05 resolutions from its centre
+# (elongated pixels near the cap boundaries); keep some slack on top of that.
+PIXEL_RADIUS_FACTOR = 1.25
+
+# Face layout of the twelve base pixels: ring row and longitude of each corner.
+_JRLL = np.array([2, 2, 2, 2, 3, 3, 3, 3, 4, 4, 4, 4], dtype=np.int64)
+_JPLL = np.array([1, 3, 5, 7, 0, 2, 4, 6, 1, 3, 5, 7], dtype=np.int64)
+
+
+def pixel_count(order):
+    return 12 << (2 * order)
+
+
+def pixel_resolution_deg(order):
+    """Square root of the pixel area in degrees."""
+    return math.degrees(math.sqrt(4 * math.pi / pixel_count(order)))
+
+
+def _spread_bits(values, order):
+    spread = np.zeros_like(values)
+    for bit in range(order):
+        spread |= ((values >> bit) & 1) << (2 * bit)
+    return spread
+
+
+def _compress_bits(values, order):
+    compressed = np.zeros_like(values)
+    for bit in range(order):
+        compressed |= ((values >> (2 * bit)) & 1) << bit
+    return compressed
+
+
+def ang2pix(order, ra_deg, dec_deg):
+    """Return the NESTED pixel id at ``order`` containing each ``(ra, dec)`` in degrees."""
+    nside = 1 << order
+    z = np.sin(np.radians(np.asarray(dec_deg, dtype=float)))
+    tt = np.mod(np.radians(np.asarray(ra_deg, dtype=float)), 2 * np.pi) * (2 / np.pi)
+    z, tt = np.broadcast_arrays(z, tt)
+    za = np.abs(z)
+
+    face = np.zeros(z.shape, dtype=np.int64)
+    ix = np.zeros(z.shape, dtype=np.int64)
+    iy = np.zeros(z.shape, dtype=np.int64)
+
+    equatorial = za <= 2 / 3
+    if equatorial.any():
+        temp1 = nside * (0.5 + tt[equatorial])
+        temp2 = nside * (0.75 * z[equatorial])
+        jp = (temp1 - temp2).astype(np.int64)  # ascending edge line
+        jm = (temp1 + temp2).astype(np.int64)  # descending edge line
+        ifp = jp >> order
+        ifm = jm >> order
+        face[equatorial] = np.where(ifp == ifm, ifp | 4, np.where(ifp < ifm, ifp, ifm + 8))
+        ix[equatorial] = jm & (nside - 1)
+        iy[equatorial] = nside - (jp & (nside - 1)) - 1
+
+    polar = ~equatorial
+    if polar.any():
+        ntt = np.minimum(tt[polar].astype(np.int64), 3)
+        tp = tt[polar] - ntt
+        tmp = nside * np.sqrt(3 * (1 - za[polar]))
+        jp = np.minimum((tp * tmp).astype(np.int64), nside - 1)
+        jm = np.minimum(((1 - tp) * tmp).astype(np.int64), nside - 1)
+        north = z[polar] >= 0
+        face[polar] = np.where(north, ntt, ntt + 8)
+        ix[polar] = np.where(north, nside - jm - 1, jp)
+        iy[polar] = np.where(north, nside - jp - 1, jm)
+
+    return (face << (2 * order)) + _spread_bits(ix, order) + (_spread_bits(iy, order) << 1)
+
+
+def pix2ang(order, pixels):
+    """Return ``(ra, dec)`` in degrees of the centre of each NESTED pixel at ``order``."""
+    nside = 1 << order
+    pixels = np.asarray(pixels, dtype=np.int64)
+    face = pixels >> (2 * order)
+    within_face = pixels & ((1 << (2 * order)) - 1)
+    ix = _compress_bits(within_face, order)
+    iy = _compress_bits(within_face >> 1, order)
+
+    jr = _JRLL[face] * nside - ix - iy - 1
+    north_cap = jr < nside
+    south_cap = jr > 3 * nside
+    nr = np.where(north_cap, jr, np.where(south_cap, 4 * nside - jr, nside))
+    z = np.where(
+        north_cap,
+        1 - nr * nr / (3.0 * nside * nside),
+        np.where(south_cap, nr * nr / (3.0 * nside * nside) - 1, (2 * nside - jr) * 2.0 / (3.0 * nside)),
+    )
+    kshift = np.where(north_cap | south_cap, 0, (jr - nside) & 1)
+
+    jp = (_JPLL[face] * nr + ix - iy + 1 + kshift) // 2
+    jp = np.where(jp > 4 * nside, jp - 4 * nside, jp)
+    jp = np.where(jp < 1, jp + 4 * nside, jp)
+    phi = (jp - (kshift + 1) * 0.5) * (np.pi / 2 / nr)
+
+    return np.degrees(phi), np.degrees(np.arcsin(np.clip(z, -1.0, 1.0)))
+
+
+def angular_separation_deg(ra1, dec1, ra2, dec2):
+    ra1, dec1, ra2, dec2 = (np.radians(np.asarray(value, dtype=float)) for value in (ra1, dec1, ra2, dec2))
+    haversine = np.sin((dec2 - dec1) / 2) ** 2 + np.cos(dec1) * np.cos(dec2) * np.sin((ra2 - ra1) / 2) ** 2
+    return np.degrees(2 * np.arcsin(np.sqrt(np.clip(haversine, 0.0, 1.0))))
+
+
+def search_order_for_radius(radius_deg, max_order=HEALPIX_MAX_SEARCH_ORDER):
+    """Pick the order whose pixels are about half the cone radius, capped at ``max_order``."""
+    if radius_deg <= 0:
+        return max_order
+    order = math.ceil(math.log2(2 * pixel_resolution_deg(0) / radius_deg))
+    return min(max(order, 0), max_order)
+
+
+def cone_pixels(ra_deg, dec_deg, radius_deg, order):
+    """Return the NESTED pixels at ``order`` that may overlap the cone, refined from the base pixels."""
+    candidates = np.arange(12, dtype=np.int64)
+    for level in range(order + 1):
+        if level:
+            candidates = (candidates[:, None] * 4 + np.arange(4, dtype=np.int64)).ravel()
+        centre_ra, centre_dec = pix2ang(level, candidates)
+        separation = angular_separation_deg(centre_ra, centre_dec, ra_deg, dec_deg)
+        candidates = candidates[separation <= radius_deg + PIXEL_RADIUS_FACTOR * pixel_resolution_deg(level)]
+    return candidates
+
+
+def cone_index_ranges(ra_deg, dec_deg, radius_deg, index_order=HEALPIX_INDEX_ORDER, search_order=None):
+    """Return merged inclusive ``(low, high)`` pixel-id ranges at ``index_order`` covering the cone."""
+    if search_order is None:
+        search_order = search_order_for_radius(radius_deg)
+    search_order = min(search_order, index_order)
+    shift = 2 * (index_order - search_order)
+
+    ranges = []
+    for pixel in np.sort(cone_pixels(ra_deg, dec_deg, radius_deg, search_order)).tolist():
+        low, high = pixel << shift, ((pixel + 1) << shift) - 1
+        if ranges and ranges[-1][1] + 1 == low:
+            ranges[-1][1] = high
+        else:
+            ranges.append([low, high])
+    return [tuple(bounds) for bounds in ranges]
@@ -4,18 +4,21 @@ import json
 import math
 import hashlib
 import logging
+import threading
+from functools import lru_cache
 from astropy.wcs import WCS
 
 import numpy as np
 # from astroquery.vizier import Vizier
-from astroquery.simbad import Simbad
+from astroquery.simbad import SimbadClass
 from astropy.coordinates import SkyCoord, Angle
 import astropy.units as u
 from astropy.io.fits import Header
 import pandas as pd
-from flask import current_app, g
+from flask import g
 from astroquery.astrometry_net import AstrometryNet
 from AstroSpace.logging_utils import debug_log
+from AstroSpace.utils.simbad_cache import SimbadOffline, get_simbad_cache, normalize_region_query
 from AstroSpace.utils.utils import resize_image
 from AstroSpace.utils.xisf_reader import xisf_header
 
@@ -26,6 +29,16 @@ DISPLAY_TRANSFORM_KEY = "ASDISP"
 DISPLAY_TRANSFORM_SOURCE_KEY = "ASDSRC"
 DISPLAY_TRANSFORM_FLIPUD = "flipud"
 
+OVERLAY_OBJECT_FIELDS = ("ids", "galdim_majaxis", "galdim_minaxis", "galdim_angle", "otype")
+OVERLAY_STAR_FIELDS = ("otype", "plx_value", "U", "B", "V", "sp_type")
+BIG_OBJECT_TYPES = "('G', 'GiC', 'GiG', 'GiP', 'GrG','HII', 'PN', 'SNR', 'Cl*', 'OpC', 'GlC', 'Neb', 'Cld', 'DNe','..27','..28','..30','BiC','CGC','ClG','EmG','flt','GNe','IG', 'LSB','MoC','PaG','PCG','rG','RNe', 'SBG','Sy1','Sy2','SyG')"
+
+# Bump when the thumbnail or overlay output changes, so fingerprinted images are rebuilt.
+THUMBNAIL_PIPELINE_VERSION = 1
+OVERLAY_PIPELINE_VERSION = 1
+
+_simbad_clients = threading.local()
+
 # Vizier.ROW_LIMIT = -1 # No limit on the number of rows returned
 
 def fits_header_only(fits_file, return_dict = False):
@@ -336,7 +349,7 @@ def pa_world_to_pixel(wcs, ra, dec, pa_deg):
 
     return ang
 
-def platesolve(image_path, user_id, fits_file=None):
+def platesolve(image_path, user_id, fits_file=None, make_thumbnail=True):
     debug_log(
         "Plate solve started (image_path=%s, fits_file=%s)",
         image_path,
@@ -355,7 +368,7 @@ def platesolve(image_path, user_id, fits_file=None):
                 debug_log("FITS header parse failed; falling back to Astrometry.net.", level=logging.WARNING)
                 # Initialize AstrometryNet with your API key
                 ast = AstrometryNet()
-                ast.api_key = g.user["astrometry_api_key"]
+                ast.api_key = g.user_secrets.get("astrometry_api_key")
                 try:
                     wcs_header = ast.solve_from_image(fits_file, solve_timeout=1800)
                 except Exception as e:
@@ -386,47 +399,61 @@ def platesolve(image_path, user_id, fits_file=None):
         debug_log("Persisted display transform=%s into stored WCS header.", display_transform)
     debug_log("Plate solve completed (pixel_scale=%s)", pixel_scale)
     
-    debug_log("Generating thumbnail for image_path=%s", image_path)
     path, _ = os.path.splitext(image_path)
     thumbnail_path = path + "_thumbnail.jpg"
-    resize_image(image_path, thumbnail_path)
+    if make_thumbnail:
+        debug_log("Generating thumbnail for image_path=%s", image_path)
+        resize_image(image_path, thumbnail_path)
     thumbnail_path = f"{user_id}/{os.path.basename(thumbnail_path)}"
-    debug_log("Thumbnail created at public_path=%s", thumbnail_path)
+    debug_log("Thumbnail public_path=%s", thumbnail_path)
     return header_json, thumbnail_path, pixel_scale
 
 
-def rebuild_plate_solve_artifacts(image_path, image_public_path, header_json):
-    debug_log(
-        "Rebuilding plate-solve artifacts (image_path=%s, image_public_path=%s)",
-        image_path,
-        image_public_path,
-    )
+def thumbnail_path_for(image_path):
+    return os.path.splitext(image_path.replace("\\", "/"))[0] + "_thumbnail.jpg"
+
+
+def prepare_plate_rebuild(image_path, image_public_path, header_json, thumbnail=True):
+    """Do the local part of a plate-solve rebuild: display transform, pixel scale and thumbnail.
+
+    ``thumbnail=False`` keeps the existing thumbnail file. Returns plain values
+    only, so a process pool can run it.
+    """
     if not header_json:
         raise ValueError("Image does not have stored plate-solving data.")
 
     wcs_header, display_transform = annotate_display_transform_metadata(header_json)
-    wcs = WCS(wcs_header, naxis=2)
-    try:
-        wcs = wcs.dropaxis(2)
-    except Exception:
-        pass
+    wcs = _celestial_wcs(wcs_header)
 
     ps_x, ps_y = wcs.proj_plane_pixel_scales()[:2]
     pixel_scale = float(np.mean([ps_x.value, ps_y.value]) * 3600)
 
-    thumbnail_path = os.path.splitext(image_path)[0] + "_thumbnail.jpg"
-    resize_image(image_path, thumbnail_path)
+    if thumbnail:
+        resize_image(image_path, os.path.splitext(image_path)[0] + "_thumbnail.jpg")
+
+    return {
+        "thumbnail_path": thumbnail_path_for(image_public_path),
+        "pixel_scale": pixel_scale,
+        "header_json": wcs_header.tostring(),
+        "display_transform": display_transform,
+    }
+
 
-    thumbnail_public_path = os.path.splitext(image_public_path.replace("\\", "/"))[0] + "_thumbnail.jpg"
-    updated_header_json = wcs_header.tostring()
-    overlays_json = json.dumps(get_overlays(updated_header_json))
+def rebuild_plate_solve_artifacts(image_path, image_public_path, header_json):
+    debug_log(
+        "Rebuilding plate-solve artifacts (image_path=%s, image_public_path=%s)",
+        image_path,
+        image_public_path,
+    )
+    prepared = prepare_plate_rebuild(image_path, image_public_path, header_json)
+    overlays_json = json.dumps(get_overlays(prepared["header_json"]))
     debug_log(
         "Rebuilt plate-solve artifacts (thumbnail=%s, pixel_scale=%s, display_transform=%s)",
-        thumbnail_public_path,
-        pixel_scale,
-        display_transform or "native",
+        prepared["thumbnail_path"],
+        prepared["pixel_scale"],
+        prepared["display_transform"] or "native",
     )
-    return thumbnail_public_path, pixel_scale, overlays_json, updated_header_json
+    return prepared["thumbnail_path"], prepared["pixel_scale"], overlays_json, prepared["header_json"]
 
 
 def otype_to_color(otype):
@@ -485,27 +512,49 @@ favs = [
 ]
 
 
-def get_overlays(wcs_header):
-    debug_log("Generating overlays from WCS header.")
-    wcs_header, display_transform = annotate_display_transform_metadata(wcs_header)
+def _celestial_wcs(wcs_header):
     wcs = WCS(wcs_header, naxis=2)
     try:
         wcs = wcs.dropaxis(2)  # Drop any unused axes
-        #wcs_header = wcs.to_header()
     except:
-        pass 
+        pass
+    return wcs
 
-    ps_x, ps_y = wcs.proj_plane_pixel_scales()[:2]
-    pixel_scale = np.mean([ps_x.value, ps_y.value]) * 3600
 
-    simbad_desc = os.path.join(
-        current_app.config["root_path"], "utils", "simbad_object_description.json"
-    )
+@lru_cache(maxsize=1)
+def load_otype_names():
+    simbad_desc = os.path.join(os.path.dirname(__file__), "simbad_object_description.json")
     with open(simbad_desc) as f:
         otypes = pd.read_json(f, orient="index")
+    return otypes.to_dict()[0]
+
+
+def _simbad_client(fields):
+    """Return this thread's SIMBAD client for ``fields``.
+
+    The shared ``Simbad`` instance keeps its output fields as global state, so
+    concurrent queries each use a client of their own.
+    """
+    clients = getattr(_simbad_clients, "by_fields", None)
+    if clients is None:
+        clients = _simbad_clients.by_fields = {}
+    if fields not in clients:
+        client = SimbadClass()
+        client.add_votable_fields(*fields)
+        clients[fields] = client
+    return clients[fields]
 
-    # chosen_stars = otypes.query("index.isin(@favs)").to_dict()[0]
-    chosen_stars = otypes.to_dict()[0]
+
+def overlay_field(wcs_header):
+    """Measure the field ``get_overlays`` annotates: size, pixel scale, centre, search radius and RA/Dec box.
+
+    Returns plain values only, so the result can cross process boundaries.
+    """
+    wcs_header, display_transform = annotate_display_transform_metadata(wcs_header)
+    wcs = _celestial_wcs(wcs_header)
+
+    ps_x, ps_y = wcs.proj_plane_pixel_scales()[:2]
+    pixel_scale = float(np.mean([ps_x.value, ps_y.value]) * 3600)
 
     try:
         nx, ny = wcs_header["IMAGEW"], wcs_header["IMAGEH"]
@@ -514,29 +563,73 @@ def get_overlays(wcs_header):
 
     corners_pix = np.array([[0, 0], [nx, 0], [nx, ny], [0, ny]])
     ra_vals, dec_vals = wcs.pixel_to_world_values(corners_pix[:, 0], corners_pix[:, 1])
-
-    ra_min, ra_max = ra_vals.min(), ra_vals.max()
-    dec_min, dec_max = dec_vals.min(), dec_vals.max()
     ra_center, dec_center = wcs_header.get("CRVAL1", 0), wcs_header.get("CRVAL2", 0)
 
     coord = SkyCoord(ra_center, dec_center, unit="deg")
     corners = SkyCoord(ra_vals, dec_vals, unit="deg")
-    radius = coord.separation(corners).max()   # accurate angular radius   
-
-    Simbad.reset_votable_fields()  # Reset to default fields
-    Simbad.add_votable_fields(
-        "ids",
-        "galdim_majaxis",
-        "galdim_minaxis",
-        "galdim_angle",
-        "otype",
-    )
+    radius = coord.separation(corners).max()   # accurate angular radius
+
+    return {
+        "header_json": wcs_header.tostring(),
+        "display_transform": display_transform,
+        "width": nx,
+        "height": ny,
+        "pixel_scale": pixel_scale,
+        "ra_center": float(ra_center),
+        "dec_center": float(dec_center),
+        "radius_deg": float(radius.deg),
+        "ra_limits": [float(ra_vals.min()), float(ra_vals.max())],
+        "dec_limits": [float(dec_vals.min()), float(dec_vals.max())],
+    }
+
+
+def query_region_cached(fields, ra, dec, radius_deg, criteria=None):
+    """Run a SIMBAD ``query_region`` for ``fields`` through the region cache and return a DataFrame."""
+    cache = get_simbad_cache()
+    query = normalize_region_query(ra, dec, radius_deg, fields, criteria)
+    cached = cache.get(query)
+    if cached is not None:
+        debug_log("SIMBAD cache hit for region ra=%s dec=%s radius=%s", query["ra"], query["dec"], query["radius"])
+        return cached
+    if cache.offline:
+        raise SimbadOffline(
+            f"SIMBAD offline mode has no cached region query for ra={query['ra']} dec={query['dec']} "
+            f"radius={query['radius']}"
+        )
+
+    # Creating a client already talks to SIMBAD (it validates the field names), so only do it on a miss.
+    result = _simbad_client(fields).query_region(
+        SkyCoord(ra, dec, unit="deg"), radius=radius_deg * u.deg, criteria=criteria
+    ).to_pandas()
+    cache.put(query, result)
+    return result
+
+
+def query_overlay_catalogues(field):
+    """Fetch the deep-sky objects and the stars around ``field`` from SIMBAD, as DataFrames.
+
+    This is the only network-bound step of ``get_overlays``; results come from
+    the SIMBAD region cache when it holds them.
+    """
+    ra, dec, radius = field["ra_center"], field["dec_center"], field["radius_deg"]
 
     debug_log("Querying SIMBAD for overlay objects within field of view.")
-    big_objects = "('G', 'GiC', 'GiG', 'GiP', 'GrG','HII', 'PN', 'SNR', 'Cl*', 'OpC', 'GlC', 'Neb', 'Cld', 'DNe','..27','..28','..30','BiC','CGC','ClG','EmG','flt','GNe','IG', 'LSB','MoC','PaG','PCG','rG','RNe', 'SBG','Sy1','Sy2','SyG')"
-    result = Simbad.query_region(coord, radius=radius)#, criteria=f"otype IN {big_objects}")
+    objects = query_region_cached(OVERLAY_OBJECT_FIELDS, ra, dec, radius)#, criteria=f"otype IN {BIG_OBJECT_TYPES}")
+
+    debug_log("Querying SIMBAD for stellar overlay plot data.")
+    stars = query_region_cached(OVERLAY_STAR_FIELDS, ra, dec, radius, criteria=f"otype NOT IN {BIG_OBJECT_TYPES}")
+    return objects, stars
+
 
-    df = result.to_pandas()
+def build_overlay_payload(field, objects, stars, otype_names=None):
+    """Project the SIMBAD results onto the image and draw the grid lines."""
+    chosen_stars = otype_names if otype_names is not None else load_otype_names()
+    wcs = _celestial_wcs(_coerce_header(field["header_json"]))
+    pixel_scale = field["pixel_scale"]
+    ra_min, ra_max = field["ra_limits"]
+    dec_min, dec_max = field["dec_limits"]
+
+    df = objects.copy()
     df['name'] = df['ids']#.apply(extract_popular_id)
     df = df[
         [   
@@ -583,21 +676,7 @@ def get_overlays(wcs_header):
         "otype": [chosen_stars.get(o, "Unknown") for o in df["otype"].astype(str)],
     }
 
-    Simbad.reset_votable_fields()  # Reset to default fields
-    Simbad.add_votable_fields(
-        "otype",
-        "plx_value",
-        "U",
-        "B",
-        "V",
-        "sp_type",
-    )
-
-    debug_log("Querying SIMBAD for stellar overlay plot data.")
-    result2 = Simbad.query_region(coord, radius=radius, criteria=f"otype NOT IN {big_objects}")
-
-    df2 = result2.to_pandas()
-    df2= df2[
+    df2 = stars[
         [
             "main_id",
             "ra",
@@ -609,7 +688,7 @@ def get_overlays(wcs_header):
             "V",
             "sp_type"
         ]
-    ]
+    ].copy()
    
     # Convert parallax to distance in light years
     #d_ly = (df2["plx_value"] ** -1) * pc_to_ly * 1e3
@@ -649,10 +728,17 @@ def get_overlays(wcs_header):
     )
 
     payload = {
-        "width": nx,
-        "height": ny,
+        "width": field["width"],
+        "height": field["height"],
         "overlays": db,
         "plots": {'hr': hr},
         "grid_lines": grid_lines,
     }
-    return apply_display_transform_to_overlay_payload(payload, display_transform)
+    return apply_display_transform_to_overlay_payload(payload, field["display_transform"])
+
+
+def get_overlays(wcs_header):
+    debug_log("Generating overlays from WCS header.")
+    field = overlay_field(wcs_header)
+    objects, stars = query_overlay_catalogues(field)
+    return build_overlay_payload(field, objects, stars)
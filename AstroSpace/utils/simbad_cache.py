@@ -0,0 +1,233 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+from AstroSpace.logging_utils import debug_log
+
+
+# Bump when the stored entry layout changes; older entries then miss and are rewritten.
+SIMBAD_CACHE_FORMAT = 1
+COORDINATE_DECIMALS = 6
+
+
+class SimbadOffline(RuntimeError):
+    """Offline mode found no cached result for a SIMBAD query."""
+
+
+def normalize_region_query(ra, dec, radius_deg, fields, criteria=None):
+    """Return the cache identity of a ``query_region`` call.
+
+    Coordinates are rounded to a micro-degree, RA wrapped into [0, 360), the
+    field list sorted and whitespace in ``criteria`` collapsed, so equivalent
+    calls share one entry.
+    """
+    return {
+        "format": SIMBAD_CACHE_FORMAT,
+        "ra": round(float(ra) % 360.0, COORDINATE_DECIMALS),
+        "dec": round(float(dec), COORDINATE_DECIMALS),
+        "radius": round(float(radius_deg), COORDINATE_DECIMALS),
+        "fields": sorted(fields),
+        "criteria": " ".join(criteria.split()) if criteria else None,
+    }
+
+
+def region_query_key(query):
+    return hashlib.sha256(json.dumps(query, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class SimbadRegionCache:
+    """Disk-backed cache of SIMBAD region-query results, one JSON file per normalized query.
+
+    Entries older than ``ttl`` seconds are treated as misses and removed. When
+    the directory grows past ``max_bytes``, the least recently used entries
+    (by file mtime, refreshed on every hit) are deleted. The files are plain
+    JSON, so a directory of them doubles as a replayable test fixture. In
+    ``offline`` mode expired entries are still served and a miss raises
+    ``SimbadOffline`` instead of querying.
+    """
+
+    def __init__(self, directory, ttl=30 * 86400, max_bytes=512 * 1024 * 1024, offline=False, enabled=True):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.enabled = enabled or offline
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def get(self, query):
+        """Return the cached DataFrame for ``query``, or ``None`` on a miss."""
+        if not self.enabled:
+            return None
+        path = self._path(region_query_key(query))
+        try:
+            with open(path, encoding="utf-8") as handle:
+                entry = json.load(handle)
+        except FileNotFoundError:
+            self._count("misses")
+            return None
+        except (OSError, ValueError):
+            debug_log("Discarding unreadable SIMBAD cache entry %s", path, level=logging.WARNING)
+            self._remove(path)
+            self._count("misses")
+            return None
+
+        if self.ttl and time.time() - entry["stored_at"] > self.ttl and not self.offline:
+            self._remove(path)
+            self._count("expired")
+            self._count("misses")
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._count("hits")
+        return pd.read_json(io.StringIO(json.dumps(entry["table"])), orient="table")
+
+    def put(self, query, table):
+        """Store ``table`` (a DataFrame) for ``query``, then evict down to ``max_bytes``."""
+        if not self.enabled or self.offline:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(region_query_key(query))
+        entry = {"query": query, "stored_at": time.time(), "table": json.loads(table.to_json(orient="table"))}
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(entry, handle)
+        # Readers in other threads and processes see either the old entry or the new one.
+        os.replace(tmp_path, path)
+        self._count("stores")
+        self.evict()
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _entries(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        entries = []
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """Delete least recently used entries until the directory fits in ``max_bytes``; returns how many."""
+        if not self.max_bytes:
+            return 0
+        entries = sorted(self._entries())
+        total = sum(size for _mtime, size, _path in entries)
+        evicted = 0
+        for _mtime, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            evicted += 1
+        if evicted:
+            self._count("evictions", evicted)
+        return evicted
+
+    def prune(self):
+        """Delete every entry older than ``ttl``; returns how many."""
+        pruned = 0
+        for _mtime, _size, path in self._entries():
+            try:
+                with open(path, encoding="utf-8") as handle:
+                    stored_at = json.load(handle)["stored_at"]
+            except (OSError, ValueError, KeyError):
+                stored_at = 0
+            if not self.ttl or time.time() - stored_at > self.ttl:
+                self._remove(path)
+                pruned += 1
+        return pruned
+
+    def clear(self):
+        entries = self._entries()
+        for _mtime, _size, path in entries:
+            self._remove(path)
+        return len(entries)
+
+    def stats(self):
+        entries = self._entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "offline": self.offline,
+                "directory": self.directory,
+                "entries": len(entries),
+                "bytes": sum(size for _mtime, size, _path in entries),
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "expired": self.expired,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "pid": os.getpid(),
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def simbad_cache_from_config(config):
+    return SimbadRegionCache(
+        config["SIMBAD_CACHE_DIR"],
+        ttl=float(config["SIMBAD_CACHE_TTL"]),
+        max_bytes=int(config["SIMBAD_CACHE_MAX_MB"]) * 1024 * 1024,
+        offline=bool(config["SIMBAD_OFFLINE"]),
+        enabled=bool(config["SIMBAD_CACHE_ENABLED"]),
+    )
+
+
+def configure_simbad_cache(config):
+    """Install the process-wide cache from an app config (or any mapping with the ``SIMBAD_*`` keys)."""
+    global _cache
+    with _cache_lock:
+        _cache = simbad_cache_from_config(config)
+    return _cache
+
+
+def get_simbad_cache():
+    """Return the process-wide cache; processes that never ran ``create_app`` build it from the environment."""
+    global _cache
+    if _cache is None:
+        from AstroSpace.config import Config
+
+        with _cache_lock:
+            if _cache is None:
+                _cache = simbad_cache_from_config(vars(Config))
+    return _cache
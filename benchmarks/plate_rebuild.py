@@ -0,0 +1,150 @@
+"""Measure plate-solve artifact rebuild throughput at different worker counts.
+
+Builds synthetic images with TAN WCS headers and rebuilds their thumbnails and
+overlays through ``PlateRebuildPool``. SIMBAD is replaced by a random catalogue
+returned after ``--latency`` seconds, unless ``--live`` is given.
+
+    python benchmarks/plate_rebuild.py --images 40 --workers 1 2 4 --simbad-concurrency 4
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from astropy.wcs import WCS
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from AstroSpace.services.artifact_fingerprints import PLATE_ARTIFACTS  # noqa: E402
+from AstroSpace.services.plate_rebuild import PlateRebuildPool  # noqa: E402
+from AstroSpace.utils.platesolve import query_overlay_catalogues  # noqa: E402
+from AstroSpace.utils.simbad_cache import configure_simbad_cache  # noqa: E402
+
+
+def synthetic_header(index, width, height):
+    wcs = WCS(naxis=2)
+    wcs.wcs.ctype = ["RA---TAN", "DEC--TAN"]
+    wcs.wcs.crval = [(10.0 + index * 7.3) % 360.0, -60.0 + (index * 11.0) % 120.0]
+    wcs.wcs.crpix = [width / 2, height / 2]
+    wcs.wcs.cdelt = [-0.0005, 0.0005]
+    header = wcs.to_header()
+    header["IMAGEW"] = width
+    header["IMAGEH"] = height
+    return header.tostring()
+
+
+def synthetic_items(directory, count, width, height):
+    rng = np.random.default_rng(0)
+    items = []
+    for index in range(count):
+        public_path = f"1/bench_{index}.png"
+        image_path = os.path.join(directory, f"bench_{index}.png")
+        pixels = rng.integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+        Image.fromarray(pixels).save(image_path)
+        items.append((index, image_path, public_path, synthetic_header(index, width, height), PLATE_ARTIFACTS))
+    return items
+
+
+class SimulatedSimbad:
+    """Answers like ``query_overlay_catalogues`` after a fixed network delay."""
+
+    def __init__(self, latency, objects=200, stars=2000):
+        self.latency = latency
+        self.objects = objects
+        self.stars = stars
+
+    def __call__(self, field):
+        # Objects and stars are two round trips.
+        time.sleep(2 * self.latency)
+        rng = np.random.default_rng(int(field["ra_center"] * 1000))
+        ra_min, ra_max = field["ra_limits"]
+        dec_min, dec_max = field["dec_limits"]
+
+        def positions(count):
+            return rng.uniform(ra_min, ra_max, count), rng.uniform(dec_min, dec_max, count)
+
+        ra, dec = positions(self.objects)
+        objects = pd.DataFrame(
+            {
+                "main_id": [f"OBJ {i}" for i in range(self.objects)],
+                "ids": [f"OBJ {i}|NGC {i}" for i in range(self.objects)],
+                "ra": ra,
+                "dec": dec,
+                "galdim_majaxis": rng.uniform(0.5, 10.0, self.objects),
+                "galdim_minaxis": rng.uniform(0.5, 5.0, self.objects),
+                "galdim_angle": rng.uniform(0, 180, self.objects),
+                "otype": rng.choice(["G", "Neb", "OpC"], self.objects),
+            }
+        )
+        ra, dec = positions(self.stars)
+        b = rng.uniform(0, 15, self.stars)
+        stars = pd.DataFrame(
+            {
+                "main_id": [f"HD {i}" for i in range(self.stars)],
+                "ra": ra,
+                "dec": dec,
+                "otype": rng.choice(["*", "V*", "PM*"], self.stars),
+                "plx_value": rng.uniform(0.5, 50, self.stars),
+                "U": b + rng.uniform(-0.5, 0.5, self.stars),
+                "B": b,
+                "V": b - rng.uniform(-0.3, 1.8, self.stars),
+                "sp_type": rng.choice(["G2V", "K0III", "M1V", "A0V", ""], self.stars),
+            }
+        )
+        return objects, stars
+
+
+def run(items, workers, simbad_concurrency, query):
+    with PlateRebuildPool(workers, simbad_concurrency, query=query) as pool:
+        # Start the worker processes before timing, as a long maintenance job amortises them.
+        pool.rebuild(items[:workers])
+        started = time.perf_counter()
+        results = pool.rebuild(items)
+        elapsed = time.perf_counter() - started
+    failed = [error for _key, artifacts, _attempts, error in results if artifacts is None]
+    if failed:
+        raise SystemExit(f"{len(failed)} rebuilds failed, first: {failed[0]}")
+    return len(items) / elapsed * 60, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=24)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--simbad-concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=1.0, help="simulated seconds per SIMBAD round trip")
+    parser.add_argument("--size", type=int, nargs=2, default=[3000, 2000], metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--live", action="store_true", help="query the real SIMBAD service")
+    parser.add_argument(
+        "--simbad-cache", metavar="DIR", help="with --live, serve repeated queries from a SIMBAD cache in DIR"
+    )
+    args = parser.parse_args(argv)
+
+    # Without a cache every worker count pays for the same SIMBAD round trips.
+    configure_simbad_cache(
+        {
+            "SIMBAD_CACHE_DIR": args.simbad_cache or "",
+            "SIMBAD_CACHE_TTL": 0,
+            "SIMBAD_CACHE_MAX_MB": 0,
+            "SIMBAD_OFFLINE": False,
+            "SIMBAD_CACHE_ENABLED": bool(args.simbad_cache),
+        }
+    )
+
+    query = query_overlay_catalogues if args.live else SimulatedSimbad(args.latency)
+    with tempfile.TemporaryDirectory() as directory:
+        items = synthetic_items(directory, args.images, *args.size)
+        print(f"{args.images} images of {args.size[0]}x{args.size[1]}, SIMBAD concurrency {args.simbad_concurrency}")
+        print(f"{'workers':>8} {'seconds':>9} {'images/min':>11}")
+        for workers in args.workers:
+            rate, elapsed = run(items, workers, args.simbad_concurrency, query)
+            print(f"{workers:>8} {elapsed:>9.1f} {rate:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
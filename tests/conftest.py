@@ -18,6 +18,7 @@ def app(monkeypatch, tmp_path):
             "DB_PORT": 5432,
             "TITLE": "AstroSpace Test",
             "UPLOAD_PATH": str(tmp_path / "uploads"),
+            "INGEST_STAGING_PATH": str(tmp_path / "ingest_staging"),
             "SKIP_DB_INIT": True,
         }
     )
@@ -26,3 +27,65 @@ def app(monkeypatch, tmp_path):
 @pytest.fixture
 def client(app):
     return app.test_client()
+
+
+class RecordingCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = conn.rowcount
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def execute(self, query, params=None):
+        self.conn.executed.append((" ".join(str(query).split()), params))
+
+    def fetchone(self):
+        return self.conn.results.pop(0) if self.conn.results else None
+
+    def fetchall(self):
+        return self.conn.results.pop(0) if self.conn.results else []
+
+    def close(self):
+        pass
+
+
+class RecordingConnection:
+    """Stands in for a psycopg2 connection.
+
+    Every statement is recorded in ``executed`` as ``(query, params)`` with its
+    whitespace collapsed, and every ``fetchone``/``fetchall`` answers with the
+    next entry of ``results``.
+    """
+
+    def __init__(self, results=(), rowcount=0):
+        self.results = list(results)
+        self.rowcount = rowcount
+        self.executed = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.closed = False
+
+    def cursor(self):
+        return RecordingCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+    def queries(self, fragment):
+        return [(query, params) for query, params in self.executed if fragment in query]
+
+
+@pytest.fixture
+def recording_conn():
+    """``recording_conn(results=(), rowcount=0)`` builds a ``RecordingConnection``."""
+    return RecordingConnection
@@ -1,3 +1,4 @@
+import hashlib
 from pathlib import Path
 
 
@@ -15,30 +16,54 @@ class FakeCursor:
     def execute(self, query, params=None):
         sql = str(query)
         self.db.executed.append((sql, params))
-        if "SELECT id, guide_log" in sql:
-            self.rows = list(self.db.guiding_rows)
-        elif "SELECT id, image_path, header_json" in sql:
-            self.rows = list(self.db.plate_rows)
+        after = (params or {}).get("after", 0) if isinstance(params, dict) else 0
+        if "SELECT COUNT(*)" in sql:
+            source = self.db.guiding_rows if "guide_log" in sql else self.db.plate_rows
+            self.rows = [{"total": len(source)}]
+        elif "SELECT id, guide_log" in sql:
+            self.rows = [row for row in self.db.guiding_rows if row["id"] > after]
+        elif "SELECT i.id, i.image_path, a.header_json" in sql:
+            self.rows = [row for row in self.db.plate_rows if row["id"] > after]
         elif "SELECT image_path, image_thumbnail, starless_image_path" in sql:
             self.rows = list(self.db.image_rows)
         elif "SELECT media_path" in sql:
             self.rows = list(self.db.related_media_rows)
         elif "SELECT display_image" in sql:
             self.rows = list(self.db.user_rows)
+        elif "AS fits_path" in sql:
+            self.rows = list(self.db.ingest_job_rows)
+        elif "RETURNING cancel_requested" in sql:
+            self.db.checkpoints.append((params[0].adapted, params[1].adapted))
+            self.rows = [{"cancel_requested": len(self.db.checkpoints) >= self.db.cancel_after}]
         else:
             self.rows = []
 
     def fetchall(self):
         return self.rows
 
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
 
 class FakeDB:
-    def __init__(self, guiding_rows=None, plate_rows=None, image_rows=None, related_media_rows=None, user_rows=None):
+    def __init__(
+        self,
+        guiding_rows=None,
+        plate_rows=None,
+        image_rows=None,
+        related_media_rows=None,
+        user_rows=None,
+        ingest_job_rows=None,
+        cancel_after=float("inf"),
+    ):
         self.guiding_rows = guiding_rows or []
         self.plate_rows = plate_rows or []
         self.image_rows = image_rows or []
         self.related_media_rows = related_media_rows or []
         self.user_rows = user_rows or []
+        self.ingest_job_rows = ingest_job_rows or []
+        self.cancel_after = cancel_after
+        self.checkpoints = []
         self.executed = []
         self.commit_count = 0
         self.rollback_count = 0
@@ -52,9 +77,26 @@ class FakeDB:
     def rollback(self):
         self.rollback_count += 1
 
+    def queries(self, fragment):
+        return [call for call in self.executed if fragment in call[0]]
+
+
+def _job(kind, **overrides):
+    job = {"id": 3, "kind": kind, "payload": {}, "image_id": None, "progress": None, "checkpoint": None}
+    job.update(overrides)
+    return job
+
+
+def _run(app, db, job, upload_root):
+    from AstroSpace.services.maintenance import run_maintenance_job
+
+    app.config["UPLOAD_PATH"] = str(upload_root)
+    with app.app_context():
+        return run_maintenance_job(db, job)
+
 
 def test_collect_orphan_image_uploads_only_returns_unreferenced_images(tmp_path):
-    from AstroSpace.profile.private import collect_orphan_image_uploads
+    from AstroSpace.services.maintenance import collect_orphan_image_uploads
 
     upload_root = tmp_path / "uploads"
     user_dir = upload_root / "1"
@@ -76,8 +118,8 @@ def test_collect_orphan_image_uploads_only_returns_unreferenced_images(tmp_path)
     assert orphans == [str(orphan)]
 
 
-def test_rebuild_all_guiding_plots_updates_images_with_existing_logs(tmp_path, monkeypatch):
-    from AstroSpace.profile import private
+def test_guiding_rebuild_job_updates_images_with_existing_logs(app, tmp_path, monkeypatch):
+    from AstroSpace.services import maintenance
 
     upload_root = tmp_path / "uploads"
     user_dir = upload_root / "1"
@@ -88,81 +130,231 @@ def test_rebuild_all_guiding_plots_updates_images_with_existing_logs(tmp_path, m
     db = FakeDB(
         guiding_rows=[
             {"id": 7, "guide_log": "1/guide1.txt,1/guide2.txt"},
+            {"id": 8, "guide_log": "1/missing.txt"},
         ]
     )
 
     monkeypatch.setattr(
-        private,
+        maintenance,
         "build_plotly_payloads",
         lambda paths: ({"kind": "guiding", "paths": paths}, {"kind": "calibration"}),
     )
 
-    stats = private.rebuild_all_guiding_plots(db, str(upload_root))
+    progress = _run(app, db, _job(maintenance.MAINTENANCE_GUIDING), upload_root)
+
+    assert progress == {"total": 2, "processed": 2, "updated": 1, "skipped": 1, "failed": 0}
+    artifact_calls = db.queries("INSERT INTO image_artifacts")
+    assert len(artifact_calls) == 1
+    assert artifact_calls[0][1][0] == 7
+    assert artifact_calls[0][1][1].adapted["kind"] == "guiding"
+    update_calls = db.queries("UPDATE images")
+    assert update_calls == [("UPDATE images SET edited_at = CURRENT_TIMESTAMP WHERE id = %s", (7,))]
+    skipped = db.queries("INSERT INTO job_items")[0][1]
+    assert skipped == (3, "8", 8, "skipped", 1, "Missing guide log(s): 1/missing.txt")
+    # One checkpoint for the total, then one per image, each in its own commit.
+    assert [checkpoint for _progress, checkpoint in db.checkpoints] == [{}, {"after": 7}, {"after": 8}]
+    assert db.commit_count == 3
+
+
+class FakePlateRebuildPool:
+    def __init__(self, processes, simbad_concurrency, attempts=1):
+        self.attempts = attempts
+        self.batches = []
+        self.closed = False
+        FakePlateRebuildPool.instances.append(self)
+
+    def rebuild(self, items):
+        self.batches.append([(key, tuple(parts)) for key, _image_path, _public_path, _header_json, parts in items])
+        results = []
+        for key, _image_path, public_path, header_json, parts in items:
+            if header_json == "BROKEN":
+                results.append((key, None, self.attempts, "ValueError: corrupt header"))
+                continue
+            artifacts = {"thumbnail_path": public_path.replace(".png", "_thumbnail.jpg"), "pixel_scale": 1.23}
+            artifacts["header_json"] = "HEADER+DISPLAY"
+            if "overlays" in parts:
+                artifacts["overlays_json"] = '{"ok": true}'
+            results.append((key, artifacts, 1, None))
+        return results
+
+    def close(self):
+        self.closed = True
+
+
+def _plate_solve_run(app, db, tmp_path, monkeypatch, batch_size=20, **payload):
+    from AstroSpace.services import maintenance
+
+    FakePlateRebuildPool.instances = []
+    monkeypatch.setattr(maintenance, "PlateRebuildPool", FakePlateRebuildPool)
+    app.config.update(PLATE_REBUILD_PROCESSES=2, SIMBAD_CONCURRENCY=3, PLATE_REBUILD_BATCH_SIZE=batch_size)
+    upload_root = tmp_path / "uploads"
+    (upload_root / "1").mkdir(parents=True, exist_ok=True)
+    for row in db.plate_rows:
+        if "missing" not in row["image_path"]:
+            (upload_root / row["image_path"]).write_text("image", encoding="utf-8")
+    return _run(app, db, _job(maintenance.MAINTENANCE_PLATE_SOLVE, payload=payload), upload_root)
 
-    assert stats["updated"] == 1
-    assert stats["skipped"] == 0
-    assert db.commit_count == 1
-    update_calls = [call for call in db.executed if "UPDATE images" in call[0]]
-    assert len(update_calls) == 1
-    assert update_calls[0][1][2] == 7
 
+def _fresh_fingerprints(image_path, header_json):
+    from AstroSpace.services.artifact_fingerprints import overlays_fingerprint, thumbnail_fingerprint
 
-def test_rebuild_all_plate_solves_updates_images_with_existing_headers(app, tmp_path, monkeypatch):
-    from AstroSpace.profile import private
+    source_hash = hashlib.sha256(b"image").hexdigest()
+    return {
+        "thumbnail": thumbnail_fingerprint(source_hash, image_path.replace(".png", "_thumbnail.jpg")),
+        "overlays": overlays_fingerprint(header_json),
+    }
 
-    upload_root = tmp_path / "uploads"
-    user_dir = upload_root / "1"
-    user_dir.mkdir(parents=True)
-    (user_dir / "image.png").write_text("image", encoding="utf-8")
+
+def test_plate_solve_rebuild_job_updates_images_with_existing_headers(app, tmp_path, monkeypatch):
+    db = FakeDB(plate_rows=[{"id": 11, "image_path": "1/image.png", "header_json": "HEADER"}])
+
+    progress = _plate_solve_run(app, db, tmp_path, monkeypatch)
+
+    assert progress["updated"] == 1
+    assert progress["skipped"] == 0
+    update_calls = db.queries("UPDATE images")
+    assert len(update_calls) == 1
+    # "HEADER+DISPLAY" has no celestial WCS, so the sky position is cleared.
+    assert update_calls[0][1] == ("1/image_thumbnail.jpg", 1.23, None, None, None, None, None, 11)
+    artifact_query, artifact_params = db.queries("INSERT INTO image_artifacts")[0]
+    assert "(image_id, header_json, overlays_json, artifact_fingerprints)" in artifact_query
+    assert artifact_params[:3] == (11, "HEADER+DISPLAY", '{"ok": true}')
+    assert artifact_params[3].adapted == _fresh_fingerprints("1/image.png", "HEADER+DISPLAY")
+    assert FakePlateRebuildPool.instances[0].closed is True
+
+
+def test_plate_solve_rebuild_job_skips_missing_files_and_records_failures(app, tmp_path, monkeypatch):
+    from AstroSpace.services import maintenance
 
     db = FakeDB(
         plate_rows=[
-            {"id": 11, "image_path": "1/image.png", "header_json": "HEADER"},
+            {"id": 12, "image_path": "1/missing.jpg", "header_json": "HEADER"},
+            {"id": 13, "image_path": "1/broken.png", "header_json": "BROKEN"},
         ]
     )
 
-    monkeypatch.setattr(
-        private,
-        "rebuild_plate_solve_artifacts",
-        lambda _abs_path, _public_path, _header_json: (
-            "1/image_thumbnail.jpg",
-            1.23,
-            '{"ok": true}',
-            "HEADER+DISPLAY",
-        ),
+    progress = _plate_solve_run(app, db, tmp_path, monkeypatch)
+
+    assert progress == {"total": 2, "processed": 2, "updated": 0, "skipped": 1, "failed": 1}
+    assert FakePlateRebuildPool.instances[0].batches == [[(13, ("thumbnail", "overlays"))]]
+    items = [params for _query, params in db.queries("INSERT INTO job_items")]
+    assert items == [
+        (3, "12", 12, "skipped", 1, "Missing image file: 1/missing.jpg"),
+        (3, "13", 13, "failed", maintenance.MAINTENANCE_ITEM_ATTEMPTS, "ValueError: corrupt header"),
+    ]
+    assert db.queries("UPDATE images") == []
+
+
+def test_plate_solve_rebuild_job_commits_once_per_batch(app, tmp_path, monkeypatch):
+    db = FakeDB(
+        plate_rows=[{"id": image_id, "image_path": f"1/{image_id}.png", "header_json": "HEADER"} for image_id in range(1, 6)]
     )
 
-    with app.app_context():
-        stats = private.rebuild_all_plate_solves(db, str(upload_root))
+    progress = _plate_solve_run(app, db, tmp_path, monkeypatch, batch_size=2)
+
+    assert progress["updated"] == 5
+    assert [[key for key, _parts in batch] for batch in FakePlateRebuildPool.instances[0].batches] == [[1, 2], [3, 4], [5]]
+    # The total, then one checkpoint per batch; each write sits under its own savepoint.
+    assert [checkpoint for _progress, checkpoint in db.checkpoints] == [{}, {"after": 2}, {"after": 4}, {"after": 5}]
+    assert db.commit_count == 4
+    assert len(db.queries("RELEASE SAVEPOINT")) == 5
+    assert len(db.queries("INSERT INTO cache_versions")) == 3
+
+
+def _fingerprinted_rows(tmp_path):
+    """Image 21 is up to date, 22 has a changed header and 23 lost its thumbnail."""
+    rows = []
+    for image_id in (21, 22, 23):
+        image_path = f"1/{image_id}.png"
+        rows.append(
+            {
+                "id": image_id,
+                "image_path": image_path,
+                "header_json": "HEADER-EDITED" if image_id == 22 else "HEADER",
+                "artifact_fingerprints": _fresh_fingerprints(image_path, "HEADER"),
+            }
+        )
+    thumbnails = tmp_path / "uploads" / "1"
+    thumbnails.mkdir(parents=True)
+    for image_id in (21, 22):
+        (thumbnails / f"{image_id}_thumbnail.jpg").write_text("thumb", encoding="utf-8")
+    return rows
+
+
+def test_plate_solve_rebuild_job_only_rebuilds_stale_artifacts(app, tmp_path, monkeypatch):
+    db = FakeDB(plate_rows=_fingerprinted_rows(tmp_path))
+
+    progress = _plate_solve_run(app, db, tmp_path, monkeypatch)
+
+    assert progress == {"total": 3, "processed": 3, "updated": 2, "skipped": 0, "failed": 0, "up_to_date": 1}
+    assert FakePlateRebuildPool.instances[0].batches == [[(22, ("overlays",)), (23, ("thumbnail",))]]
+    thumbnail_only = db.queries("INSERT INTO image_artifacts")[1]
+    # Without new overlays the stored header is left alone.
+    assert "(image_id, artifact_fingerprints)" in thumbnail_only[0]
+    assert db.queries("INSERT INTO job_items") == []
 
-    assert stats["updated"] == 1
-    assert stats["skipped"] == 0
-    assert db.commit_count == 1
-    update_calls = [call for call in db.executed if "UPDATE images" in call[0]]
-    assert len(update_calls) == 1
-    assert update_calls[0][1] == ("1/image_thumbnail.jpg", 1.23, '{"ok": true}', "HEADER+DISPLAY", 11)
 
+def test_plate_solve_rebuild_job_force_and_dry_run(app, tmp_path, monkeypatch):
+    forced = FakeDB(plate_rows=_fingerprinted_rows(tmp_path))
+    progress = _plate_solve_run(app, forced, tmp_path, monkeypatch, force=True)
+    assert progress["updated"] == 3
+    assert {parts for _key, parts in FakePlateRebuildPool.instances[0].batches[0]} == {("thumbnail", "overlays")}
 
-def test_rebuild_all_plate_solves_skips_missing_image_files(app, tmp_path):
-    from AstroSpace.profile.private import rebuild_all_plate_solves
+    dry = FakeDB(plate_rows=_fingerprinted_rows(tmp_path / "dry"))
+    progress = _plate_solve_run(app, dry, tmp_path / "dry", monkeypatch, dry_run=True)
+    assert progress == {"total": 3, "processed": 3, "updated": 0, "skipped": 0, "failed": 0, "up_to_date": 1, "stale": 2}
+    assert FakePlateRebuildPool.instances == []
+    assert dry.queries("UPDATE images") == []
 
+
+def test_count_stale_plate_solves_reports_without_writing(tmp_path):
+    from AstroSpace.services.maintenance import count_stale_plate_solves
+
+    rows = _fingerprinted_rows(tmp_path)
+    rows.append({"id": 24, "image_path": "1/missing.png", "header_json": "HEADER", "artifact_fingerprints": None})
+    for row in rows[:3]:
+        (tmp_path / "uploads" / row["image_path"]).write_text("image", encoding="utf-8")
+    db = FakeDB(plate_rows=rows)
+
+    counts = count_stale_plate_solves(db, str(tmp_path / "uploads"))
+
+    assert counts == {"total": 4, "stale": 2, "up_to_date": 1, "skipped": 1}
+    assert db.commit_count == 0
+
+
+def test_maintenance_job_resumes_from_its_checkpoint_and_stops_when_cancelled(app, tmp_path, monkeypatch):
+    from AstroSpace.services import maintenance
+    from AstroSpace.services.jobs import JobCancelled
+
+    upload_root = tmp_path / "uploads"
+    (upload_root / "1").mkdir(parents=True)
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (upload_root / "1" / name).write_text("x", encoding="utf-8")
     db = FakeDB(
-        plate_rows=[
-            {"id": 12, "image_path": "1/missing.jpg", "header_json": "HEADER"},
-        ]
+        guiding_rows=[{"id": image_id, "guide_log": f"1/{name}"} for image_id, name in ((4, "a.txt"), (5, "b.txt"), (6, "c.txt"))],
+        cancel_after=1,
+    )
+    parsed = []
+    monkeypatch.setattr(maintenance, "build_plotly_payloads", lambda paths: parsed.append(paths) or ({}, {}))
+    job = _job(
+        maintenance.MAINTENANCE_GUIDING,
+        progress={"total": 3, "processed": 1, "updated": 1, "skipped": 0, "failed": 0},
+        checkpoint={"after": 4},
     )
 
-    with app.app_context():
-        stats = rebuild_all_plate_solves(db, str(tmp_path / "uploads"))
+    try:
+        _run(app, db, job, upload_root)
+    except JobCancelled as exc:
+        assert exc.result["processed"] == 2
+    else:
+        raise AssertionError("Expected the job to stop once cancel was requested.")
 
-    assert stats["updated"] == 0
-    assert stats["skipped"] == 1
-    assert stats["missing_files"] == [{"image_id": 12, "path": "1/missing.jpg"}]
-    assert db.commit_count == 0
+    assert [Path(path).name for path in parsed] == ["b.txt"]
+    assert db.checkpoints[-1][1] == {"after": 5}
 
 
-def test_purge_unbound_image_uploads_deletes_only_unreferenced_files(tmp_path):
-    from AstroSpace.profile.private import purge_unbound_image_uploads
+def test_purge_job_deletes_only_unreferenced_files(app, tmp_path):
+    from AstroSpace.services.maintenance import MAINTENANCE_PURGE_UPLOADS
 
     upload_root = tmp_path / "uploads"
     user_dir = upload_root / "1"
@@ -184,10 +376,10 @@ def test_purge_unbound_image_uploads_deletes_only_unreferenced_files(tmp_path):
         user_rows=[{"display_image": "1/profile_thumbnail.jpg"}],
     )
 
-    stats = purge_unbound_image_uploads(db, str(upload_root))
+    progress = _run(app, db, _job(MAINTENANCE_PURGE_UPLOADS), upload_root)
 
-    assert stats["deleted"] == 1
-    assert stats["deleted_paths"] == ["1/orphan.jpg"]
+    assert progress["updated"] == 1
+    assert db.checkpoints[-1][1] == {"after": "1/orphan.jpg"}
     assert image_path.exists()
     assert thumb_path.exists()
     assert starless_path.exists()
@@ -196,6 +388,75 @@ def test_purge_unbound_image_uploads_deletes_only_unreferenced_files(tmp_path):
     assert not orphan_path.exists()
 
 
+def test_purge_job_sweeps_staged_headers_no_ingest_job_needs(app, tmp_path):
+    import os
+
+    from AstroSpace.services.maintenance import INGEST_STAGING_GRACE, MAINTENANCE_PURGE_UPLOADS
+
+    staging_root = tmp_path / "ingest_staging"
+    user_dir = staging_root / "1"
+    user_dir.mkdir(parents=True)
+    leftover = user_dir / "leftover.fits"
+    queued = user_dir / "queued.xisf"
+    uploading = user_dir / "uploading.fits"
+    for path in [leftover, queued, uploading]:
+        path.write_bytes(b"fits")
+    old = os.path.getmtime(uploading) - INGEST_STAGING_GRACE - 1
+    for path in [leftover, queued]:
+        os.utime(path, (old, old))
+    db = FakeDB(ingest_job_rows=[{"fits_path": str(queued)}, {"fits_path": None}])
+    app.config["INGEST_STAGING_PATH"] = str(staging_root)
+
+    progress = _run(app, db, _job(MAINTENANCE_PURGE_UPLOADS), tmp_path / "uploads")
+
+    assert progress["updated"] == 1
+    assert db.checkpoints[-1][1] == {"after": "ingest-staging/1/leftover.fits"}
+    assert not leftover.exists()
+    assert queued.exists()
+    assert uploading.exists()
+
+
+def test_redo_plate_solving_queues_a_job_instead_of_running_inline(app, monkeypatch):
+    from flask import g
+
+    from AstroSpace.profile import private
+
+    queued = []
+    monkeypatch.setattr(
+        private,
+        "queue_maintenance_job",
+        lambda kind, **kwargs: queued.append(kind) or (21, len(queued) == 1),
+    )
+    monkeypatch.setattr(
+        private,
+        "fetch_job",
+        lambda job_id: {
+            "id": job_id,
+            "kind": "maintenance_plate_solve",
+            "status": "queued",
+            "image_id": None,
+            "attempts": 0,
+            "max_attempts": 5,
+            "progress": None,
+            "cancel_requested": False,
+            "result": None,
+            "error": None,
+            "created_at": None,
+            "finished_at": None,
+        },
+    )
+
+    with app.test_request_context("/private/admin/redo_plate_solving", method="POST"):
+        g.user = {"id": 1, "username": "admin", "admin": True}
+        first = app.make_response(private.redo_plate_solving())
+        second = app.make_response(private.redo_plate_solving())
+
+    assert queued == ["maintenance_plate_solve", "maintenance_plate_solve"]
+    assert first.status_code == 202
+    assert first.get_json()["job"]["id"] == 21
+    assert second.status_code == 409
+
+
 def test_profile_template_includes_plate_solving_admin_action(app):
     from flask import render_template
 
@@ -1,4 +1,6 @@
-from datetime import date
+from datetime import date, datetime
+
+import pytest
 
 
 def test_build_collection_query_includes_requested_filters():
@@ -84,7 +86,7 @@ def test_collection_route_renders_active_filters_and_passes_normalized_values(cl
     }
     captured_filters = {}
 
-    def fake_get_collection_images(filters):
+    def fake_get_collection_page(filters, after=None):
         captured_filters.update(filters)
         return [
             {
@@ -96,10 +98,11 @@ def test_collection_route_renders_active_filters_and_passes_normalized_values(cl
                 "image_thumbnail": "1/rosette-thumb.jpg",
                 "created_at": date(2026, 1, 31),
             }
-        ]
+        ], None
 
     monkeypatch.setattr(blog, "get_collection_filter_metadata", lambda: filter_metadata)
-    monkeypatch.setattr(blog, "get_collection_images", fake_get_collection_images)
+    monkeypatch.setattr(blog, "get_collection_page", fake_get_collection_page)
+    monkeypatch.setattr(blog, "count_collection_images", lambda _filters: 1)
 
     response = client.get(
         "/collection"
@@ -153,3 +156,186 @@ def test_collection_route_renders_active_filters_and_passes_normalized_values(cl
     assert "Rosette Nebula - RGB blend" in page
     assert 'option value="Emission Nebula" selected' in page
     assert 'option value="refractor" selected' in page
+
+
+def test_collection_filter_metadata_is_cached_until_invalidated(app, monkeypatch):
+    from AstroSpace.services import collection_filters
+
+    loads = []
+
+    def fake_load():
+        loads.append(True)
+        return {"dropdowns": {"author": ["tester"]}, "counts": {"author": {"tester": 2}}, "ranges": {}}
+
+    monkeypatch.setattr(collection_filters, "load_collection_filter_metadata", fake_load)
+    monkeypatch.setattr(collection_filters, "fetch_cache_version", lambda _conn, _name: 1)
+    monkeypatch.setattr(collection_filters, "get_conn", lambda: None)
+
+    with app.app_context():
+        first = collection_filters.get_collection_filter_metadata()
+        second = collection_filters.get_collection_filter_metadata()
+        collection_filters.forget_collection_filter_metadata()
+        collection_filters.get_collection_filter_metadata()
+
+    assert first is second
+    assert len(loads) == 2
+
+
+def test_collection_route_shows_facet_counts(client, monkeypatch):
+    from AstroSpace import blog
+
+    filter_metadata = {
+        "dropdowns": {"object_type": ["Emission Nebula", "Galaxy"]},
+        "counts": {"object_type": {"Emission Nebula": 4, "Galaxy": 1}},
+        "ranges": {"focal_length": {}, "pixel_scale": {}, "capture_dates": {}},
+    }
+    monkeypatch.setattr(blog, "get_collection_filter_metadata", lambda: filter_metadata)
+    monkeypatch.setattr(blog, "get_collection_page", lambda _filters, after=None: ([], None))
+    monkeypatch.setattr(blog, "count_collection_images", lambda _filters: 0)
+
+    page = client.get("/collection").get_data(as_text=True)
+
+    assert '<option value="Emission Nebula" >Emission Nebula (4)</option>' in page
+    assert '<option value="Galaxy" >Galaxy (1)</option>' in page
+
+
+def test_build_collection_query_adds_keyset_and_limit_after_filters():
+    from AstroSpace.repositories.images import build_collection_query
+
+    after = (datetime(2026, 1, 31, 21, 0), 7)
+    query, params = build_collection_query({"author": "tester"}, after=after, limit=49)
+
+    assert "DISTINCT ON" not in query
+    assert "NOT EXISTS ( SELECT 1 FROM images newer WHERE newer.title = i.title" in " ".join(query.split())
+    assert "AND i.author = %s\n        AND (i.created_at, i.id) < (%s, %s)" in query
+    assert "ORDER BY i.created_at DESC, i.id DESC" in query
+    assert query.rstrip().endswith("LIMIT %s")
+    assert params == ["tester", after[0], 7, 49]
+
+
+def test_collection_route_caps_the_result_count(client, monkeypatch):
+    from AstroSpace import blog
+    from AstroSpace.constants import COLLECTION_COUNT_CAP
+
+    filter_metadata = {
+        "dropdowns": {},
+        "counts": {},
+        "ranges": {"focal_length": {}, "pixel_scale": {}, "capture_dates": {}},
+    }
+    monkeypatch.setattr(blog, "get_collection_filter_metadata", lambda: filter_metadata)
+    monkeypatch.setattr(blog, "get_collection_page", lambda _filters, after=None: ([], None))
+    monkeypatch.setattr(blog, "count_collection_images", lambda _filters: COLLECTION_COUNT_CAP + 1)
+
+    page = client.get("/collection").get_data(as_text=True)
+
+    assert f"{COLLECTION_COUNT_CAP}+ images matched." in page
+
+
+def test_collection_cursor_round_trips_and_rejects_garbage():
+    from AstroSpace.services.collection_filters import decode_collection_cursor, encode_collection_cursor
+
+    after = (datetime(2026, 1, 31, 21, 0, 5), 7)
+
+    assert decode_collection_cursor(encode_collection_cursor(after)) == after
+    assert decode_collection_cursor("not-a-cursor") is None
+
+
+def test_collection_page_endpoint_returns_cards_and_next_cursor(client, monkeypatch):
+    from AstroSpace import blog
+    from AstroSpace.services.collection_filters import decode_collection_cursor, encode_collection_cursor
+
+    filter_metadata = {
+        "dropdowns": {"author": ["tester"]},
+        "ranges": {"focal_length": {}, "pixel_scale": {}, "capture_dates": {}},
+    }
+    requested = {}
+    next_after = (datetime(2026, 1, 2, 20, 0), 5)
+
+    def fake_get_collection_page(filters, after=None):
+        requested["filters"] = filters
+        requested["after"] = after
+        return [
+            {
+                "id": 6,
+                "title": "Rosette Nebula",
+                "short_description": None,
+                "slug": "rosette-nebula",
+                "image_path": "1\\rosette.jpg",
+                "image_thumbnail": None,
+                "created_at": datetime(2026, 1, 3, 20, 0),
+            }
+        ], next_after
+
+    monkeypatch.setattr(blog, "get_collection_filter_metadata", lambda: filter_metadata)
+    monkeypatch.setattr(blog, "get_collection_page", fake_get_collection_page)
+    cursor = encode_collection_cursor((datetime(2026, 1, 4, 20, 0), 8))
+
+    response = client.get(f"/collection/page?author=tester&cursor={cursor}")
+
+    payload = response.get_json()
+    assert response.status_code == 200
+    assert requested["filters"]["author"] == "tester"
+    assert requested["after"] == (datetime(2026, 1, 4, 20, 0), 8)
+    assert payload["images"] == [
+        {
+            "id": 6,
+            "title": "Rosette Nebula",
+            "short_description": None,
+            "url": "/image/6/rosette-nebula",
+            "thumbnail_url": "/uploads/1/rosette.jpg",
+        }
+    ]
+    assert decode_collection_cursor(payload["next_cursor"]) == next_after
+
+    assert client.get("/collection/page?cursor=garbage").status_code == 400
+
+
+def test_collection_route_links_to_next_page_with_filters(client, monkeypatch):
+    from AstroSpace import blog
+
+    filter_metadata = {
+        "dropdowns": {"author": ["tester"]},
+        "ranges": {"focal_length": {}, "pixel_scale": {}, "capture_dates": {}},
+    }
+    card = {
+        "id": 6,
+        "title": "Rosette Nebula",
+        "short_description": None,
+        "slug": "rosette-nebula",
+        "image_path": "1/rosette.jpg",
+        "image_thumbnail": "1/rosette-thumb.jpg",
+        "created_at": datetime(2026, 1, 3, 20, 0),
+    }
+    monkeypatch.setattr(blog, "get_collection_filter_metadata", lambda: filter_metadata)
+    monkeypatch.setattr(
+        blog,
+        "get_collection_page",
+        lambda _filters, after=None: ([card], (card["created_at"], card["id"])),
+    )
+    monkeypatch.setattr(blog, "count_collection_images", lambda _filters: 60)
+
+    page = client.get("/collection?author=tester").get_data(as_text=True)
+
+    assert "60 images matched." in page
+    assert 'id="collectionLoadMore"' in page
+    assert 'data-page-url="/collection/page?author=tester"' in page
+    assert "/collection?author=tester&amp;cursor=" in page
+
+
+def test_collection_continuation_page_is_not_counted_again(client, monkeypatch):
+    from AstroSpace import blog
+
+    filter_metadata = {
+        "dropdowns": {"author": ["tester"]},
+        "ranges": {"focal_length": {}, "pixel_scale": {}, "capture_dates": {}},
+    }
+    after = (datetime(2026, 1, 3, 20, 0), 6)
+    monkeypatch.setattr(blog, "get_collection_filter_metadata", lambda: filter_metadata)
+    monkeypatch.setattr(blog, "get_collection_page", lambda _filters, after=None: ([], None))
+    monkeypatch.setattr(blog, "count_collection_images", lambda _filters: pytest.fail("continuation page was counted"))
+
+    response = client.get(f"/collection?author=tester&cursor={blog.encode_collection_cursor(after)}")
+
+    assert response.status_code == 200
+    assert "matched." not in response.get_data(as_text=True)
+
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+from AstroSpace.services.cursors import decode_keyset_cursor, encode_keyset_cursor
+from AstroSpace.services.engagement import VisitorIdentity
+
+
+IDENTITY = VisitorIdentity(
+    visitor_hash="visitor-hash",
+    visitor_source="network",
+    ip_hash="ip-hash",
+    user_agent_hash="ua-hash",
+    visitor_cookie_hash=None,
+    visitor_cookie_value=None,
+    new_visitor_cookie=None,
+)
+START = datetime(2026, 10, 1, 21, 0)
+
+
+def make_comment(comment_id, image_id=None):
+    comment = {
+        "id": comment_id,
+        "commented_by": f"Visitor {comment_id}",
+        "comment": "Clear skies",
+        "commented_at": START + timedelta(minutes=comment_id),
+    }
+    if image_id is not None:
+        comment["image_id"] = image_id
+    return comment
+
+
+def test_detail_state_inlines_only_the_first_comments(monkeypatch, recording_conn):
+    from AstroSpace.services import engagement
+
+    summaries = [{"image_id": 7, "view_count": 1, "like_count": 0, "comment_count": 9, "liked": False}]
+    thread = [make_comment(comment_id, image_id=7) for comment_id in range(1, engagement.COMMENT_INLINE_LIMIT + 2)]
+    conn = recording_conn([summaries, thread])
+    monkeypatch.setattr(engagement, "get_conn", lambda: conn)
+
+    state = engagement.fetch_image_engagement_states([7], IDENTITY)[7]
+
+    assert [comment["id"] for comment in state["comments"]] == list(range(1, engagement.COMMENT_INLINE_LIMIT + 1))
+    last = state["comments"][-1]
+    assert state["comments_after"] == (last["commented_at"], last["id"])
+    assert conn.executed[1][1] == ([7], engagement.COMMENT_INLINE_LIMIT + 1)
+
+
+def test_comment_page_continues_after_keyset(monkeypatch, recording_conn):
+    from AstroSpace.services import engagement
+
+    conn = recording_conn([[make_comment(4), make_comment(5), make_comment(6)]])
+    monkeypatch.setattr(engagement, "get_conn", lambda: conn)
+    after = (START + timedelta(minutes=3), 3)
+
+    comments, next_after = engagement.fetch_image_comments_page(7, after=after, limit=2)
+
+    query, params = conn.executed[0]
+    assert "(commented_at, id) > (%s, %s)" in query
+    assert "ORDER BY commented_at ASC, id ASC" in query
+    assert params == (7, after[0], 3, 3)
+    assert [comment["id"] for comment in comments] == [4, 5]
+    assert next_after == (comments[-1]["commented_at"], 5)
+
+
+def test_comments_endpoint_serves_pages_and_rejects_bad_cursors(client, monkeypatch):
+    from AstroSpace import blog
+
+    calls = []
+
+    def fake_page(image_id, after=None, limit=None):
+        calls.append((image_id, after, limit))
+        return [make_comment(4)], (START + timedelta(minutes=4), 4)
+
+    monkeypatch.setattr(blog, "fetch_image_comments_page", fake_page)
+    after = (START + timedelta(minutes=3), 3)
+
+    response = client.get(f"/image/7/comments?cursor={encode_keyset_cursor(after)}&limit=500")
+
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload["comments"][0]["display_name"] == "Visitor 4"
+    assert decode_keyset_cursor(payload["next_cursor"]) == (START + timedelta(minutes=4), 4)
+    assert calls == [(7, after, blog.COMMENT_PAGE_SIZE_LIMIT)]
+
+    assert client.get("/image/7/comments?cursor=garbage").status_code == 400
@@ -54,7 +54,7 @@ def test_build_visitor_identity_generates_cookie_when_community_consent_is_enabl
 def test_like_endpoint_returns_counts_and_sets_visitor_cookie(app, monkeypatch):
     from AstroSpace import blog
 
-    monkeypatch.setattr(blog, "get_image_by_id", lambda image_id: {"id": image_id, "title": "Soul Nebula"})
+    monkeypatch.setattr(blog, "image_exists", lambda image_id: True)
     monkeypatch.setattr(
         blog,
         "build_visitor_identity",
@@ -96,7 +96,7 @@ def test_like_endpoint_returns_counts_and_sets_visitor_cookie(app, monkeypatch):
 def test_like_endpoint_can_remove_star_and_keep_visitor_cookie(app, monkeypatch):
     from AstroSpace import blog
 
-    monkeypatch.setattr(blog, "get_image_by_id", lambda image_id: {"id": image_id, "title": "Soul Nebula"})
+    monkeypatch.setattr(blog, "image_exists", lambda image_id: True)
     monkeypatch.setattr(
         blog,
         "build_visitor_identity",
@@ -140,7 +140,7 @@ def test_comment_endpoint_sets_commenter_cookie_when_preferences_are_enabled(app
 
     consent_cookie = json.dumps({"version": 1, "preferences": True, "community": False})
 
-    monkeypatch.setattr(blog, "get_image_by_id", lambda image_id: {"id": image_id, "title": "Soul Nebula"})
+    monkeypatch.setattr(blog, "image_exists", lambda image_id: True)
     monkeypatch.setattr(
         blog,
         "build_visitor_identity",
@@ -197,7 +197,7 @@ def test_comment_endpoint_sets_commenter_cookie_when_preferences_are_enabled(app
 def test_comment_endpoint_returns_rate_limit_message(app, monkeypatch):
     from AstroSpace import blog
 
-    monkeypatch.setattr(blog, "get_image_by_id", lambda image_id: {"id": image_id, "title": "Soul Nebula"})
+    monkeypatch.setattr(blog, "image_exists", lambda image_id: True)
     monkeypatch.setattr(
         blog,
         "build_visitor_identity",
@@ -0,0 +1,112 @@
+import os
+import socket
+import threading
+import time
+
+import pytest
+from psycopg2 import extensions
+
+from AstroSpace import create_app
+from AstroSpace import db
+
+
+gevent = pytest.importorskip("gevent")
+
+SLOW_QUERY_SECONDS = 0.2
+PARALLEL_QUERIES = 5
+
+
+class SlowQueryConnection:
+    """Stands in for a psycopg2 connection whose query takes a while to answer."""
+
+    def __init__(self, delay):
+        self._reader, self._writer = socket.socketpair()
+        self._answered = False
+        self._timer = threading.Timer(delay, self._writer.send, args=(b"x",))
+
+    def fileno(self):
+        return self._reader.fileno()
+
+    def poll(self):
+        if self._answered:
+            return extensions.POLL_OK
+        if not self._timer.is_alive() and not self._timer.finished.is_set():
+            # The server only starts working once the query has been sent.
+            self._timer.start()
+        self._reader.setblocking(False)
+        try:
+            self._reader.recv(1)
+        except BlockingIOError:
+            return extensions.POLL_READ
+        self._answered = True
+        return extensions.POLL_OK
+
+    def close(self):
+        self._timer.cancel()
+        self._reader.close()
+        self._writer.close()
+
+
+def test_gevent_wait_callback_overlaps_parallel_slow_queries():
+    callback = db.make_gevent_wait_callback()
+    connections = [SlowQueryConnection(SLOW_QUERY_SECONDS) for _ in range(PARALLEL_QUERIES)]
+
+    started = time.monotonic()
+    try:
+        greenlets = [gevent.spawn(callback, conn) for conn in connections]
+        gevent.joinall(greenlets, raise_error=True)
+    finally:
+        for conn in connections:
+            conn.close()
+    elapsed = time.monotonic() - started
+
+    assert elapsed < SLOW_QUERY_SECONDS * PARALLEL_QUERIES / 2
+
+
+def test_create_app_installs_wait_callback_only_when_enabled(tmp_path, monkeypatch):
+    installed = []
+    monkeypatch.setattr(db, "install_gevent_wait_callback", lambda: installed.append(True))
+    config = {
+        "TESTING": True,
+        "SECRET_KEY": "test-secret",
+        "DB_NAME": "test",
+        "DB_USER": "test",
+        "DB_PASSWORD": "test",
+        "DB_HOST": "localhost",
+        "DB_PORT": 5432,
+        "UPLOAD_PATH": str(tmp_path / "uploads"),
+        "SKIP_DB_INIT": True,
+    }
+
+    create_app(config)
+    assert installed == []
+
+    create_app({**config, "DB_GEVENT_WAIT_CALLBACK": True})
+    assert installed == [True]
+
+
+@pytest.mark.skipif(
+    not os.environ.get("ASTROSPACE_TEST_DSN"),
+    reason="set ASTROSPACE_TEST_DSN to run against a real PostgreSQL server",
+)
+def test_pg_sleep_queries_overlap_with_wait_callback_installed():
+    import psycopg2
+
+    previous = extensions.get_wait_callback()
+    db.install_gevent_wait_callback()
+    try:
+        connections = [psycopg2.connect(os.environ["ASTROSPACE_TEST_DSN"]) for _ in range(PARALLEL_QUERIES)]
+
+        def run_slow_query(conn):
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_sleep(%s)", (SLOW_QUERY_SECONDS,))
+
+        started = time.monotonic()
+        gevent.joinall([gevent.spawn(run_slow_query, conn) for conn in connections], raise_error=True)
+        elapsed = time.monotonic() - started
+        for conn in connections:
+            conn.close()
+    finally:
+        extensions.set_wait_callback(previous)
+
+    assert elapsed < SLOW_QUERY_SECONDS * PARALLEL_QUERIES / 2
@@ -0,0 +1,189 @@
+import pytest
+from flask import g
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+
+from AstroSpace import create_app
+from AstroSpace import db
+
+
+class FakeInfo:
+    def __init__(self):
+        self.transaction_status = TRANSACTION_STATUS_IDLE
+
+
+class FakePoolCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def execute(self, query, params=None):
+        if self.conn.broken:
+            raise db.psycopg2.OperationalError("server closed the connection unexpectedly")
+        self.conn.executed.append(query)
+
+
+class FakePoolConnection:
+    def __init__(self, number):
+        self.number = number
+        self.closed = 0
+        self.autocommit = False
+        self.broken = False
+        self.info = FakeInfo()
+        self.executed = []
+        self.rollback_count = 0
+
+    def cursor(self):
+        return FakePoolCursor(self)
+
+    def rollback(self):
+        self.rollback_count += 1
+        self.info.transaction_status = TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class FakeConnector:
+    def __init__(self):
+        self.connections = []
+
+    def __call__(self):
+        conn = FakePoolConnection(len(self.connections) + 1)
+        self.connections.append(conn)
+        return conn
+
+
+def make_pool(**kwargs):
+    connector = FakeConnector()
+    options = {"min_size": 1, "max_size": 2, "timeout": 0.05, "health_check_interval": 0}
+    options.update(kwargs)
+    return db.ConnectionPool(connector, **options), connector
+
+
+def test_pool_reuses_returned_connection():
+    pool, connector = make_pool()
+
+    first = pool.getconn()
+    pool.putconn(first)
+    second = pool.getconn()
+
+    assert second is first
+    assert len(connector.connections) == 1
+    assert pool.stats()["checkouts"] == 2
+
+
+def test_pool_times_out_when_exhausted():
+    pool, _connector = make_pool(max_size=1)
+
+    pool.getconn()
+
+    with pytest.raises(db.PoolTimeout):
+        pool.getconn()
+    assert pool.stats()["wait_timeouts"] == 1
+
+
+def test_pool_rolls_back_open_transactions_on_return():
+    pool, _connector = make_pool()
+
+    conn = pool.getconn()
+    conn.info.transaction_status = TRANSACTION_STATUS_INTRANS
+    conn.autocommit = True
+    pool.putconn(conn)
+
+    assert conn.rollback_count == 1
+    assert conn.autocommit is False
+    assert pool.stats()["idle"] == 1
+
+
+def test_pool_discard_reset_is_downgraded_behind_pgbouncer():
+    pool, _connector = make_pool(reset="discard", pgbouncer=True)
+
+    conn = pool.getconn()
+    pool.putconn(conn)
+
+    assert pool.reset == "rollback"
+    assert "DISCARD ALL" not in conn.executed
+
+
+def test_pool_flags_from_string_settings_are_parsed_like_config():
+    settings = {
+        "DB_NAME": "astro",
+        "DB_USER": "astro",
+        "DB_PASSWORD": "secret",
+        "DB_HOST": "localhost",
+        "DB_PORT": 5432,
+        "DB_POOL_MIN_SIZE": 0,
+        "DB_POOL_HEALTH_CHECK": "false",
+        "DB_POOL_PGBOUNCER": "0",
+    }
+
+    pool = db.build_connection_pool(settings)
+    assert (pool.health_check, pool.pgbouncer) == (False, False)
+
+    pool = db.build_connection_pool({**settings, "DB_POOL_HEALTH_CHECK": "yes", "DB_POOL_PGBOUNCER": True})
+    assert (pool.health_check, pool.pgbouncer) == (True, True)
+
+
+def test_pool_replaces_connection_that_fails_health_check():
+    pool, connector = make_pool()
+
+    conn = pool.getconn()
+    pool.putconn(conn)
+    conn.broken = True
+
+    replacement = pool.getconn()
+
+    assert replacement is not conn
+    assert conn.closed
+    assert len(connector.connections) == 2
+    stats = pool.stats()
+    assert stats["health_check_failures"] == 1
+    assert stats["size"] == 1
+
+
+def test_pool_prunes_idle_connections_above_min_size():
+    pool, _connector = make_pool(min_size=1, max_idle=0)
+
+    first = pool.getconn()
+    second = pool.getconn()
+    pool.putconn(first)
+    pool.putconn(second)
+
+    stats = pool.stats()
+    assert stats["size"] == 1
+    assert stats["connections_closed"] == 1
+
+
+def test_get_conn_checks_out_from_pool_and_returns_on_teardown(tmp_path, monkeypatch):
+    app = create_app(
+        {
+            "TESTING": True,
+            "SECRET_KEY": "test-secret",
+            "DB_NAME": "test",
+            "DB_USER": "test",
+            "DB_PASSWORD": "test",
+            "DB_HOST": "localhost",
+            "DB_PORT": 5432,
+            "UPLOAD_PATH": str(tmp_path / "uploads"),
+            "SKIP_DB_INIT": True,
+        }
+    )
+    connector = FakeConnector()
+    monkeypatch.setattr(db.psycopg2, "connect", lambda **_kwargs: connector())
+
+    with app.app_context():
+        conn = db.get_conn()
+        assert db.get_conn() is conn
+        assert g.db_pool.stats()["in_use"] == 1
+        db.close_db()
+        stats = db.get_pool_stats()
+
+    assert stats["enabled"] is True
+    assert stats["in_use"] == 0
+    assert stats["idle"] == 1
+    assert not conn.closed
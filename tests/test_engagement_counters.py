@@ -0,0 +1,130 @@
+import pytest
+
+from AstroSpace.services.engagement import VisitorIdentity
+
+
+IDENTITY = VisitorIdentity(
+    visitor_hash="visitor-hash",
+    visitor_source="cookie",
+    ip_hash="ip-hash",
+    user_agent_hash="ua-hash",
+    visitor_cookie_hash="cookie-hash",
+    visitor_cookie_value="visitor-token",
+    new_visitor_cookie=None,
+)
+
+
+def test_unbuffered_view_is_written_immediately(app, monkeypatch, recording_conn):
+    from AstroSpace.services import engagement
+
+    conn = recording_conn()
+    written = []
+    monkeypatch.setattr(engagement, "get_conn", lambda: conn)
+    monkeypatch.setattr(engagement, "write_view_batch", lambda target, batch: written.append((target, batch)))
+    app.config["VIEW_BUFFER_ENABLED"] = False
+
+    with app.app_context():
+        engagement.record_image_view(7, IDENTITY)
+
+    assert len(written) == 1
+    target, batch = written[0]
+    assert target is conn
+    assert [(view["image_id"], view["visitor_hash"]) for view in batch] == [(7, "visitor-hash")]
+
+
+def test_like_toggle_moves_like_counter_both_ways(monkeypatch, recording_conn):
+    from AstroSpace.services import engagement
+
+    conn = recording_conn([None, {"id": 1}, {"id": 1}])
+    monkeypatch.setattr(engagement, "get_conn", lambda: conn)
+
+    assert engagement.like_image(7, IDENTITY) is True
+    assert engagement.like_image(7, IDENTITY) is False
+
+    assert [params for _query, params in conn.queries("INSERT INTO image_counters")] == [(7, 1, 1), (7, -1, -1)]
+    assert all("like_count" in query for query, _params in conn.executed if "image_counters" in query)
+
+
+def test_comment_checks_limits_inserts_and_counts_in_one_statement(app, monkeypatch, recording_conn):
+    from AstroSpace.services import engagement
+
+    conn = recording_conn([{"id": 3, "commented_at": None, "cooling_down": False, "burst_count": 0}])
+    monkeypatch.setattr(engagement, "get_conn", lambda: conn)
+
+    with app.app_context():
+        inserted = engagement.submit_image_comment(7, IDENTITY, "Grace", "Lovely framing")
+
+    assert inserted["id"] == 3
+    assert len(conn.executed) == 1
+    query, params = conn.executed[0]
+    assert "INSERT INTO image_comments" in query
+    assert "comment_count = image_counters.comment_count + 1" in query
+    assert params["burst_limit"] == engagement.COMMENT_BURST_LIMIT
+    assert conn.commits == 1
+
+
+@pytest.mark.parametrize(
+    "summary, message",
+    [
+        ({"cooling_down": True, "burst_count": 1}, "Please wait"),
+        ({"cooling_down": False, "burst_count": 5}, "temporary comment limit"),
+    ],
+)
+def test_rejected_comment_reports_which_limit_was_hit(app, monkeypatch, summary, message, recording_conn):
+    from AstroSpace.services import engagement
+
+    conn = recording_conn([{"id": None, "commented_at": None, **summary}])
+    monkeypatch.setattr(engagement, "get_conn", lambda: conn)
+    app.config["COMMENT_TOKEN_BUCKET_ENABLED"] = False
+
+    with app.app_context():
+        with pytest.raises(engagement.CommentRateLimitError, match=message):
+            engagement.submit_image_comment(7, IDENTITY, "Grace", "Lovely framing")
+
+    assert conn.commits == 0
+
+
+def test_token_bucket_rejects_bursts_before_the_database(app, monkeypatch, recording_conn):
+    from AstroSpace.services import engagement
+
+    def fail_if_database_is_touched():
+        raise AssertionError("rejected comments must not reach the database")
+
+    conn = recording_conn([{"id": 3, "commented_at": None, "cooling_down": False, "burst_count": 0}])
+    monkeypatch.setattr(engagement, "get_conn", lambda: conn)
+
+    with app.app_context():
+        engagement.submit_image_comment(7, IDENTITY, "Grace", "First")
+        monkeypatch.setattr(engagement, "get_conn", fail_if_database_is_touched)
+        with pytest.raises(engagement.CommentRateLimitError, match="Please wait"):
+            engagement.submit_image_comment(7, IDENTITY, "Grace", "Second")
+
+
+def test_engagement_state_reads_counters_instead_of_counting(monkeypatch, recording_conn):
+    from AstroSpace.services import engagement
+
+    conn = recording_conn(
+        [[{"image_id": 7, "view_count": 40, "like_count": 3, "comment_count": 2, "liked": False}]]
+    )
+    monkeypatch.setattr(engagement, "get_conn", lambda: conn)
+
+    state = engagement.fetch_image_engagement_state(7, IDENTITY, include_comments=False)
+
+    assert state["view_count"] == 40
+    summary_query = conn.executed[0][0]
+    assert "LEFT JOIN image_counters" in summary_query
+    assert "COUNT(*)" not in summary_query
+
+
+def test_reconcile_command_recomputes_counters(monkeypatch, recording_conn):
+    from AstroSpace.__main__ import handle_management_command
+
+    conn = recording_conn([[{"image_id": 7}, {"image_id": 9}]])
+    conn.closed = False
+    conn.close = lambda: setattr(conn, "closed", True)
+    monkeypatch.setattr("AstroSpace.__main__.open_connection", lambda: conn)
+
+    assert handle_management_command(["reconcile-counters"]) is True
+    assert "INSERT INTO image_counters" in conn.executed[0][0]
+    assert conn.commits == 1
+    assert conn.closed is True
@@ -0,0 +1,167 @@
+import copy
+import json
+
+from AstroSpace.constants import IMAGE_DETAIL_TABLE_NAMES
+
+
+DETAIL_ROW = {
+    "id": 7,
+    "title": "Heart Nebula",
+    "author": "vega",
+    "meta_json": json.dumps({"variable": {"WBPP weight 1": ["0.5"], "WBPP weight 2": ["0.5"], "WBPP weight 3": ["0.5"]}}),
+    "guiding_plot_json": None,
+    "calibration_plot_json": None,
+    "overlays_json": "[]",
+    "header_json": None,
+    "camera_id": 2,
+    "telescope_id": 1,
+    "detail_user_id": 3,
+    "detail_user_image": "uploads/vega.png",
+    "detail_equipment": [
+        {"id": 2, "name": "ASI2600MM", "brand": "ZWO", "link": "", "pixel_size": 3.76, "read_noise": 1, "table": "camera"},
+        {"id": 1, "name": "RedCat 51", "brand": "William Optics", "link": "", "aperture": 51, "focal_length": 250, "table": "telescope"},
+    ],
+    "detail_dates": [
+        {"id": 1, "image_id": 7, "capture_date": "2026-01-04", "moon_illumination": 12, "moon_phase": "Waxing Crescent"},
+    ],
+    "detail_lights": [
+        {
+            "light": {
+                "id": 1,
+                "image_id": 7,
+                "cam_filter": "Ha",
+                "light_count": 60,
+                "exposure_time": 300,
+                "gain": 100,
+                "offset_cam": 50,
+                "temperature": -10,
+            },
+            "filter": {"id": 4, "name": "Ha", "link": "https://example.com/ha"},
+        },
+        {
+            "light": {
+                "id": 2,
+                "image_id": 7,
+                "cam_filter": "OIII",
+                "light_count": 30,
+                "exposure_time": 300,
+                "gain": 100,
+                "offset_cam": 50,
+                "temperature": -10.25,
+            },
+            "filter": None,
+        },
+    ],
+    "detail_software": [
+        {"software_id": 5, "software": {"id": 5, "name": "PixInsight", "type": "processing"}},
+    ],
+    "detail_related_media": [
+        {"id": 9, "image_id": 7, "media_path": "uploads/7/clip.mp4", "caption": "", "sort_order": 0},
+    ],
+}
+
+
+def test_image_tables_load_in_a_single_query(monkeypatch, recording_conn):
+    from AstroSpace.repositories import images
+
+    conn = recording_conn([[copy.deepcopy(DETAIL_ROW)]])
+    monkeypatch.setattr(images, "get_conn", lambda: conn)
+
+    tables = images.get_image_tables(7)
+
+    assert [params for _query, params in conn.executed] == [([7],)]
+    assert len(tables) == len(IMAGE_DETAIL_TABLE_NAMES)
+    detail = dict(zip(IMAGE_DETAIL_TABLE_NAMES, tables))
+    assert detail["image"]["user_image"] == "uploads/vega.png"
+    assert not any(key.startswith("detail_") for key in detail["image"])
+    assert [row["table"] for row in detail["equipment_list"]] == ["camera", "telescope"]
+    camera, telescope = detail["equipment_list"]
+    assert (camera["pixel_size"], camera["read_noise"]) == (3.76, 1.0)
+    assert isinstance(camera["read_noise"], float)
+    assert (telescope["aperture"], telescope["focal_length"]) == (51.0, 250.0)
+    assert all(isinstance(telescope[column], float) for column in ("aperture", "focal_length"))
+    assert detail["dates"][0]["capture_date"] == "04 January 2026"
+    assert detail["dates"][0]["moon_illumination"] == 12.0
+    assert detail["lights"][0]["temperature"] == "-10.0 °C"
+    assert detail["lights"][0]["filter_link"] == "https://example.com/ha"
+    assert "filter_link" not in detail["lights"][1]
+    assert "effective_total" in detail["lights"][0]
+    assert detail["software_list"] == [{"id": 5, "name": "PixInsight", "type": "processing"}]
+    assert detail["related_media"][0]["media_kind"] == "video"
+    assert detail["related_media"][0]["display_name"] == "clip.mp4"
+
+
+def test_image_tables_keep_original_values_for_editing(monkeypatch, recording_conn):
+    from datetime import date
+
+    from AstroSpace.repositories import images
+
+    conn = recording_conn([[copy.deepcopy(DETAIL_ROW)]])
+    monkeypatch.setattr(images, "get_conn", lambda: conn)
+
+    image, _equipment, dates, lights, software_list, *_rest = images.get_image_tables(7, keep_original=True)
+
+    assert len(conn.executed) == 1
+    assert dates[0]["capture_date"] == date(2026, 1, 4)
+    assert lights[0]["temperature"] == -10.0
+    assert lights[0]["exposure_time"] == 300
+    assert software_list == [5]
+    assert image["id"] == 7
+
+
+def test_missing_image_reports_not_found(monkeypatch):
+    from AstroSpace.repositories import images
+
+    monkeypatch.setattr(images, "fetch_image_detail_rows", lambda image_ids: {})
+
+    assert images.get_image_tables(404) == "Image not found!, 404"
+
+
+def test_detail_bundles_for_every_version_share_one_query(monkeypatch, recording_conn):
+    from AstroSpace.repositories import images
+
+    rows = [dict(copy.deepcopy(DETAIL_ROW), id=image_id) for image_id in (7, 8, 9)]
+    conn = recording_conn([rows])
+    monkeypatch.setattr(images, "get_conn", lambda: conn)
+
+    bundles = images.get_image_detail_bundles([7, 8, 9])
+
+    assert [params for _query, params in conn.executed] == [([7, 8, 9],)]
+    assert sorted(bundles) == [7, 8, 9]
+    assert all(len(tables) == len(IMAGE_DETAIL_TABLE_NAMES) for tables in bundles.values())
+
+
+def test_engagement_states_for_several_images_use_two_queries(monkeypatch, recording_conn):
+    from AstroSpace.services import engagement
+    from AstroSpace.services.engagement import VisitorIdentity
+
+    summaries = [
+        {"image_id": 7, "view_count": 12, "like_count": 2, "comment_count": 1, "liked": True},
+        {"image_id": 8, "view_count": 3, "like_count": 0, "comment_count": 0, "liked": False},
+    ]
+    comments = [{"image_id": 7, "id": 1, "commented_by": "Grace", "comment": "Lovely", "commented_at": None}]
+    conn = recording_conn([summaries, comments])
+    monkeypatch.setattr(engagement, "get_conn", lambda: conn)
+    identity = VisitorIdentity(
+        visitor_hash="visitor-hash",
+        visitor_source="network",
+        ip_hash="ip-hash",
+        user_agent_hash="ua-hash",
+        visitor_cookie_hash=None,
+        visitor_cookie_value=None,
+        new_visitor_cookie=None,
+    )
+
+    states = engagement.fetch_image_engagement_states([7, 8], identity)
+
+    assert len(conn.executed) == 2
+    assert states[7]["liked"] is True
+    assert states[7]["comments"] == [{"id": 1, "commented_by": "Grace", "comment": "Lovely", "commented_at": None}]
+    assert states[8] == {
+        "view_count": 3,
+        "like_count": 0,
+        "comment_count": 0,
+        "liked": False,
+        "comments": [],
+        "comments_after": None,
+    }
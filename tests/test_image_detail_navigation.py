@@ -1,5 +1,7 @@
 from datetime import datetime
 
+import pytest
+
 from AstroSpace.services.engagement import VisitorIdentity
 
 
@@ -37,16 +39,18 @@ def test_image_detail_route_includes_previous_and_next_unique_posts(app, monkeyp
     }
 
     monkeypatch.setattr(blog, "IMAGE_DETAIL_TABLE_NAMES", ["image", "lights"])
-    monkeypatch.setattr(blog, "get_image_tables", lambda image_id: [current_image, []])
-    monkeypatch.setattr(
-        blog,
-        "get_all_images",
-        lambda unique=False, limit=None: [
-            {"id": 1, "slug": "m42", "title": "M42"},
-            {"id": 2, "slug": "ngc-2548", "title": "NGC 2548"},
-            {"id": 3, "slug": "rosette", "title": "Rosette"},
-        ],
-    )
+    monkeypatch.setattr(blog, "get_image_detail_bundles", lambda image_ids: {2: [current_image, []]})
+    neighbour_lookups = []
+
+    def fake_adjacent_posts(image_id, slug):
+        neighbour_lookups.append((image_id, slug))
+        return {
+            "previous": {"id": 1, "slug": "m42", "title": "M42"},
+            "next": {"id": 3, "slug": "rosette", "title": "Rosette"},
+        }
+
+    monkeypatch.setattr(blog, "get_adjacent_posts", fake_adjacent_posts)
+    monkeypatch.setattr(blog, "get_all_images", lambda unique=False, limit=None: pytest.fail("catalogue loaded"))
     monkeypatch.setattr(
         blog,
         "build_visitor_identity",
@@ -63,13 +67,17 @@ def test_image_detail_route_includes_previous_and_next_unique_posts(app, monkeyp
     monkeypatch.setattr(blog, "record_image_view", lambda image_id, visitor_identity: None)
     monkeypatch.setattr(
         blog,
-        "fetch_image_engagement_state",
-        lambda image_id, visitor_identity, include_comments=True: {
-            "liked": False,
-            "like_count": 0,
-            "view_count": 0,
-            "comment_count": 0,
-            "comments": [],
+        "fetch_image_engagement_states",
+        lambda image_ids, visitor_identity, include_comments=True: {
+            image_id: {
+                "liked": False,
+                "like_count": 0,
+                "view_count": 0,
+                "comment_count": 0,
+                "comments": [],
+                "comments_after": None,
+            }
+            for image_id in image_ids
         },
     )
     monkeypatch.setattr(blog, "get_conn", lambda: _FakeConnection())
@@ -93,3 +101,16 @@ def test_image_detail_route_includes_previous_and_next_unique_posts(app, monkeyp
     assert captured["previous_post"]["slug"] == "m42"
     assert captured["next_post"]["id"] == 3
     assert captured["next_post"]["slug"] == "rosette"
+    assert neighbour_lookups == [(2, "ngc-2548")]
+
+
+def test_adjacent_posts_are_keyed_by_direction(monkeypatch, recording_conn):
+    from AstroSpace.repositories import images
+
+    conn = recording_conn([[{"direction": "next", "id": 3, "slug": "rosette"}]])
+    monkeypatch.setattr(images, "get_conn", lambda: conn)
+
+    neighbours = images.get_adjacent_posts(2, "ngc-2548")
+
+    assert conn.executed[0][1] == {"image_id": 2, "slug": "ngc-2548"}
+    assert neighbours == {"previous": None, "next": {"id": 3, "slug": "rosette"}}
@@ -0,0 +1,81 @@
+import pytest
+
+
+BLOB_COLUMNS = ("header_json", "overlays_json", "meta_json", "guiding_plot_json", "calibration_plot_json")
+
+
+def test_image_exists_reads_no_columns(monkeypatch, recording_conn):
+    from AstroSpace.repositories import images
+
+    conn = recording_conn([{"present": True}, {"present": False}])
+    monkeypatch.setattr(images, "get_conn", lambda: conn)
+
+    assert images.image_exists(7) is True
+    assert images.image_exists(8) is False
+    assert conn.executed[0] == ("SELECT EXISTS(SELECT 1 FROM images WHERE id = %s) AS present", (7,))
+
+
+def test_image_card_selects_only_card_columns(monkeypatch, recording_conn):
+    from AstroSpace.repositories import images
+
+    conn = recording_conn([{"id": 7, "author": "vega"}])
+    monkeypatch.setattr(images, "get_conn", lambda: conn)
+
+    assert images.get_image_card(7)["author"] == "vega"
+    query = conn.executed[0][0]
+    assert "*" not in query
+    assert not any(column in query for column in BLOB_COLUMNS)
+
+
+def test_full_image_loads_author_image_in_the_same_query(monkeypatch, recording_conn):
+    from AstroSpace.repositories import images
+
+    conn = recording_conn([{"id": 7, "author": "vega", "header_json": {}, "detail_user_image": "1/me.jpg"}])
+    monkeypatch.setattr(images, "get_conn", lambda: conn)
+
+    image = images.get_image_by_id(7)
+
+    assert image["user_image"] == "1/me.jpg"
+    assert "detail_user_image" not in image
+    assert len(conn.executed) == 1
+
+
+@pytest.mark.parametrize(
+    "view_name, method",
+    [("like_image_endpoint", "POST"), ("comment_on_image", "POST"), ("image_view_history", "GET")],
+)
+def test_engagement_endpoints_check_existence_only(app, monkeypatch, view_name, method):
+    from AstroSpace import blog
+
+    monkeypatch.setattr(blog, "image_exists", lambda image_id: False)
+    monkeypatch.setattr(blog, "get_image_by_id", lambda image_id: pytest.fail("full row loaded"))
+
+    with app.test_request_context("/image/7", method=method, json={"display_name": "Vega", "comment": "Hi"}):
+        _payload, status = getattr(blog, view_name)(7)
+
+    assert status == 404
+
+
+def test_full_image_loads_artifacts_only_when_read(monkeypatch, recording_conn):
+    from AstroSpace.repositories import images
+
+    conn = recording_conn(
+        [
+            {"id": 7, "author": "vega", "detail_user_image": None},
+            {"header_json": "HEADER", "overlays_json": "[]", "meta_json": "{}"},
+        ]
+    )
+    monkeypatch.setattr(images, "get_conn", lambda: conn)
+
+    image = images.get_image_by_id(7)
+    assert image["author"] == "vega"
+    assert len(conn.executed) == 1
+
+    assert image["header_json"] == "HEADER"
+    assert image.get("guiding_plot_json") is None
+    assert image["overlays_json"] == "[]"
+    assert len(conn.executed) == 2
+    assert conn.executed[1][0].startswith("SELECT header_json, overlays_json")
+    assert image.get("not_a_column", "fallback") == "fallback"
+    with pytest.raises(KeyError):
+        image["not_a_column"]
@@ -43,9 +43,6 @@ def test_save_image_redirects_when_preview_image_is_missing(app, monkeypatch):
     from AstroSpace import blog
 
     monkeypatch.setattr(blog, "geocode", lambda _location: (51.0, 7.0))
-    monkeypatch.setattr(blog.Simbad, "reset_votable_fields", lambda: None)
-    monkeypatch.setattr(blog.Simbad, "add_votable_fields", lambda *_args: None)
-    monkeypatch.setattr(blog.Simbad, "query_object", lambda _title: None)
 
     with app.test_request_context(
         "/create",
@@ -66,21 +63,38 @@ def test_save_image_redirects_when_preview_image_is_missing(app, monkeypatch):
     assert response.location.endswith("/new")
 
 
+def test_save_image_stages_no_header_for_a_rejected_post(app, monkeypatch):
+    import os
+
+    from AstroSpace import blog
+
+    monkeypatch.setattr(blog, "geocode", lambda _location: (51.0, 7.0))
+    staging_root = app.config["INGEST_STAGING_PATH"]
+
+    for preview in (None, (BytesIO(b"gif-bytes"), "preview.gif")):
+        data = {
+            "title": "North America Nebula",
+            "location": "Backyard",
+            "created_at": "2026-03-19",
+            "fits_file": (BytesIO(b"fits-bytes"), "capture.fits"),
+        }
+        if preview:
+            data["image_path"] = preview
+        with app.test_request_context("/create", method="POST", data=data):
+            g.user = {"id": 1, "username": "tester", "admin": True}
+
+            response = blog.save_image()
+
+        assert response.location.endswith("/new")
+        assert not os.path.exists(staging_root) or not any(files for _root, _dirs, files in os.walk(staging_root))
+
+
 def test_save_image_accepts_png_preview(app, monkeypatch):
     from AstroSpace import blog
 
     conn = FakeInventoryConnection()
     monkeypatch.setattr(blog, "get_conn", lambda: conn)
     monkeypatch.setattr(blog, "geocode", lambda _location: (51.0, 7.0))
-    monkeypatch.setattr(blog.Simbad, "reset_votable_fields", lambda: None)
-    monkeypatch.setattr(blog.Simbad, "add_votable_fields", lambda *_args: None)
-    monkeypatch.setattr(blog.Simbad, "query_object", lambda _title: None)
-    monkeypatch.setattr(
-        blog,
-        "platesolve",
-        lambda _image_path, _user_id, _fits_file: ("HEADER", "1/test_thumbnail.jpg", 1.23),
-    )
-    monkeypatch.setattr(blog, "get_overlays", lambda _header_json: {"ok": True})
     monkeypatch.setattr(blog, "sanitize_rich_text", lambda value: value)
     monkeypatch.setattr(blog, "parse_meta_store", lambda _value: "{}")
 
@@ -109,7 +123,56 @@ def test_save_image_accepts_png_preview(app, monkeypatch):
     assert response.status_code == 302
     assert response.location.endswith("/private/profile?tab=Posts")
     assert conn.committed is True
-    assert any("INSERT INTO images" in query for query, _params in conn.executed)
+    image_insert = next(query for query, _params in conn.executed if "INSERT INTO images" in query)
+    assert "overlays_json" not in image_insert
+    assert "image_thumbnail" not in image_insert
+    artifacts_insert, artifacts = next(
+        (query, params) for query, params in conn.executed if "INSERT INTO image_artifacts" in query
+    )
+    assert "header_json" not in artifacts_insert
+    assert artifacts == (99, "{}")
+    job = next(params for query, params in conn.executed if "INSERT INTO jobs" in query)
+    assert job[0] == "ingest_post"
+    assert job[1].adapted["title"] == "North America Nebula"
+    assert job[1].adapted["plate_solve"]["image_path"].endswith("preview.png")
+    assert job[1].adapted["plate_solve"]["fits_path"].endswith("capture.fits")
+    assert job[1].adapted["regenerate_overlays"] is True
+    assert job[3] == 3
+
+
+def test_save_image_runs_ingest_inline_when_jobs_are_disabled(app, monkeypatch):
+    from AstroSpace import blog
+
+    conn = FakeInventoryConnection()
+    ran = []
+    app.config["INGEST_JOBS_ENABLED"] = False
+    monkeypatch.setattr(blog, "get_conn", lambda: conn)
+    monkeypatch.setattr(blog, "geocode", lambda _location: (51.0, 7.0))
+    monkeypatch.setattr(blog, "sanitize_rich_text", lambda value: value)
+    monkeypatch.setattr(blog, "parse_meta_store", lambda _value: "{}")
+    monkeypatch.setattr(blog, "run_post_ingest_now", lambda _conn, job_id: ran.append(job_id) or True)
+
+    with app.test_request_context(
+        "/create",
+        method="POST",
+        data={
+            "title": "North America Nebula",
+            "short_description": "Test",
+            "description": "Test description",
+            "location": "Backyard",
+            "created_at": "2026-03-19",
+            "image_path": (BytesIO(b"png-bytes"), "preview.png"),
+        },
+    ):
+        g.user = {"id": 1, "username": "tester", "admin": True}
+
+        response = blog.save_image()
+
+    assert response.status_code == 302
+    assert ran == [99]
+    job = next(params for query, params in conn.executed if "INSERT INTO jobs" in query)
+    assert job[1].adapted["plate_solve"]["fits_path"] is None
+    assert job[3] == 1
 
 
 def test_save_image_persists_starless_and_related_media(app, monkeypatch):
@@ -118,15 +181,6 @@ def test_save_image_persists_starless_and_related_media(app, monkeypatch):
     conn = FakeInventoryConnection()
     monkeypatch.setattr(blog, "get_conn", lambda: conn)
     monkeypatch.setattr(blog, "geocode", lambda _location: (51.0, 7.0))
-    monkeypatch.setattr(blog.Simbad, "reset_votable_fields", lambda: None)
-    monkeypatch.setattr(blog.Simbad, "add_votable_fields", lambda *_args: None)
-    monkeypatch.setattr(blog.Simbad, "query_object", lambda _title: None)
-    monkeypatch.setattr(
-        blog,
-        "platesolve",
-        lambda _image_path, _user_id, _fits_file: ("HEADER", "1/test_thumbnail.jpg", 1.23),
-    )
-    monkeypatch.setattr(blog, "get_overlays", lambda _header_json: {"ok": True})
     monkeypatch.setattr(blog, "sanitize_rich_text", lambda value: value)
     monkeypatch.setattr(blog, "parse_meta_store", lambda _value: "{}")
 
@@ -0,0 +1,342 @@
+import pytest
+from astropy.wcs import WCS
+from flask import g
+
+
+def _claimed_job(**overrides):
+    job = {"id": 4, "kind": "ingest_post", "payload": {}, "image_id": 7, "attempts": 1, "max_attempts": 3}
+    job.update(overrides)
+    return job
+
+
+def test_enqueue_job_inserts_and_notifies_workers(recording_conn):
+    from AstroSpace.services.jobs import JOB_NOTIFY_CHANNEL, enqueue_job
+
+    conn = recording_conn([{"id": 12}])
+
+    with conn.cursor() as cur:
+        assert enqueue_job(cur, "ingest_post", {"title": "M31"}, image_id=7, max_attempts=2) == 12
+
+    (insert, params), (notify, notify_params) = conn.executed
+    assert insert.startswith("INSERT INTO jobs")
+    assert params[0] == "ingest_post"
+    assert params[1].adapted == {"title": "M31"}
+    assert params[2:] == (7, 2)
+    assert notify_params == (JOB_NOTIFY_CHANNEL, "ingest_post")
+    assert conn.commits == 0
+
+
+def test_claim_job_skips_rows_locked_by_other_workers(recording_conn):
+    from AstroSpace.services.jobs import claim_job
+
+    conn = recording_conn([_claimed_job()])
+
+    assert claim_job(conn, "host:1", {"ingest_post": None})["id"] == 4
+
+    query, params = conn.executed[0]
+    assert "FOR UPDATE SKIP LOCKED" in query
+    assert "ORDER BY run_after, id" in query
+    assert params == {"worker": "host:1", "kinds": ["ingest_post"]}
+    assert conn.commits == 1
+
+
+def test_run_claimed_job_commits_handler_writes_with_the_result(recording_conn):
+    from AstroSpace.services.jobs import JOB_SUCCEEDED, run_claimed_job
+
+    conn = recording_conn()
+
+    def handler(handler_conn, job):
+        with handler_conn.cursor() as cur:
+            cur.execute("UPDATE images SET title = %s WHERE id = %s", ("M31", job["image_id"]))
+        return {"steps": ["title"]}
+
+    assert run_claimed_job(conn, _claimed_job(), {"ingest_post": handler}, retry_delay=60) == JOB_SUCCEEDED
+
+    (update, _), (finish, params) = conn.executed
+    assert update.startswith("UPDATE images")
+    assert "status = 'succeeded'" in finish
+    assert params[0].adapted == {"steps": ["title"]} and params[1] == 4
+    assert conn.commits == 1
+    assert conn.rollbacks == 0
+
+
+def test_run_claimed_job_rolls_back_and_schedules_a_retry(recording_conn):
+    from AstroSpace.services.jobs import JOB_QUEUED, run_claimed_job
+
+    conn = recording_conn([{"status": JOB_QUEUED}])
+
+    def handler(_conn, _job):
+        raise RuntimeError("astrometry.net timed out")
+
+    assert run_claimed_job(conn, _claimed_job(), {"ingest_post": handler}, retry_delay=30) == JOB_QUEUED
+
+    query, params = conn.executed[0]
+    assert "make_interval(secs => %s * attempts)" in query
+    assert params == (30, "RuntimeError: astrometry.net timed out", 4)
+    assert conn.rollbacks == 1
+    assert conn.commits == 1
+
+
+def test_run_claimed_job_records_a_cancelled_job_with_its_progress(recording_conn):
+    from AstroSpace.services.jobs import JOB_CANCELLED, JobCancelled, run_claimed_job
+
+    conn = recording_conn()
+
+    def handler(_conn, _job):
+        raise JobCancelled({"processed": 2})
+
+    assert run_claimed_job(conn, _claimed_job(), {"ingest_post": handler}, retry_delay=30) == JOB_CANCELLED
+
+    query, params = conn.executed[0]
+    assert "status = 'cancelled'" in query
+    assert params[0].adapted == {"processed": 2} and params[1] == 4
+    assert conn.rollbacks == 1
+
+
+def test_request_job_cancel_reports_jobs_that_already_ended(recording_conn):
+    from AstroSpace.services.jobs import request_job_cancel
+
+    running = recording_conn([{"status": "running"}])
+    finished = recording_conn()
+
+    assert request_job_cancel(running, 4) == "running"
+    assert "cancel_requested = TRUE" in running.executed[0][0]
+    assert request_job_cancel(finished, 4) is None
+
+
+def test_worker_requeues_stale_jobs_and_reports_an_empty_queue(app, monkeypatch, recording_conn):
+    from AstroSpace.services import jobs
+
+    conn = recording_conn(rowcount=2)
+    monkeypatch.setattr(jobs, "get_conn", lambda: conn)
+    app.config["JOB_STALE_AFTER"] = 600
+
+    worker = jobs.JobWorker(app, {"ingest_post": None}, worker_id="host:1")
+
+    assert worker.run_once() is None
+    assert worker.run_once() is None
+
+    stale = conn.queries("WHERE status = 'running' AND locked_at <")
+    assert stale == [(stale[0][0], (600.0,))]
+    assert len(conn.queries("FOR UPDATE SKIP LOCKED")) == 2
+
+
+def _header_string():
+    wcs = WCS(naxis=2)
+    wcs.wcs.ctype = ["RA---TAN", "DEC--TAN"]
+    wcs.wcs.crval = [10.6847, 41.2690]
+    wcs.wcs.crpix = [1500, 1000]
+    wcs.wcs.cdelt = [-0.001, 0.001]
+    header = wcs.to_header()
+    header["IMAGEW"] = 3000
+    header["IMAGEH"] = 2000
+    return header.tostring()
+
+
+class FakeSimbad:
+    @staticmethod
+    def reset_votable_fields():
+        return None
+
+    @staticmethod
+    def add_votable_fields(*_fields):
+        return None
+
+    @staticmethod
+    def query_object(_name):
+        return [{"main_id": "NAME Andromeda Galaxy", "otype_txt": "Galaxy"}]
+
+
+def test_ingest_job_updates_the_post_and_its_artifacts(app, monkeypatch, tmp_path, recording_conn):
+    from AstroSpace.services import ingest
+
+    fits_path = tmp_path / "capture.fits"
+    fits_path.write_bytes(b"fits-bytes")
+    image_path = tmp_path / "m31.jpg"
+    image_path.write_bytes(b"jpeg-bytes")
+    solved = []
+    monkeypatch.setattr(ingest, "Simbad", FakeSimbad)
+    monkeypatch.setattr(
+        ingest,
+        "platesolve",
+        lambda image_path, user_id, fits_file, make_thumbnail: solved.append(
+            (image_path, user_id, fits_file.filename, make_thumbnail)
+        )
+        or (_header_string(), "1/m31_thumbnail.jpg", 1.2),
+    )
+    monkeypatch.setattr(ingest, "get_overlays", lambda _header_json: {"ok": True})
+    monkeypatch.setattr(ingest, "build_plotly_payloads", lambda paths: ({"paths": paths}, {}))
+    payload = ingest.build_ingest_payload(
+        1, "M31", image_path=str(image_path), fits_path=str(fits_path), guide_logs="/uploads/1/guide.txt"
+    )
+    conn = recording_conn([{"artifact_fingerprints": None}, {"id": 7}])
+
+    with app.app_context():
+        result = ingest.run_ingest_job(conn, _claimed_job(payload=payload))
+        assert g.user == {"id": 1}
+
+    assert result == {"steps": ["title", "plate_solve", "overlays", "guiding"], "title": "Andromeda Galaxy"}
+    assert solved == [(str(image_path), "1", "capture.fits", True)]
+    update, params = conn.queries("UPDATE images SET")[0]
+    assert "title = %s, slug = %s, object_type = %s, image_thumbnail = %s, pixel_scale = %s, sky_ra = %s" in update
+    assert params[:5] == ("Andromeda Galaxy", "andromeda-galaxy", "Galaxy", "1/m31_thumbnail.jpg", 1.2)
+    assert params[-1] == 7
+    artifacts, artifact_params = conn.queries("INSERT INTO image_artifacts")[0]
+    assert (
+        "(image_id, header_json, overlays_json, guiding_plot_json, calibration_plot_json, artifact_fingerprints)"
+        in artifacts
+    )
+    assert artifact_params[2] == '{"ok": true}'
+    assert artifact_params[3].adapted == {"paths": "/uploads/1/guide.txt"}
+    assert set(artifact_params[5].adapted) == {"thumbnail", "overlays"}
+    assert conn.commits == 0
+    assert not fits_path.exists()
+
+
+def test_ingest_job_keeps_the_staged_header_until_its_last_attempt(app, monkeypatch, tmp_path, recording_conn):
+    from AstroSpace.services import ingest
+
+    fits_path = tmp_path / "capture.fits"
+    fits_path.write_bytes(b"fits-bytes")
+    image_path = tmp_path / "m31.jpg"
+    image_path.write_bytes(b"jpeg-bytes")
+    monkeypatch.setattr(ingest, "Simbad", FakeSimbad)
+
+    def fail(*_args, **_kwargs):
+        raise RuntimeError("no solution")
+
+    monkeypatch.setattr(ingest, "platesolve", fail)
+    payload = ingest.build_ingest_payload(1, "M31", image_path=str(image_path), fits_path=str(fits_path))
+
+    with app.app_context():
+        with pytest.raises(RuntimeError):
+            ingest.run_ingest_job(recording_conn([{}]), _claimed_job(payload=payload, attempts=2))
+        assert fits_path.exists()
+
+        with pytest.raises(RuntimeError):
+            ingest.run_ingest_job(recording_conn([{}]), _claimed_job(payload=payload, attempts=3))
+        assert not fits_path.exists()
+
+
+def test_ingest_job_skips_artifacts_whose_fingerprints_match(app, monkeypatch, tmp_path, recording_conn):
+    from AstroSpace.services import ingest
+    from AstroSpace.services.artifact_fingerprints import (
+        file_fingerprint,
+        overlays_fingerprint,
+        thumbnail_fingerprint,
+    )
+
+    image_path = tmp_path / "m31.jpg"
+    image_path.write_bytes(b"jpeg-bytes")
+    (tmp_path / "m31_thumbnail.jpg").write_bytes(b"thumb")
+    header = _header_string()
+    fingerprints = {
+        "thumbnail": thumbnail_fingerprint(file_fingerprint(image_path), "1/m31_thumbnail.jpg"),
+        "overlays": overlays_fingerprint(header),
+    }
+    thumbnails = []
+    monkeypatch.setattr(ingest, "Simbad", FakeSimbad)
+    monkeypatch.setattr(
+        ingest,
+        "platesolve",
+        lambda _image_path, _user_id, _fits_file, make_thumbnail: thumbnails.append(make_thumbnail)
+        or (header, "1/m31_thumbnail.jpg", 1.2),
+    )
+    monkeypatch.setattr(ingest, "get_overlays", lambda _header_json: pytest.fail("overlays are up to date"))
+
+    def run(force):
+        conn = recording_conn([{"artifact_fingerprints": fingerprints}, {"id": 7}])
+        payload = ingest.build_ingest_payload(1, "M31", image_path=str(image_path), force=force)
+        with app.app_context():
+            return ingest.run_ingest_job(conn, _claimed_job(payload=payload)), conn
+
+    result, conn = run(force=False)
+
+    assert result["steps"] == ["title", "plate_solve"]
+    assert result["up_to_date"] == ["thumbnail", "overlays"]
+    assert thumbnails == [False]
+    assert "artifact_fingerprints" not in conn.queries("INSERT INTO image_artifacts")[0][0]
+
+    monkeypatch.setattr(ingest, "get_overlays", lambda _header_json: {"ok": True})
+    result, _conn = run(force=True)
+
+    assert result["steps"] == ["title", "plate_solve", "overlays"]
+    assert thumbnails == [False, True]
+
+
+def test_ingest_job_skips_posts_deleted_in_the_meantime(app, monkeypatch, recording_conn):
+    from AstroSpace.services import ingest
+
+    monkeypatch.setattr(ingest, "Simbad", FakeSimbad)
+    conn = recording_conn()
+
+    with app.app_context():
+        result = ingest.run_ingest_job(conn, _claimed_job(payload=ingest.build_ingest_payload(1, "M31")))
+
+    assert result == {"skipped": "post deleted"}
+    assert conn.queries("UPDATE images") == []
+
+
+def test_job_status_endpoint_is_limited_to_the_post_owner(app, monkeypatch):
+    from datetime import datetime
+
+    from werkzeug.exceptions import Forbidden
+
+    from AstroSpace import blog
+
+    job = {
+        "id": 4,
+        "kind": "ingest_post",
+        "status": "failed",
+        "image_id": 7,
+        "attempts": 3,
+        "max_attempts": 3,
+        "progress": None,
+        "cancel_requested": False,
+        "result": None,
+        "error": "RuntimeError: no solution",
+        "created_at": datetime(2026, 10, 18, 9),
+        "updated_at": datetime(2026, 10, 18, 9, 5),
+        "finished_at": datetime(2026, 10, 18, 9, 5),
+    }
+    monkeypatch.setattr(blog, "fetch_job", lambda job_id: job if job_id == 4 else None)
+    monkeypatch.setattr(blog, "get_image_card", lambda image_id: {"id": image_id, "author": "tester"})
+
+    with app.test_request_context("/jobs/4"):
+        g.user = {"id": 1, "username": "tester", "admin": False}
+        payload = blog.job_status(job_id=4).get_json()
+
+    assert payload["status"] == "failed"
+    assert payload["error"] == "RuntimeError: no solution"
+
+    with app.test_request_context("/jobs/4"):
+        g.user = {"id": 2, "username": "someone", "admin": False}
+        try:
+            blog.job_status(job_id=4)
+        except Forbidden:
+            pass
+        else:
+            raise AssertionError("Expected another user's job to be forbidden.")
+
+
+def test_worker_command_listens_on_its_own_connection(monkeypatch):
+    from AstroSpace.__main__ import handle_management_command
+
+    class ListenConnection:
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    conn = ListenConnection()
+    started = []
+    monkeypatch.setattr("AstroSpace.create_app", lambda: "app")
+    monkeypatch.setattr("AstroSpace.__main__.open_connection", lambda: conn)
+    monkeypatch.setattr(
+        "AstroSpace.services.jobs.run_worker",
+        lambda app, listen_conn=None, kinds=None: started.append((app, listen_conn, kinds)),
+    )
+
+    assert handle_management_command(["worker", "ingest_post"]) is True
+    assert started == [("app", conn, ["ingest_post"])]
+    assert conn.closed is True
@@ -0,0 +1,137 @@
+import threading
+import time
+
+
+def _fake_stages(monkeypatch, prepared_calls):
+    from AstroSpace.services import plate_rebuild
+
+    def prepare_stage(image_path, public_path, header_json, thumbnail=True):
+        prepared_calls.append(public_path)
+        if header_json == "BROKEN":
+            raise ValueError("corrupt header")
+        return {"field": {"public_path": public_path}, "thumbnail_path": f"{public_path}_thumbnail.jpg", "thumbnail": thumbnail}
+
+    monkeypatch.setattr(plate_rebuild, "prepare_stage", prepare_stage)
+    monkeypatch.setattr(
+        plate_rebuild,
+        "finish_stage",
+        lambda prepared, objects, stars: (prepared["thumbnail_path"], objects, stars),
+    )
+
+
+def test_pool_rebuilds_items_in_order_and_reports_failures_after_retries(monkeypatch):
+    from AstroSpace.services.artifact_fingerprints import PLATE_ARTIFACTS
+    from AstroSpace.services.plate_rebuild import PlateRebuildPool
+
+    prepared_calls = []
+    _fake_stages(monkeypatch, prepared_calls)
+
+    def query(field):
+        return f"objects:{field['public_path']}", "stars"
+
+    items = [
+        (1, "/uploads/1/a.png", "1/a.png", "HEADER", PLATE_ARTIFACTS),
+        (2, "/uploads/1/b.png", "1/b.png", "BROKEN", PLATE_ARTIFACTS),
+        (3, "/uploads/1/c.png", "1/c.png", "HEADER", PLATE_ARTIFACTS),
+    ]
+    with PlateRebuildPool(processes=1, simbad_concurrency=2, attempts=2, query=query) as pool:
+        results = pool.rebuild(items)
+
+    assert results == [
+        (1, ("1/a.png_thumbnail.jpg", "objects:1/a.png", "stars"), 1, None),
+        (2, None, 2, "ValueError: corrupt header"),
+        (3, ("1/c.png_thumbnail.jpg", "objects:1/c.png", "stars"), 1, None),
+    ]
+    assert prepared_calls.count("1/b.png") == 2
+
+
+def test_pool_bounds_concurrent_simbad_queries(monkeypatch):
+    from AstroSpace.services.plate_rebuild import PlateRebuildPool
+
+    _fake_stages(monkeypatch, [])
+    lock = threading.Lock()
+    active = []
+    peak = []
+
+    def query(_field):
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.02)
+        with lock:
+            active.pop()
+        return None, None
+
+    items = [(key, f"/uploads/{key}.png", f"1/{key}.png", "HEADER", ("overlays",)) for key in range(8)]
+    with PlateRebuildPool(processes=1, simbad_concurrency=2, query=query) as pool:
+        results = pool.rebuild(items)
+
+    assert [key for key, *_rest in results] == list(range(8))
+    assert max(peak) == 2
+
+
+def test_pool_skips_simbad_when_only_the_thumbnail_is_stale(monkeypatch):
+    from AstroSpace.services.plate_rebuild import PlateRebuildPool
+
+    _fake_stages(monkeypatch, [])
+    queried = []
+
+    with PlateRebuildPool(processes=1, simbad_concurrency=1, query=queried.append) as pool:
+        ((key, artifacts, attempts, error),) = pool.rebuild([(5, "/uploads/1/a.png", "1/a.png", "HEADER", ("thumbnail",))])
+
+    assert (key, attempts, error) == (5, 1, None)
+    assert artifacts == {"thumbnail_path": "1/a.png_thumbnail.jpg", "thumbnail": True}
+    assert queried == []
+
+
+def test_process_pool_runs_the_real_stages_in_spawned_workers(tmp_path):
+    import json
+
+    import pandas as pd
+    from astropy.io.fits import Header
+    from PIL import Image
+
+    from AstroSpace.services.artifact_fingerprints import PLATE_ARTIFACTS
+    from AstroSpace.services.plate_rebuild import PlateRebuildPool
+
+    header = Header()
+    header["NAXIS"] = 2
+    header["NAXIS1"] = 640
+    header["NAXIS2"] = 480
+    header["CTYPE1"] = "RA---TAN"
+    header["CTYPE2"] = "DEC--TAN"
+    header["CRVAL1"] = 83.82
+    header["CRVAL2"] = -5.39
+    header["CRPIX1"] = 320.5
+    header["CRPIX2"] = 240.5
+    header["CDELT1"] = -0.0005
+    header["CDELT2"] = 0.0005
+
+    items = []
+    for key in (1, 2):
+        image_path = tmp_path / f"m42-{key}.png"
+        Image.new("RGB", (640, 480), (12, 18, 40)).save(image_path)
+        items.append((key, str(image_path), f"1/m42-{key}.png", header.tostring(), PLATE_ARTIFACTS))
+
+    # The query runs on a coordinator thread in this process; only the stages cross into the workers.
+    empty_objects = pd.DataFrame(
+        columns=["ids", "main_id", "ra", "dec", "galdim_majaxis", "galdim_minaxis", "galdim_angle", "otype"]
+    )
+    empty_stars = pd.DataFrame(columns=["main_id", "ra", "dec", "otype", "plx_value", "U", "B", "V", "sp_type"])
+    fields = []
+
+    def query(field):
+        fields.append(field)
+        return empty_objects, empty_stars
+
+    with PlateRebuildPool(processes=2, simbad_concurrency=2, query=query) as pool:
+        results = pool.rebuild(items)
+
+    assert [(key, attempts, error) for key, _artifacts, attempts, error in results] == [(1, 1, None), (2, 1, None)]
+    for key, artifacts, _attempts, _error in results:
+        assert artifacts["thumbnail_path"] == f"1/m42-{key}_thumbnail.jpg"
+        assert round(artifacts["pixel_scale"], 1) == 1.8
+        assert json.loads(artifacts["overlays_json"])["width"] == 640
+        assert (tmp_path / f"m42-{key}_thumbnail.jpg").exists()
+    assert sorted(round(field["ra_center"], 2) for field in fields) == [83.82, 83.82]
+
@@ -0,0 +1,317 @@
+"""EXPLAIN every hot-path query against a seeded PostgreSQL and reject sequential scans.
+
+Point ``ASTROSPACE_TEST_DSN`` at a disposable database: the harness migrates it
+to head and seeds a few thousand posts with their relations. Statements are
+recorded from the code that issues them (real requests, repository calls and a
+rolled-back comment submission), never copied into the test.
+"""
+
+import os
+
+import pytest
+from psycopg2.extensions import connection, parse_dsn
+from psycopg2.extras import RealDictCursor
+from psycopg2.sql import Composable
+
+from AstroSpace import db
+
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("ASTROSPACE_TEST_DSN"),
+    reason="set ASTROSPACE_TEST_DSN to a disposable PostgreSQL database to check query plans",
+)
+
+SEED_IMAGES = 5000
+LARGE_TABLES = {
+    "images",
+    "image_artifacts",
+    "capture_dates",
+    "image_lights",
+    "image_software",
+    "related_image_media",
+    "image_views",
+    "image_likes",
+    "image_comments",
+}
+
+SEED_STATEMENTS = (
+    """
+    INSERT INTO cam_filter (name, type, link)
+    SELECT 'Filter ' || n, CASE WHEN n %% 2 = 0 THEN 'Narrowband' ELSE 'Broadband' END, ''
+    FROM generate_series(1, 20) AS n
+    """,
+    """
+    INSERT INTO images (title, slug, author, image_path, created_at)
+    SELECT
+        'Object ' || (n %% 1500),
+        'object-' || (n %% 1500),
+        'author' || (n %% 40),
+        n || '/image.jpg',
+        TIMESTAMP '2020-01-01' + n * INTERVAL '37 minutes'
+    FROM generate_series(1, %(images)s) AS n
+    """,
+    """
+    UPDATE images
+    SET sky_ra = (id * 7.31) %% 360,
+        sky_dec = (id * 3.17) %% 170 - 85,
+        field_radius = 0.5 + (id %% 4) * 0.5,
+        healpix = (id::bigint * 2516) %% 12582912
+    """,
+    """
+    INSERT INTO users (username, password)
+    SELECT 'author' || n, 'unused' FROM generate_series(0, 39) AS n
+    """,
+    """
+    INSERT INTO software (name, type)
+    SELECT 'Software ' || n, CASE WHEN n %% 2 = 0 THEN 'acquisition' ELSE 'processing' END
+    FROM generate_series(1, 10) AS n
+    """,
+    """
+    INSERT INTO image_software (image_id, software_id)
+    SELECT i.id, s.id FROM images i JOIN software s ON s.id IN (1 + i.id %% 5, 6 + i.id %% 5)
+    """,
+    """
+    INSERT INTO related_image_media (image_id, media_path, sort_order)
+    SELECT id, id || '/setup.jpg', 0 FROM images
+    """,
+    """
+    INSERT INTO image_artifacts (image_id, overlays_json, meta_json)
+    SELECT id, '[]', '{}' FROM images
+    """,
+    """
+    INSERT INTO capture_dates (image_id, capture_date, moon_illumination, moon_phase)
+    SELECT i.id, DATE '2020-01-01' + (i.id %% 900) + d, (i.id %% 100)::float, 'Waxing Gibbous'
+    FROM images i CROSS JOIN generate_series(0, 2) AS d
+    """,
+    """
+    INSERT INTO image_lights (image_id, cam_filter, light_count, exposure_time, gain, offset_cam, temperature)
+    SELECT i.id, 'Filter ' || (f + 1), 60, 300, 100, 50, -10
+    FROM images i CROSS JOIN generate_series(0, 2) AS f
+    """,
+    """
+    INSERT INTO image_views (image_id, visitor_hash, visitor_source)
+    SELECT i.id, 'visitor-' || v, 'network'
+    FROM images i CROSS JOIN generate_series(1, 10) AS v
+    """,
+    """
+    INSERT INTO image_likes (image_id, visitor_hash, visitor_source)
+    SELECT i.id, 'visitor-' || v, 'network'
+    FROM images i CROSS JOIN generate_series(1, 3) AS v
+    """,
+    """
+    INSERT INTO image_comments (image_id, comment, commented_by, visitor_hash, visitor_source, status)
+    SELECT i.id, 'Clear skies', 'Visitor', 'visitor-' || (i.id %% 500), 'network', 'published'
+    FROM images i CROSS JOIN generate_series(1, 2) AS c
+    """,
+)
+
+class RecordingConnection(connection):
+    """Keeps every executed statement; ``hold_commits`` turns ``commit()`` into a no-op."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.recorded = []
+        self.hold_commits = False
+
+    def commit(self):
+        if not self.hold_commits:
+            super().commit()
+
+
+class RecordingCursor(RealDictCursor):
+    def execute(self, query, vars=None):
+        if isinstance(query, Composable):
+            query = query.as_string(self)
+        elif isinstance(query, bytes):
+            query = query.decode("utf-8")
+        self.connection.recorded.append((query, vars))
+        return super().execute(query, vars)
+
+
+@pytest.fixture(scope="module")
+def seeded_conn():
+    import psycopg2
+
+    dsn = parse_dsn(os.environ["ASTROSPACE_TEST_DSN"])
+    db.upgrade_db(
+        config_source={
+            "DB_NAME": dsn.get("dbname"),
+            "DB_USER": dsn.get("user"),
+            "DB_PASSWORD": dsn.get("password", ""),
+            "DB_HOST": dsn.get("host", "localhost"),
+            "DB_PORT": int(dsn.get("port", 5432)),
+        }
+    )
+
+    conn = psycopg2.connect(
+        os.environ["ASTROSPACE_TEST_DSN"], connection_factory=RecordingConnection, cursor_factory=RecordingCursor
+    )
+    with conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) AS total FROM images")
+        if cur.fetchone()["total"] < SEED_IMAGES:
+            for statement in SEED_STATEMENTS:
+                cur.execute(statement, {"images": SEED_IMAGES})
+    conn.commit()
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        # Settled tables, as in production: fresh statistics and an up-to-date visibility map.
+        cur.execute("VACUUM ANALYZE")
+    conn.recorded.clear()
+
+    yield conn
+    conn.close()
+
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def assert_no_large_seq_scan(conn, label, query, params):
+    with conn.cursor() as cur:
+        statement = cur.mogrify(query, params).decode("utf-8")
+        cur.execute("EXPLAIN (FORMAT JSON) " + statement)
+        plan = cur.fetchone()["QUERY PLAN"][0]["Plan"]
+
+    scanned = sorted(
+        {
+            node["Relation Name"]
+            for node in _plan_nodes(plan)
+            if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in LARGE_TABLES
+        }
+    )
+    assert not scanned, f"{label} sequentially scans {', '.join(scanned)}:\n{statement}"
+
+
+def _sample_image(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT id, slug FROM images ORDER BY id OFFSET %s LIMIT 1", (SEED_IMAGES // 2,))
+        return cur.fetchone()
+
+
+def _app(**overrides):
+    from AstroSpace import create_app
+
+    # Requests get the seeded connection directly; the DB settings are never used.
+    return create_app(
+        {
+            "TESTING": True,
+            "SECRET_KEY": "test-secret",
+            "DB_NAME": "unused",
+            "DB_USER": "unused",
+            "DB_PASSWORD": "unused",
+            "DB_HOST": "localhost",
+            "DB_PORT": 5432,
+            "SKIP_DB_INIT": True,
+            **overrides,
+        }
+    )
+
+
+def _identity(visitor_hash):
+    from AstroSpace.services.engagement import VisitorIdentity
+
+    return VisitorIdentity(
+        visitor_hash=visitor_hash,
+        visitor_source="network",
+        ip_hash=None,
+        user_agent_hash=None,
+        visitor_cookie_hash=None,
+        visitor_cookie_value=None,
+        new_visitor_cookie=None,
+    )
+
+
+class _KeepOpen:
+    """Stands in for the pool so request teardown leaves the shared connection open."""
+
+    @staticmethod
+    def putconn(_conn):
+        return None
+
+
+def test_view_queries_use_indexes(seeded_conn):
+    from flask import g
+
+    app = _app(VIEW_BUFFER_ENABLED=False)
+
+    @app.before_request
+    def use_seeded_connection():
+        g.db = seeded_conn
+        g.db_pool = _KeepOpen
+
+    sample = _sample_image(seeded_conn)
+    client = app.test_client()
+    seeded_conn.recorded.clear()
+
+    assert client.get(f"/image/{sample['id']}/{sample['slug']}").status_code == 200
+    assert client.get("/profile/author7").status_code == 200
+
+    recorded = list(seeded_conn.recorded)
+    assert any("WHERE slug = %s" in query for query, _params in recorded)
+    assert any("WHERE author = %s" in query for query, _params in recorded)
+    for query, params in recorded:
+        assert_no_large_seq_scan(seeded_conn, "view query", query, params)
+
+
+def test_comment_submission_uses_indexes(seeded_conn, monkeypatch):
+    from AstroSpace.services import engagement
+
+    app = _app(COMMENT_TOKEN_BUCKET_ENABLED=False)
+    monkeypatch.setattr(engagement, "get_conn", lambda: seeded_conn)
+    sample = _sample_image(seeded_conn)
+
+    # Record the statement submit_image_comment really runs, inside a transaction that is rolled back.
+    seeded_conn.autocommit = False
+    seeded_conn.hold_commits = True
+    seeded_conn.recorded.clear()
+    try:
+        with app.app_context():
+            engagement.submit_image_comment(sample["id"], _identity("visitor-plan"), "Visitor", "Clear skies")
+        recorded = list(seeded_conn.recorded)
+    finally:
+        seeded_conn.rollback()
+        seeded_conn.hold_commits = False
+        seeded_conn.autocommit = True
+
+    assert any("INSERT INTO image_comments" in query for query, _params in recorded)
+    for query, params in recorded:
+        assert_no_large_seq_scan(seeded_conn, "comment submission", query, params)
+
+
+def test_repository_queries_use_indexes(seeded_conn, monkeypatch):
+    from AstroSpace.repositories import images
+    from AstroSpace.services import engagement, sky_positions
+
+    monkeypatch.setattr(images, "get_conn", lambda: seeded_conn)
+    monkeypatch.setattr(sky_positions, "get_conn", lambda: seeded_conn)
+    monkeypatch.setattr(engagement, "get_conn", lambda: seeded_conn)
+    sample = _sample_image(seeded_conn)
+    identity = _identity("visitor-3")
+    seeded_conn.recorded.clear()
+
+    images.image_exists(sample["id"])
+    images.get_image_card(sample["id"])
+    images.get_image_by_id(sample["id"])
+    images.fetch_image_artifacts(sample["id"])
+    images.fetch_image_detail_rows([sample["id"], sample["id"] + 1])
+    images.get_adjacent_posts(sample["id"], sample["slug"])
+    images.search_images("author7")
+    _rows, next_after = images.get_collection_page({})
+    images.get_collection_page({}, after=next_after)
+    images.get_collection_page({"author": "author7", "object_type": "Galaxy"})
+    images.get_all_images(unique=True, limit=10)
+    images.suggest_object_names("NGC 1")
+    # load_collection_filter_metadata is left out on purpose: its facet counts and ranges aggregate the
+    # whole catalogue by design, and they are cached per process behind cache_versions, so they only
+    # run after a post changes, not per request.
+    images.count_collection_images({})
+    images.count_collection_images({"author": "author7"})
+    sky_positions.cone_search(10.68, 41.27, 2.0)
+    engagement.fetch_image_engagement_states([sample["id"], sample["id"] + 1], identity)
+
+    recorded = list(seeded_conn.recorded)
+    assert recorded
+    for query, params in recorded:
+        assert_no_large_seq_scan(seeded_conn, "repository query", query, params)
@@ -0,0 +1,51 @@
+from AstroSpace.services.rate_limit import TokenBucketLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_limiter(clock, **kwargs):
+    options = {"capacity": 5, "window_seconds": 900, "cooldown_seconds": 60}
+    options.update(kwargs)
+    return TokenBucketLimiter(clock=clock, **options)
+
+
+def test_cooldown_applies_between_accepted_events():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+
+    assert limiter.acquire("visitor") is None
+    clock.now += 59
+    assert limiter.acquire("visitor") == "cooldown"
+    clock.now += 1
+    assert limiter.acquire("visitor") is None
+    assert limiter.acquire("someone-else") is None
+
+
+def test_burst_limit_refills_over_the_window():
+    clock = FakeClock()
+    limiter = make_limiter(clock, cooldown_seconds=0)
+
+    for _ in range(5):
+        assert limiter.acquire("visitor") is None
+    assert limiter.acquire("visitor") == "burst"
+
+    clock.now += 900 / 5
+    assert limiter.acquire("visitor") is None
+
+
+def test_only_recent_keys_are_remembered():
+    clock = FakeClock()
+    limiter = make_limiter(clock, max_keys=2)
+
+    limiter.acquire("a")
+    limiter.acquire("b")
+    limiter.acquire("c")
+
+    assert limiter.acquire("a") is None
+    assert limiter.acquire("c") == "cooldown"
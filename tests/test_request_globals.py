@@ -0,0 +1,116 @@
+import pytest
+from flask import g
+
+
+def _fail_if_database_is_touched():
+    raise AssertionError("asset requests must not open a database connection")
+
+
+@pytest.fixture
+def db_app(app, monkeypatch):
+    from AstroSpace import auth, db
+
+    monkeypatch.setattr(db, "get_conn", _fail_if_database_is_touched)
+    monkeypatch.setattr(auth, "get_conn", _fail_if_database_is_touched)
+    return app
+
+
+def test_upload_favicon_and_static_requests_skip_database(db_app, tmp_path):
+    upload_dir = tmp_path / "uploads" / "1"
+    upload_dir.mkdir(parents=True)
+    (upload_dir / "thumb.jpg").write_bytes(b"jpeg")
+    client = db_app.test_client()
+
+    with client.session_transaction() as session:
+        session["user_id"] = 1
+
+    assert client.get("/uploads/1/thumb.jpg").status_code == 200
+    assert client.get("/favicon.ico").status_code == 204
+    assert client.get("/static/js/utils.js").status_code == 200
+
+
+class FakeUserCursor:
+    def __init__(self, queries):
+        self.queries = queries
+        self.query = ""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def execute(self, query, params=None):
+        self.query = " ".join(query.split())
+        self.queries.append((self.query, params))
+
+    def fetchone(self):
+        if "cache_versions" in self.query:
+            return {"version": 1}
+        if "api_key" in self.query:
+            return {"astrometry_api_key": "secret", "open_weather_api_key": None, "telescopius_api_key": None}
+        return {"id": 3, "username": "vega", "admin": False, "display_name": "Vega", "display_image": ""}
+
+
+class FakeUserConnection:
+    def __init__(self):
+        self.queries = []
+
+    def cursor(self):
+        return FakeUserCursor(self.queries)
+
+
+def test_user_is_loaded_only_when_read(app, monkeypatch):
+    from AstroSpace import auth
+
+    conn = FakeUserConnection()
+    monkeypatch.setattr(auth, "get_conn", lambda: conn)
+
+    with app.test_request_context("/"):
+        from flask import session
+
+        session["user_id"] = 3
+        assert conn.queries == []
+        assert g.user["username"] == "vega"
+        assert g.get("user")["id"] == 3
+
+    user_queries = [params for query, params in conn.queries if "FROM users" in query]
+    assert user_queries == [(3,)]
+    assert "api_key" not in conn.queries[-1][0]
+
+
+def test_user_principal_is_cached_across_requests_and_secrets_load_on_demand(app, monkeypatch):
+    from AstroSpace import auth
+
+    conn = FakeUserConnection()
+    monkeypatch.setattr(auth, "get_conn", lambda: conn)
+
+    for _ in range(3):
+        with app.test_request_context("/"):
+            from flask import session
+
+            session["user_id"] = 3
+            assert g.user["username"] == "vega"
+            assert "astrometry_api_key" not in g.user
+
+    assert len([query for query, _params in conn.queries if "FROM users" in query]) == 1
+
+    with app.test_request_context("/"):
+        from flask import session
+
+        session["user_id"] = 3
+        assert g.user_secrets["astrometry_api_key"] == "secret"
+
+        auth.forget_user(3)
+        g.pop("user")
+        assert g.user["id"] == 3
+
+    assert len([query for query, _params in conn.queries if "SELECT id, username" in query]) == 2
+
+
+def test_explicitly_assigned_user_overrides_loader(app):
+    with app.test_request_context("/"):
+        g.user = {"id": 9, "username": "deneb"}
+
+        assert g.user["username"] == "deneb"
+        assert g.web_info == {}
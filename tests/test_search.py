@@ -0,0 +1,97 @@
+from datetime import datetime
+
+
+def test_search_images_ranks_the_generated_document(monkeypatch, recording_conn):
+    from AstroSpace.repositories import images
+
+    conn = recording_conn([[{"id": 3, "title": "M31"}]])
+    monkeypatch.setattr(images, "get_conn", lambda: conn)
+
+    assert images.search_images('andromeda "dust lanes"', limit=5) == [{"id": 3, "title": "M31"}]
+
+    query, params = conn.executed[0]
+    assert "websearch_to_tsquery('english', %(terms)s)" in query
+    assert "WHERE i.search_document @@ q.query" in query
+    assert "ORDER BY rank DESC, i.created_at DESC, i.id DESC" in query
+    assert params == {"terms": 'andromeda "dust lanes"', "limit": 5}
+
+
+def test_search_images_returns_only_the_latest_version_of_each_title(monkeypatch, recording_conn):
+    from AstroSpace.repositories import images
+
+    conn = recording_conn([[]])
+    monkeypatch.setattr(images, "get_conn", lambda: conn)
+
+    images.search_images("andromeda")
+
+    query, _params = conn.executed[0]
+    assert (
+        "NOT EXISTS ( SELECT 1 FROM images newer WHERE newer.title = i.title "
+        "AND (newer.created_at, newer.id) > (i.created_at, i.id) )"
+    ) in query
+
+
+def test_object_suggestions_escape_like_wildcards(monkeypatch, recording_conn):
+    from AstroSpace.repositories import images
+
+    conn = recording_conn([[{"title": "NGC 7000"}, {"title": "NGC 7023"}]])
+    monkeypatch.setattr(images, "get_conn", lambda: conn)
+
+    assert images.suggest_object_names("NGC_70%") == ["NGC 7000", "NGC 7023"]
+
+    query, params = conn.executed[0]
+    assert "title ILIKE %(prefix)s OR title %% %(term)s" in query
+    assert params == {"term": "NGC_70%", "prefix": "NGC\\_70\\%%", "limit": 8}
+
+
+def test_search_endpoint_returns_collection_cards(app, client, monkeypatch):
+    from AstroSpace import blog
+
+    calls = []
+
+    def fake_search(terms, limit):
+        calls.append((terms, limit))
+        return [
+            {
+                "id": 4,
+                "title": "Orion Nebula",
+                "short_description": "M42 in HOO",
+                "slug": "orion-nebula",
+                "image_path": "4/orion.jpg",
+                "image_thumbnail": "4/orion_thumb.jpg",
+                "created_at": datetime(2026, 1, 2),
+            }
+        ]
+
+    monkeypatch.setattr(blog, "search_images", fake_search)
+
+    response = client.get("/search?q=orion&limit=500")
+
+    assert response.status_code == 200
+    assert calls == [("orion", 50)]
+    payload = response.get_json()
+    assert payload["query"] == "orion"
+    assert payload["results"][0]["url"] == "/image/4/orion-nebula"
+    assert payload["results"][0]["thumbnail_url"] == "/uploads/4/orion_thumb.jpg"
+
+
+def test_search_endpoints_skip_the_database_for_empty_terms(client, monkeypatch):
+    from AstroSpace import blog
+
+    def fail(*_args, **_kwargs):
+        raise AssertionError("empty terms should not be searched")
+
+    monkeypatch.setattr(blog, "search_images", fail)
+    monkeypatch.setattr(blog, "suggest_object_names", fail)
+
+    assert client.get("/search?q=%20").get_json() == {"query": "", "results": []}
+    assert client.get("/search/suggest?q=m").get_json() == {"query": "m", "suggestions": []}
+
+
+def test_suggest_endpoint_returns_titles(client, monkeypatch):
+    from AstroSpace import blog
+
+    monkeypatch.setattr(blog, "suggest_object_names", lambda term: [f"{term} 31", f"{term} 33"])
+
+    assert client.get("/search/suggest?q=M ").get_json() == {"query": "M", "suggestions": []}
+    assert client.get("/search/suggest?q=Ms").get_json() == {"query": "Ms", "suggestions": ["Ms 31", "Ms 33"]}
@@ -0,0 +1,183 @@
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from astropy.wcs import WCS
+
+
+FIXTURES = Path(__file__).parent / "fixtures" / "simbad"
+
+
+def _m31_header():
+    wcs = WCS(naxis=2)
+    wcs.wcs.ctype = ["RA---TAN", "DEC--TAN"]
+    wcs.wcs.crval = [10.6847, 41.2690]
+    wcs.wcs.crpix = [1500, 1000]
+    wcs.wcs.cdelt = [-0.001, 0.001]
+    header = wcs.to_header()
+    header["IMAGEW"] = 3000
+    header["IMAGEH"] = 2000
+    return header.tostring()
+
+
+@pytest.fixture
+def use_cache(monkeypatch):
+    from AstroSpace.utils import simbad_cache
+
+    def install(directory, **options):
+        cache = simbad_cache.SimbadRegionCache(str(directory), **options)
+        monkeypatch.setattr(simbad_cache, "_cache", cache)
+        return cache
+
+    return install
+
+
+def test_equivalent_region_queries_share_one_key():
+    from AstroSpace.utils.simbad_cache import normalize_region_query, region_query_key
+
+    first = normalize_region_query(370.68470001, 41.269, 0.5, ("otype", "ids"), "otype  NOT IN ('G')")
+    second = normalize_region_query(10.6847, 41.26900004, 0.50000001, ["ids", "otype"], "otype NOT IN ('G')")
+
+    assert region_query_key(first) == region_query_key(second)
+    assert region_query_key(first) != region_query_key(normalize_region_query(10.6847, 41.269, 0.6, ["ids", "otype"]))
+
+
+def test_cache_counts_hits_and_misses_and_expires_entries(tmp_path):
+    from AstroSpace.utils.simbad_cache import SimbadRegionCache, normalize_region_query
+
+    cache = SimbadRegionCache(str(tmp_path), ttl=60)
+    query = normalize_region_query(10.0, 20.0, 0.5, ["otype"])
+    table = pd.DataFrame({"main_id": ["M 31"], "ra": [10.68], "plx_value": [float("nan")]})
+
+    assert cache.get(query) is None
+    cache.put(query, table)
+    pd.testing.assert_frame_equal(cache.get(query), table)
+
+    entry = next(tmp_path.glob("*.json"))
+    stored = json.loads(entry.read_text(encoding="utf-8"))
+    entry.write_text(json.dumps({**stored, "stored_at": time.time() - 120}), encoding="utf-8")
+    assert cache.get(query) is None
+    assert not entry.exists()
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expired"], stats["stores"]) == (1, 2, 1, 1)
+    assert stats["hit_rate"] == 0.333
+
+
+def test_cache_evicts_least_recently_used_entries_past_its_size_limit(tmp_path):
+    from AstroSpace.utils.simbad_cache import SimbadRegionCache, normalize_region_query, region_query_key
+
+    cache = SimbadRegionCache(str(tmp_path), max_bytes=10**9)
+    queries = [normalize_region_query(ra, 0.0, 0.5, ["otype"]) for ra in (1.0, 2.0, 3.0)]
+    table = pd.DataFrame({"main_id": ["x" * 200]})
+    for age, query in enumerate(queries):
+        cache.put(query, table)
+        os.utime(cache._path(region_query_key(query)), (time.time() - 100 + age, time.time() - 100 + age))
+    assert cache.get(queries[0]) is not None  # touching it makes queries[1] the oldest
+
+    cache.max_bytes = 2 * max(size for _mtime, size, _path in cache._entries())
+    assert cache.evict() == 1
+    assert cache.get(queries[1]) is None
+    assert cache.get(queries[0]) is not None and cache.get(queries[2]) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_offline_mode_replays_recorded_fixtures_without_the_network(tmp_path, use_cache, monkeypatch):
+    """``tests/fixtures/simbad`` holds cache entries for the M31 test field.
+
+    To re-record them against the live service, point ``SIMBAD_CACHE_DIR`` at a
+    scratch directory, run ``get_overlays`` for the header below online and
+    copy the two new files here.
+    """
+    from AstroSpace.utils import platesolve
+
+    replay = tmp_path / "simbad"
+    shutil.copytree(FIXTURES, replay)
+    cache = use_cache(replay, offline=True)
+    monkeypatch.setattr(platesolve, "_simbad_client", lambda _fields: pytest.fail("offline mode used the network"))
+
+    payload = platesolve.get_overlays(_m31_header())
+
+    assert payload["overlays"]["name"] == ["M  31", "M 110", "M  32"]
+    assert "HD 3914" in payload["plots"]["hr"]["name"]
+    assert cache.stats()["hits"] == 2
+
+
+def test_offline_mode_raises_on_a_miss(tmp_path, use_cache):
+    from AstroSpace.utils import platesolve
+    from AstroSpace.utils.simbad_cache import SimbadOffline
+
+    use_cache(tmp_path, offline=True)
+
+    with pytest.raises(SimbadOffline):
+        platesolve.query_region_cached(platesolve.OVERLAY_OBJECT_FIELDS, 83.82, -5.39, 0.4)
+
+
+def test_offline_mode_leaves_post_titles_unresolved(tmp_path, use_cache, monkeypatch):
+    from AstroSpace.services import ingest
+
+    use_cache(tmp_path, offline=True)
+    monkeypatch.setattr(ingest.Simbad, "query_object", lambda _name: pytest.fail("offline mode used the network"))
+
+    assert ingest.resolve_object_name("M31") == ("M31", "Unknown")
+
+
+def test_offline_mode_refuses_cone_search_targets(client, tmp_path, use_cache, monkeypatch):
+    from AstroSpace import blog
+
+    use_cache(tmp_path, offline=True)
+    monkeypatch.setattr(blog.Simbad, "query_object", lambda _name: pytest.fail("offline mode used the network"))
+    monkeypatch.setattr(blog, "cone_search", lambda *args, **kwargs: [])
+
+    response = client.get("/sky/cone?target=M31")
+
+    assert response.status_code == 503
+    assert "give ra and dec" in response.get_json()["message"]
+    assert client.get("/sky/cone?ra=10.68&dec=41.27").status_code == 200
+
+
+def test_online_miss_queries_simbad_once_and_stores_the_result(tmp_path, use_cache, monkeypatch):
+    from AstroSpace.utils import platesolve
+
+    cache = use_cache(tmp_path)
+    calls = []
+
+    class FakeTable:
+        def to_pandas(self):
+            return pd.DataFrame({"main_id": ["M 42"], "ra": [83.82], "dec": [-5.39]})
+
+    class FakeClient:
+        def query_region(self, coord, radius, criteria=None):
+            calls.append((round(coord.ra.deg, 2), round(radius.value, 2), criteria))
+            return FakeTable()
+
+    monkeypatch.setattr(platesolve, "_simbad_client", lambda _fields: FakeClient())
+
+    first = platesolve.query_region_cached(("otype",), 83.82, -5.39, 0.4, criteria="otype = 'HII'")
+    second = platesolve.query_region_cached(("otype",), 83.82, -5.39, 0.4, criteria="otype = 'HII'")
+
+    assert calls == [(83.82, 0.4, "otype = 'HII'")]
+    pd.testing.assert_frame_equal(first, second)
+    assert (cache.stats()["hits"], cache.stats()["misses"], cache.stats()["entries"]) == (1, 1, 1)
+
+
+def test_simbad_cache_command_prunes_expired_entries(tmp_path, monkeypatch):
+    from AstroSpace.__main__ import handle_management_command
+    from AstroSpace.config import Config
+    from AstroSpace.utils.simbad_cache import SimbadRegionCache, normalize_region_query
+
+    cache = SimbadRegionCache(str(tmp_path), ttl=60)
+    for ra in (1.0, 2.0):
+        cache.put(normalize_region_query(ra, 0.0, 0.5, ["otype"]), pd.DataFrame({"main_id": ["x"]}))
+    expired = sorted(tmp_path.glob("*.json"))[0]
+    expired.write_text(json.dumps({**json.loads(expired.read_text(encoding="utf-8")), "stored_at": 0}), encoding="utf-8")
+    monkeypatch.setattr(Config, "SIMBAD_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(Config, "SIMBAD_CACHE_TTL", 60.0)
+
+    assert handle_management_command(["simbad-cache", "prune"]) is True
+    assert len(list(tmp_path.glob("*.json"))) == 1
+    assert not expired.exists()
@@ -0,0 +1,78 @@
+from AstroSpace.services.cache import ProcessCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_process_cache_serves_fresh_entries_without_version_check(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr("AstroSpace.services.cache.time.monotonic", clock)
+    cache = ProcessCache()
+    loads = []
+    version_checks = []
+
+    def load():
+        loads.append(True)
+        return {"site_name": "AstroSpace"}
+
+    def current_version():
+        version_checks.append(True)
+        return 1
+
+    assert cache.get("web_info", 30, load, current_version) == {"site_name": "AstroSpace"}
+    clock.now += 10
+    assert cache.get("web_info", 30, load, current_version) == {"site_name": "AstroSpace"}
+
+    assert len(loads) == 1
+    assert len(version_checks) == 1
+
+
+def test_process_cache_revalidates_by_version_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr("AstroSpace.services.cache.time.monotonic", clock)
+    cache = ProcessCache()
+    state = {"version": 1, "site_name": "Old"}
+
+    def load():
+        return {"site_name": state["site_name"]}
+
+    def current_version():
+        return state["version"]
+
+    assert cache.get("web_info", 30, load, current_version)["site_name"] == "Old"
+
+    state["site_name"] = "New"
+    clock.now += 31
+    assert cache.get("web_info", 30, load, current_version)["site_name"] == "Old"
+
+    state["version"] = 2
+    clock.now += 31
+    assert cache.get("web_info", 30, load, current_version)["site_name"] == "New"
+
+
+def test_update_settings_bumps_web_info_version_and_drops_local_cache(app, monkeypatch, recording_conn):
+    from flask import g
+    from AstroSpace.profile import private
+    from AstroSpace.services.cache import get_process_cache
+
+    conn = recording_conn([{"id": 1, "version": 2}])
+    monkeypatch.setattr(private, "get_conn", lambda: conn)
+
+    with app.test_request_context(
+        "/private/update_settings",
+        method="POST",
+        data={"welcome_note": "Clear skies", "site_name": "Nightfall"},
+    ):
+        g.user = {"id": 1, "username": "admin", "admin": True}
+        cache = get_process_cache()
+        cache.get("web_info", 30, lambda: {"site_name": "Old"}, lambda: 1)
+        private.update_settings()
+        reloaded = cache.get("web_info", 30, lambda: {"site_name": "Nightfall"}, lambda: 2)
+
+    assert conn.queries("INSERT INTO cache_versions")
+    assert reloaded == {"site_name": "Nightfall"}
@@ -0,0 +1,179 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+from astropy.wcs import WCS
+
+
+def _wcs_header_string(ra=10.6847, dec=41.2690, scale_deg=0.001, width=3000, height=2000):
+    wcs = WCS(naxis=2)
+    wcs.wcs.ctype = ["RA---TAN", "DEC--TAN"]
+    wcs.wcs.crval = [ra, dec]
+    wcs.wcs.crpix = [width / 2, height / 2]
+    wcs.wcs.cdelt = [-scale_deg, scale_deg]
+    header = wcs.to_header()
+    header["IMAGEW"] = width
+    header["IMAGEH"] = height
+    return header.tostring()
+
+
+def test_healpix_pixel_centres_round_trip():
+    from AstroSpace.utils import healpix
+
+    base_ra, base_dec = healpix.pix2ang(0, np.arange(12))
+    assert base_ra.tolist() == [45, 135, 225, 315, 0, 90, 180, 270, 45, 135, 225, 315]
+    assert base_dec[:4] == pytest.approx([41.8103149] * 4)
+
+    for order in range(5):
+        pixels = np.arange(healpix.pixel_count(order))
+        ra, dec = healpix.pix2ang(order, pixels)
+        assert (healpix.ang2pix(order, ra, dec) == pixels).all()
+
+
+@pytest.mark.parametrize("ra, dec, radius", [(10.68, 41.27, 2.0), (83.8, -5.4, 0.3), (200.0, 89.5, 1.5), (0.2, -30.0, 12.0)])
+def test_cone_ranges_cover_every_point_inside_the_cone(ra, dec, radius):
+    from AstroSpace.utils import healpix
+
+    rng = np.random.default_rng(7)
+    offsets = rng.uniform(0, radius, 4000)
+    bearings = rng.uniform(0, 2 * np.pi, 4000)
+    # Points at ``offsets`` degrees from the centre along random bearings.
+    lat, bearing, distance = np.radians(dec), bearings, np.radians(offsets)
+    point_dec = np.arcsin(np.sin(lat) * np.cos(distance) + np.cos(lat) * np.sin(distance) * np.cos(bearing))
+    point_ra = np.radians(ra) + np.arctan2(
+        np.sin(bearing) * np.sin(distance) * np.cos(lat),
+        np.cos(distance) - np.sin(lat) * np.sin(point_dec),
+    )
+    pixels = healpix.ang2pix(healpix.HEALPIX_INDEX_ORDER, np.degrees(point_ra), np.degrees(point_dec))
+
+    ranges = healpix.cone_index_ranges(ra, dec, radius)
+    low = np.array([bounds[0] for bounds in ranges])
+    high = np.array([bounds[1] for bounds in ranges])
+    slot = np.searchsorted(low, pixels, side="right") - 1
+
+    assert (slot >= 0).all()
+    assert (pixels <= high[slot]).all()
+    covered = sum(bounds[1] - bounds[0] + 1 for bounds in ranges)
+    assert covered < healpix.pixel_count(healpix.HEALPIX_INDEX_ORDER) / 20
+
+
+def test_sky_position_from_header_extracts_centre_radius_and_footprint():
+    from AstroSpace.services.sky_positions import sky_position_from_header
+    from AstroSpace.utils.healpix import HEALPIX_INDEX_ORDER, ang2pix
+
+    position = sky_position_from_header(_wcs_header_string())
+
+    assert position["sky_ra"] == pytest.approx(10.6847)
+    assert position["sky_dec"] == pytest.approx(41.2690)
+    # Half the diagonal of a 3.0 x 2.0 degree field.
+    assert position["field_radius"] == pytest.approx(np.hypot(1.5, 1.0), rel=0.01)
+    assert len(position["footprint"]) == 4
+    assert position["healpix"] == int(ang2pix(HEALPIX_INDEX_ORDER, 10.6847, 41.2690))
+
+
+@pytest.mark.parametrize("header_json", [None, "", "SIMPLE  =                    T / no wcs here"])
+def test_sky_position_from_header_tolerates_missing_wcs(header_json):
+    from AstroSpace.services.sky_positions import SKY_POSITION_COLUMNS, sky_position_from_header
+
+    assert sky_position_from_header(header_json) == dict.fromkeys(SKY_POSITION_COLUMNS)
+
+
+def test_backfill_sky_positions_walks_posts_in_id_batches(recording_conn):
+    from AstroSpace.services.sky_positions import backfill_sky_positions
+
+    conn = recording_conn(
+        [
+            [{"id": 3, "header_json": _wcs_header_string()}, {"id": 5, "header_json": "SIMPLE  =  T"}],
+            [{"id": 9, "header_json": _wcs_header_string(ra=83.82, dec=-5.39)}],
+        ]
+    )
+
+    assert backfill_sky_positions(conn, batch_size=2) == 2
+
+    selects = [params for query, params in conn.executed if query.startswith("SELECT")]
+    updates = [params for query, params in conn.executed if query.startswith("UPDATE images SET sky_ra = %s")]
+    assert selects == [(0, 2), (5, 2)]
+    assert [params[-1] for params in updates] == [3, 9]
+    assert updates[1][:2] == pytest.approx((83.82, -5.39))
+    assert conn.commits == 2
+
+
+def test_sky_positions_migration_does_not_import_the_application():
+    from pathlib import Path
+
+    migration = (
+        Path(__file__).resolve().parents[1] / "AstroSpace" / "migrations" / "versions" / "20261018_0012_sky_positions.py"
+    )
+
+    assert "from AstroSpace" not in migration.read_text(encoding="utf-8")
+
+
+def test_cone_search_widens_the_index_scan_by_the_largest_field(monkeypatch, recording_conn):
+    from AstroSpace.services import sky_positions
+    from AstroSpace.utils.healpix import cone_index_ranges
+
+    conn = recording_conn([{"field_radius": 1.5}, [{"id": 1}]])
+    monkeypatch.setattr(sky_positions, "get_conn", lambda: conn)
+
+    assert sky_positions.cone_search(10.68, 41.27, 2.0, limit=10) == [{"id": 1}]
+
+    (_max_query, _), (query, params) = conn.executed
+    assert "JOIN images i ON i.healpix BETWEEN r.low AND r.high" in query
+    assert "WHERE s.separation <= %(radius)s + i.field_radius" in query
+    assert "AND i.id = ( SELECT newer.id FROM images newer WHERE newer.title = i.title" in query
+    assert list(zip(params["low"], params["high"])) == cone_index_ranges(10.68, 41.27, 3.5)
+    assert (params["ra"], params["dec"], params["radius"], params["limit"]) == (10.68, 41.27, 2.0, 10)
+
+
+def _cone_match():
+    return {
+        "id": 5,
+        "title": "M31",
+        "short_description": None,
+        "slug": "m31",
+        "image_path": "5/m31.jpg",
+        "image_thumbnail": None,
+        "created_at": datetime(2026, 1, 1),
+        "sky_ra": 10.7,
+        "sky_dec": 41.3,
+        "field_radius": 1.8,
+        "separation": 0.03,
+    }
+
+
+def test_cone_endpoint_takes_coordinates(client, monkeypatch):
+    from AstroSpace import blog
+
+    calls = []
+    monkeypatch.setattr(
+        blog,
+        "cone_search",
+        lambda ra, dec, radius, limit: calls.append((ra, dec, radius, limit)) or [_cone_match()],
+    )
+
+    payload = client.get("/sky/cone?ra=370.5&dec=41.27&radius=90").get_json()
+
+    assert calls == [(10.5, 41.27, 30.0, 50)]
+    assert payload["results"][0]["url"] == "/image/5/m31"
+    assert payload["results"][0]["separation"] == 0.03
+
+
+def test_cone_endpoint_resolves_targets_and_rejects_bad_input(client, monkeypatch):
+    from AstroSpace import blog
+
+    class FakeSimbad:
+        @staticmethod
+        def query_object(name):
+            return [{"main_id": "M  31", "ra": 10.6847, "dec": 41.2690}] if name == "M31" else []
+
+    calls = []
+    monkeypatch.setattr(blog, "Simbad", FakeSimbad)
+    monkeypatch.setattr(blog, "cone_search", lambda *args, **kwargs: calls.append(args) or [])
+
+    payload = client.get("/sky/cone?target=M31&radius=2").get_json()
+    assert payload["target"] == "M  31"
+    assert calls == [(10.6847, 41.2690, 2.0)]
+
+    assert client.get("/sky/cone?target=nothing").status_code == 400
+    assert client.get("/sky/cone").status_code == 400
+    assert client.get("/sky/cone?ra=10&dec=95").status_code == 400
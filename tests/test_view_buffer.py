@@ -0,0 +1,177 @@
+import time
+
+import pytest
+
+from AstroSpace.services.engagement import VisitorIdentity
+
+
+def make_identity(visitor_hash):
+    return VisitorIdentity(
+        visitor_hash=visitor_hash,
+        visitor_source="network",
+        ip_hash="ip-hash",
+        user_agent_hash="ua-hash",
+        visitor_cookie_hash=None,
+        visitor_cookie_value=None,
+        new_visitor_cookie=None,
+    )
+
+
+def make_buffer(**kwargs):
+    from AstroSpace.services.view_buffer import ViewBuffer
+
+    batches = []
+    options = {"dedupe_window": 60, "flush_interval": 60, "max_pending": 100}
+    options.update(kwargs)
+    return ViewBuffer(batches.append, **options), batches
+
+
+def test_repeat_views_within_window_are_deduplicated():
+    buffer, batches = make_buffer()
+
+    assert buffer.record(7, make_identity("a")) is True
+    assert buffer.record(7, make_identity("a")) is False
+    assert buffer.record(8, make_identity("a")) is True
+    assert buffer.flush() == 2
+
+    assert buffer.record(7, make_identity("a")) is False
+    assert buffer.flush() == 0
+    assert [(view["image_id"], view["visitor_hash"]) for view in batches[0]] == [(7, "a"), (8, "a")]
+    assert buffer.stats()["deduplicated"] == 2
+
+
+def test_views_are_recorded_again_after_window(monkeypatch):
+    clock = {"now": 1000.0}
+    monkeypatch.setattr("AstroSpace.services.view_buffer.time.monotonic", lambda: clock["now"])
+    buffer, batches = make_buffer(dedupe_window=60)
+
+    buffer.record(7, make_identity("a"))
+    clock["now"] += 61
+    buffer.record(7, make_identity("a"))
+    buffer.flush()
+
+    assert len(batches[0]) == 1
+    assert buffer.stats()["recorded"] == 2
+
+
+def test_background_thread_flushes_when_batch_is_full():
+    buffer, batches = make_buffer(max_pending=2)
+    buffer.start()
+    try:
+        buffer.record(7, make_identity("a"))
+        buffer.record(7, make_identity("b"))
+        deadline = time.monotonic() + 2
+        while not batches and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        buffer.close()
+
+    assert len(batches) == 1
+    assert {view["visitor_hash"] for view in batches[0]} == {"a", "b"}
+
+
+def test_close_flushes_pending_views():
+    buffer, batches = make_buffer()
+    buffer.start()
+
+    buffer.record(7, make_identity("a"))
+    buffer.close()
+
+    assert len(batches) == 1
+    assert buffer.stats()["pending"] == 0
+
+
+def test_failed_batch_is_counted_and_dropped():
+    from AstroSpace.services.view_buffer import ViewBuffer
+
+    def broken_write(_batch):
+        raise RuntimeError("database unavailable")
+
+    buffer = ViewBuffer(broken_write, dedupe_window=60, flush_interval=60, max_pending=100)
+    buffer.record(7, make_identity("a"))
+
+    assert buffer.flush() == 0
+    assert buffer.stats() == {"pending": 0, "recorded": 1, "deduplicated": 0, "flushed": 0, "failed": 1}
+
+
+def test_failed_batch_is_retried_row_by_row_so_only_bad_views_are_dropped():
+    from AstroSpace.services.view_buffer import ViewBuffer
+
+    written = []
+
+    def write_batch(batch):
+        if any(view["image_id"] == 9 for view in batch):
+            raise RuntimeError("image_views_image_id_fkey")
+        written.extend(batch)
+
+    buffer = ViewBuffer(write_batch, dedupe_window=60, flush_interval=60, max_pending=100)
+    for image_id, visitor in ((7, "a"), (9, "a"), (8, "b")):
+        buffer.record(image_id, make_identity(visitor))
+
+    assert buffer.flush() == 2
+    assert [view["image_id"] for view in written] == [7, 8]
+    assert buffer.stats() == {"pending": 0, "recorded": 3, "deduplicated": 0, "flushed": 2, "failed": 1}
+
+
+def test_record_image_view_buffers_without_touching_database(app, monkeypatch):
+    from AstroSpace.services import engagement, view_buffer
+
+    def fail_if_database_is_touched():
+        raise AssertionError("buffered views must not open a connection on the request path")
+
+    monkeypatch.setattr(engagement, "get_conn", fail_if_database_is_touched)
+    monkeypatch.setattr(view_buffer, "atexit", type("NoAtexit", (), {"register": staticmethod(lambda _fn: None)}))
+
+    with app.test_request_context("/image/7/m42"):
+        engagement.record_image_view(7, make_identity("a"))
+        buffer = view_buffer.get_view_buffer()
+
+    assert buffer.stats()["pending"] == 1
+    buffer.write_batch = lambda _batch: None
+    buffer.close()
+
+
+def test_write_view_batch_upserts_views_and_folds_sketches_in_one_transaction(monkeypatch, recording_conn):
+    from AstroSpace.services import view_buffer
+
+    calls = []
+    templates = []
+
+    def fake_execute_values(cur, query, rows, **kwargs):
+        calls.append((" ".join(query.split()), list(rows)))
+        templates.append(kwargs["template"])
+
+    monkeypatch.setattr(view_buffer, "execute_values", fake_execute_values)
+    monkeypatch.setattr(view_buffer, "record_view_sketches", lambda cur, batch: calls.append(("sketches", batch)))
+    buffer, _batches = make_buffer()
+    for image_id, visitor in ((7, "a"), (7, "b"), (8, "a")):
+        buffer.record(image_id, make_identity(visitor))
+    batch = list(buffer._pending.values())
+
+    conn = recording_conn()
+
+    view_buffer.write_view_batch(conn, batch)
+
+    assert "INSERT INTO image_views" in calls[0][0]
+    assert len(calls[0][1]) == 3
+    # The timestamps land on the same UTC day the rollup sketches bucket by.
+    assert templates[0].count("to_timestamp(%s) AT TIME ZONE 'UTC'") == 2
+    assert calls[1] == ("sketches", batch)
+    assert (conn.commits, conn.rollbacks) == (1, 0)
+
+
+def test_write_view_batch_rolls_back_a_failed_batch(monkeypatch, recording_conn):
+    from AstroSpace.services import view_buffer
+
+    def failing_execute_values(cur, query, rows, **kwargs):
+        raise RuntimeError("image_views_image_id_fkey")
+
+    monkeypatch.setattr(view_buffer, "execute_values", failing_execute_values)
+    buffer, _batches = make_buffer()
+    buffer.record(9, make_identity("a"))
+    conn = recording_conn()
+
+    with pytest.raises(RuntimeError):
+        view_buffer.write_view_batch(conn, list(buffer._pending.values()))
+
+    assert (conn.commits, conn.rollbacks) == (0, 1)
@@ -0,0 +1,179 @@
+from datetime import date, datetime, timezone
+
+from AstroSpace.services.hll import HyperLogLog
+
+
+def test_sketch_estimates_small_and_large_sets():
+    small = HyperLogLog().update(f"visitor-{n}" for n in range(100))
+    large = HyperLogLog().update(f"visitor-{n}" for n in range(50000))
+
+    assert abs(small.estimate() - 100) <= 2
+    assert abs(large.estimate() - 50000) / 50000 < 0.06
+    assert HyperLogLog().estimate() == 0
+
+
+def test_sketches_merge_as_a_union_and_repeats_do_not_count():
+    monday = HyperLogLog().update(f"visitor-{n}" for n in range(300))
+    tuesday = HyperLogLog().update(f"visitor-{n}" for n in range(200, 500))
+
+    week = HyperLogLog().merge(monday).merge(tuesday).merge(monday)
+
+    assert abs(week.estimate() - 500) / 500 < 0.05
+    assert HyperLogLog.from_bytes(week.to_bytes()).registers == week.registers
+    assert monday.add("visitor-1") is False
+
+
+def test_sketches_round_trip_compactly():
+    sketch = HyperLogLog().update(["a", "b", "c"])
+    payload = sketch.to_bytes()
+
+    assert len(payload) < 100
+    assert HyperLogLog.from_bytes(payload).estimate() == 3
+    assert HyperLogLog.from_bytes(None).estimate() == 0
+
+
+class SketchCursor:
+    def __init__(self, stored):
+        self.stored = stored
+        self.statements = []
+
+
+def fake_execute_values(cur, query, rows, template=None, page_size=100, fetch=False):
+    query = " ".join(query.split())
+    rows = list(rows)
+    cur.statements.append((query, rows))
+    if not fetch:
+        return None
+    key_columns = ("image_id", "day") if "image_view_rollups" in query else ("image_id",)
+    return [{**dict(zip(key_columns, key)), "sketch": cur.stored.get(key)} for key in rows]
+
+
+def test_record_view_sketches_merges_daily_and_lifetime_sketches(monkeypatch):
+    from AstroSpace.services import view_rollups
+
+    monkeypatch.setattr(view_rollups, "execute_values", fake_execute_values)
+    seen_at = datetime(2026, 10, 18, 12, tzinfo=timezone.utc).timestamp()
+    earlier = HyperLogLog().update(["a", "z"]).to_bytes()
+    cur = SketchCursor({(7, date(2026, 10, 18)): earlier, (7,): earlier})
+    batch = [
+        {"image_id": 7, "visitor_hash": "a", "seen_at": seen_at},
+        {"image_id": 7, "visitor_hash": "b", "seen_at": seen_at},
+        {"image_id": 8, "visitor_hash": "a", "seen_at": seen_at},
+    ]
+
+    view_rollups.record_view_sketches(cur, batch)
+
+    stores = [rows for query, rows in cur.statements if query.startswith("UPDATE")]
+    daily = {row[:2]: row[3] for row in stores[0]}
+    lifetime = {row[0]: row[2] for row in stores[1]}
+    assert daily == {(7, date(2026, 10, 18)): 3, (8, date(2026, 10, 18)): 1}
+    assert lifetime == {7: 3, 8: 1}
+    assert "FOR UPDATE OF t" in cur.statements[1][0]
+    assert "view_count = v.estimate" in cur.statements[-1][0]
+
+
+def test_view_history_endpoint_fills_missing_days(client, monkeypatch, recording_conn):
+    from AstroSpace import blog
+    from AstroSpace.services import view_rollups
+
+    monkeypatch.setattr(blog, "image_exists", lambda image_id: True)
+    conn = recording_conn([[{"day": date.today(), "visitors": 4}]])
+    monkeypatch.setattr(view_rollups, "get_conn", lambda: conn)
+    monkeypatch.setattr(
+        blog,
+        "fetch_view_history",
+        lambda image_id, days: view_rollups.fetch_view_history(image_id, days=days, today=date.today()),
+    )
+
+    response = client.get("/image/7/views?days=3")
+
+    assert response.status_code == 200
+    days = response.get_json()["days"]
+    assert [entry["visitors"] for entry in days] == [0, 0, 4]
+    assert days[-1]["day"] == date.today().isoformat()
+
+
+def test_prune_views_command_uses_retention_window(monkeypatch, recording_conn):
+    from AstroSpace.__main__ import handle_management_command
+
+    conn = recording_conn(rowcount=12)
+    monkeypatch.setattr("AstroSpace.__main__.open_connection", lambda: conn)
+
+    assert handle_management_command(["prune-views", "30"]) is True
+    assert "DELETE FROM image_views" in conn.executed[0][0]
+    assert conn.executed[0][1] == (30,)
+    assert conn.commits == 1
+    assert conn.closed is True
+
+
+def test_rebuild_view_rollups_folds_views_in_id_batches(monkeypatch, recording_conn):
+    from AstroSpace.services import view_rollups
+
+    def view(view_id, image_id, visitor_hash, first_seen_at, last_seen_at):
+        return {
+            "id": view_id,
+            "image_id": image_id,
+            "visitor_hash": visitor_hash,
+            "first_seen_at": first_seen_at,
+            "last_seen_at": last_seen_at,
+        }
+
+    pages = [
+        [
+            view(1, 7, "a", datetime(2026, 10, 17, 23), datetime(2026, 10, 18, 1)),
+            view(2, 8, "b", datetime(2026, 10, 18, 9), datetime(2026, 10, 18, 9)),
+        ],
+        [view(5, 7, "c", datetime(2026, 10, 18, 3), datetime(2026, 10, 18, 3))],
+    ]
+    folded = []
+    monkeypatch.setattr(view_rollups, "record_view_sketches", lambda _cur, batch: folded.append(batch))
+    conn = recording_conn(pages)
+
+    assert view_rollups.rebuild_view_rollups(conn, batch_size=2) == 3
+    assert [params for _query, params in conn.executed] == [(0, 2), (2, 2)]
+    assert conn.commits == 2
+    days = [view_rollups.view_day(entry["seen_at"]) for entry in folded[0][:2]]
+    assert days == [date(2026, 10, 17), date(2026, 10, 18)]
+    assert [entry["visitor_hash"] for entry in folded[1]] == ["c", "c"]
+
+
+def test_view_rollups_migration_encodes_sketches_like_the_service():
+    import importlib.util
+    from pathlib import Path
+
+    path = (
+        Path(__file__).resolve().parents[1]
+        / "AstroSpace"
+        / "migrations"
+        / "versions"
+        / "20261018_0008_view_rollups.py"
+    )
+    spec = importlib.util.spec_from_file_location("view_rollups_migration", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    visitors = [f"visitor-{index}" for index in range(5000)]
+    sketch = migration._Sketch()
+    for visitor in visitors:
+        sketch.add(visitor)
+    expected = HyperLogLog().update(visitors)
+
+    assert "from AstroSpace" not in path.read_text(encoding="utf-8")
+    assert sketch.to_bytes() == expected.to_bytes()
+    assert sketch.estimate() == expected.estimate()
+
+
+def test_view_rollups_migration_renders_as_offline_sql(monkeypatch, capsys):
+    from alembic import command
+
+    from AstroSpace.db import get_alembic_config
+
+    for name in ("DB_NAME", "DB_USER", "DB_PASSWORD", "DB_HOST"):
+        monkeypatch.setenv(name, "astro")
+    monkeypatch.setenv("DB_PORT", "5432")
+
+    command.upgrade(get_alembic_config(), "20261018_0007:20261018_0008", sql=True)
+
+    script = capsys.readouterr().out
+    assert "CREATE TABLE image_view_rollups" in script
+    assert "INSERT INTO image_view_rollups" not in script